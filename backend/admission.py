@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Admission Control / Controle de Admissão
+=======================================================
+
+Bounds how many agent loops (/chat) and command executions (/execute) run at
+once. Requests beyond the concurrency limit wait in a bounded per-session FIFO
+queue; sessions are served round-robin so one client cannot starve the others.
+When the queue overflows the caller gets a QueueFull with a Retry-After hint.
+
+Limita quantos loops do agente (/chat) e execuções de comandos (/execute)
+rodam ao mesmo tempo. Requisições além do limite aguardam em uma fila FIFO
+limitada por sessão; as sessões são atendidas em round-robin para que um
+cliente não bloqueie os demais. Quando a fila transborda, o chamador recebe
+QueueFull com uma sugestão de Retry-After.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class QueueFull(Exception):
+    """
+    Raised when a request cannot be queued / Lançada quando a fila está cheia
+
+    Attributes:
+        retry_after: Suggested wait in seconds / Espera sugerida em segundos
+    """
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A queued or admitted request / Uma requisição na fila ou admitida"""
+
+    __slots__ = ('kind', 'session_id', 'enqueued_at', 'admitted_at', 'admitted', 'released')
+
+    def __init__(self, kind, session_id):
+        self.kind = kind
+        self.session_id = session_id
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = None
+        self.admitted = False
+        self.released = False
+
+
+class _EndpointClass:
+    """Per-endpoint-class state / Estado por classe de endpoint"""
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self.active = 0
+        # session_id -> deque[Ticket], rotation order = insertion order
+        self.queues = OrderedDict()
+        self.queued = 0
+        # EWMA of service time, used for Retry-After / Média móvel do tempo de serviço
+        self.avg_service = 1.0
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with fair per-session queuing
+    Limitador de concorrência com fila justa por sessão
+
+    Usage / Uso:
+        ticket = admission.enqueue('chat', session_id)   # may raise QueueFull
+        while not admission.wait(ticket, timeout=1.0):
+            report(admission.position(ticket))
+        try:
+            ... do work ...
+        finally:
+            admission.release(ticket)
+    """
+
+    def __init__(self, limits, max_queue_per_session=4, max_queue_total=32, enabled=True):
+        self.enabled = enabled
+        self.max_queue_per_session = max(0, int(max_queue_per_session))
+        self.max_queue_total = max(0, int(max_queue_total))
+        self._cond = threading.Condition()
+        self._classes = {kind: _EndpointClass(limit) for kind, limit in limits.items()}
+
+    @classmethod
+    def from_config(cls, admission_config):
+        """
+        Build from the 'admission' config section / Cria a partir da seção 'admission'
+        """
+        cfg = admission_config or {}
+        return cls(
+            limits={
+                'chat': cfg.get('chat_concurrency', 2),
+                'execute': cfg.get('execute_concurrency', 4),
+            },
+            max_queue_per_session=cfg.get('max_queue_per_session', 4),
+            max_queue_total=cfg.get('max_queue_total', 32),
+            enabled=cfg.get('enabled', True),
+        )
+
+    def enqueue(self, kind, session_id):
+        """
+        Register a request; admits it immediately if a slot is free.
+        Registra uma requisição; admite imediatamente se houver vaga.
+
+        Raises:
+            QueueFull: Queue for this session or globally is full / Fila cheia
+        """
+        ticket = Ticket(kind, session_id or 'anonymous')
+        if not self.enabled:
+            ticket.admitted = True
+            return ticket
+
+        with self._cond:
+            cls = self._classes[kind]
+            if cls.active < cls.limit and cls.queued == 0:
+                self._admit(cls, ticket)
+                return ticket
+
+            session_queue = cls.queues.get(ticket.session_id)
+            session_len = len(session_queue) if session_queue else 0
+            if session_len >= self.max_queue_per_session or cls.queued >= self.max_queue_total:
+                cls.rejected_total += 1
+                raise QueueFull(
+                    f"Too many queued '{kind}' requests / Muitas requisições '{kind}' na fila",
+                    retry_after=self._retry_after(cls),
+                )
+
+            if session_queue is None:
+                session_queue = cls.queues[ticket.session_id] = deque()
+            session_queue.append(ticket)
+            cls.queued += 1
+            return ticket
+
+    def wait(self, ticket, timeout=None):
+        """
+        Block until admitted or timeout; returns True if admitted.
+        Bloqueia até ser admitido ou expirar; retorna True se admitido.
+        """
+        if ticket.admitted:
+            return True
+        with self._cond:
+            self._cond.wait_for(lambda: ticket.admitted, timeout=timeout)
+            return ticket.admitted
+
+    def position(self, ticket):
+        """
+        1-based position in the fair queue (0 if admitted)
+        Posição (a partir de 1) na fila justa (0 se admitido)
+        """
+        if ticket.admitted:
+            return 0
+        with self._cond:
+            cls = self._classes[ticket.kind]
+            own = cls.queues.get(ticket.session_id)
+            if not own or ticket not in own:
+                return 0
+            rank = own.index(ticket)
+            ahead = 0
+            before = True
+            for session_id, q in cls.queues.items():
+                if session_id == ticket.session_id:
+                    before = False
+                    continue
+                # Round-robin: sessions earlier in rotation get one extra turn
+                ahead += min(len(q), rank + 1 if before else rank)
+            return ahead + rank + 1
+
+    def release(self, ticket):
+        """
+        Free the slot (or leave the queue) and admit the next waiter.
+        Libera a vaga (ou sai da fila) e admite o próximo.
+        """
+        if not self.enabled or ticket.released:
+            return
+        with self._cond:
+            ticket.released = True
+            cls = self._classes[ticket.kind]
+            if ticket.admitted:
+                cls.active -= 1
+                elapsed = time.monotonic() - ticket.admitted_at
+                cls.avg_service = 0.8 * cls.avg_service + 0.2 * elapsed
+            else:
+                q = cls.queues.get(ticket.session_id)
+                if q and ticket in q:
+                    q.remove(ticket)
+                    cls.queued -= 1
+                    if not q:
+                        del cls.queues[ticket.session_id]
+            self._dispatch(cls)
+
+    def stats(self):
+        """Snapshot of counters / Retrato dos contadores"""
+        with self._cond:
+            return {
+                kind: {
+                    'limit': cls.limit,
+                    'active': cls.active,
+                    'queued': cls.queued,
+                    'sessions_waiting': len(cls.queues),
+                    'admitted_total': cls.admitted_total,
+                    'rejected_total': cls.rejected_total,
+                    'avg_service_seconds': round(cls.avg_service, 3),
+                }
+                for kind, cls in self._classes.items()
+            }
+
+    # Internal helpers (caller holds the lock) / Auxiliares internos (com lock)
+
+    def _admit(self, cls, ticket):
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        cls.active += 1
+        cls.admitted_total += 1
+
+    def _dispatch(self, cls):
+        admitted_any = False
+        while cls.active < cls.limit and cls.queues:
+            session_id, q = cls.queues.popitem(last=False)
+            ticket = q.popleft()
+            cls.queued -= 1
+            if q:
+                # Move session to the back of the rotation / Sessão vai para o fim da rotação
+                cls.queues[session_id] = q
+            self._admit(cls, ticket)
+            admitted_any = True
+        if admitted_any:
+            self._cond.notify_all()
+
+    def _retry_after(self, cls):
+        waves = (cls.queued + 1) / cls.limit
+        return max(1, int(math.ceil(cls.avg_service * waves)))
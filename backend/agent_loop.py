@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Agent Loop / Loop do Agente
+==========================================
+
+The autonomous loop behind /chat, independent of Flask: ask the model, run
+the bash blocks it proposes, feed the results back, and repeat until the
+task is done or a limit, budget or loop detector stops it. The route streams
+the events as NDJSON; backend/batch.py drives the same loop headless.
+
+O loop autônomo por trás do /chat, independente do Flask: pergunta ao
+modelo, executa os blocos bash propostos, realimenta os resultados e repete
+até a tarefa terminar ou um limite, orçamento ou detector de loop parar. A
+rota envia os eventos como NDJSON; backend/batch.py usa o mesmo loop sem GUI.
+"""
+
+import re
+import time
+
+import metrics
+from ansi_spans import to_spans
+from llm_cache import CacheMiss
+from loop_governor import LoopGovernor
+from output_store import preview
+from provider_router import ProviderError
+from recorder import NULL_RECORDING
+from task_memory import NULL_MEMORY
+
+CODE_BLOCK_RE = re.compile(r'```(?:bash)?\n(.*?)\n```', re.DOTALL)
+COMPLETION_PHRASES = ['tarefa concluída', 'completed', 'finalizado', 'pronto', 'done']
+
+
+class AgentLoop:
+    """
+    Shared components of the loop / Componentes compartilhados do loop
+
+    Args:
+        config: Live config dict (updated in place by /config)
+        router: ProviderRouter
+        llm_cache: LLMCache
+        tool_cache: ToolCache
+        output_store: OutputStore for oversized results / para saídas grandes
+        task_memory: TaskMemory, or None / TaskMemory ou None
+        engine: AsyncEngine (async_engine.py), or None / AsyncEngine ou None
+    """
+
+    def __init__(self, config, router, llm_cache, tool_cache, output_store, task_memory=None, engine=None):
+        self.config = config
+        self.router = router
+        self.llm_cache = llm_cache
+        self.tool_cache = tool_cache
+        self.output_store = output_store
+        self.task_memory = task_memory
+        self.engine = engine
+
+    def options(self, data):
+        """
+        Per-task options from a /chat body or a batch task line
+        Opções por tarefa a partir do corpo do /chat ou de uma linha do batch
+        """
+        ai = self.config['ai']
+        # 'off' | 'on' | 'replay' (offline, never calls the provider / nunca chama o provedor)
+        llm_cache_mode = data.get('llm_cache', 'on' if self.llm_cache.enabled else 'off')
+        if isinstance(llm_cache_mode, bool):
+            llm_cache_mode = 'on' if llm_cache_mode else 'off'
+        req_limit = data.get('max_iterations')
+        engine_config = self.config.get('async_engine', {})
+        use_routing = data.get('routing', self.router.enabled)
+        llm_params = {"model": ai.get('model'), "temperature": ai.get('temperature')}
+        if use_routing:
+            # Any routed provider may answer, so the cache keys on the whole set
+            # Qualquer provedor roteado pode responder; o cache usa o conjunto todo
+            llm_params['routing'] = sorted(f"{p.name}|{p.base_url}|{p.model}"
+                                           for p in self.router.providers.values())
+        return {
+            'max_iterations': req_limit if req_limit is not None else ai.get('max_iterations', 10),
+            'unlimited': ai.get('unlimited_iterations', False),
+            'auto_execute': data.get('auto_execute', True),
+            'use_tool_cache': data.get('tool_cache', self.tool_cache.enabled),
+            'llm_cache_mode': llm_cache_mode,
+            'llm_cache_timing': data.get('llm_cache_timing'),
+            'llm_params': llm_params,
+            'use_routing': use_routing,
+            'budgets': data.get('budgets'),
+            'use_memory': data.get('memory', self.task_memory.enabled if self.task_memory else False),
+            'ansi_spans': data.get('ansi_spans', self.config.get('ui', {}).get('ansi_spans', False)),
+            # 'sync' | 'async' (async_engine.py)
+            'engine': data.get('engine', 'async' if engine_config.get('enabled', False) else 'sync'),
+            'overlap_web_search': data.get('overlap_web_search', engine_config.get('overlap_web_search', True)),
+            'concurrent_commands': data.get('concurrent_commands', engine_config.get('concurrent_commands', 1)),
+        }
+
+    def run(self, core, user_input, options, trace, recording=NULL_RECORDING, memory=NULL_MEMORY, search=None):
+        """
+        Create a run; iterate run.events() to drive it / Cria uma execução
+        search: Future of the web search context, async engine only / só no motor assíncrono
+        """
+        if options.get('engine') == 'async' and self.engine is not None:
+            return self.engine.run(self, core, user_input, options, trace, recording, memory, search)
+        return AgentRun(self, core, user_input, options, trace, recording, memory)
+
+
+class AgentRun:
+    """
+    One task through the loop / Uma tarefa pelo loop
+
+    events() yields the same event dicts /chat streams ({"chunk": ...},
+    {"proposal": ...}, {"limit_reached": ...}, ...). Afterwards summary()
+    tells how it ended.
+    """
+
+    def __init__(self, loop, core, user_input, options, trace, recording, memory):
+        self.loop = loop
+        self.core = core
+        self.user_input = user_input
+        self.options = options
+        self.trace = trace
+        self.recording = recording
+        self.memory = memory
+        self.iterations = 0
+        self.commands = 0
+        self.llm_seconds = 0.0
+        self.exec_seconds = 0.0
+        self.stop_reason = None
+        self.final_response = ''
+        self.governor = None
+
+    def summary(self):
+        return {
+            'stop_reason': self.stop_reason,
+            'iterations': self.iterations,
+            'commands': self.commands,
+            'llm_seconds': round(self.llm_seconds, 4),
+            'exec_seconds': round(self.exec_seconds, 4),
+            'usage': self.governor.usage() if self.governor else None,
+        }
+
+    def events(self):
+        core = self.core
+        trace = self.trace
+        options = self.options
+        router, llm_cache = self.loop.router, self.loop.llm_cache
+
+        # Autonomous Agentic Loop with iterative feedback / Loop autônomo com feedback iterativo
+        actual_limit = self._begin()
+        iteration = 0
+        conversation_history = self.user_input
+
+        while iteration < actual_limit:
+            stop_events = self._check_governor(iteration)
+            if stop_events:
+                yield from stop_events
+                break
+            iteration += 1
+            self.iterations = iteration
+            marker = self._iteration_marker(iteration)
+            if marker:
+                yield marker
+
+            # Step 1: Get AI response for current state
+            step = _LLMStep(self, conversation_history, iteration)
+            try:
+                producer = router.chat_step if options['use_routing'] else core.chat_step
+                for chunk in llm_cache.stream(conversation_history, options['llm_params'], producer,
+                                              options['llm_cache_mode'], options['llm_cache_timing']):
+                    yield step.chunk(chunk)
+            except (CacheMiss, ProviderError) as e:
+                yield step.fail(e)
+                break
+            full_response = step.finish()
+
+            # Step 2: Parse bash code blocks; stop on an answer or a proposal
+            # Etapa 2: extrai os blocos bash; para numa resposta ou proposta
+            code_blocks, decision_events = self._decide(full_response)
+            yield from decision_events
+            if not code_blocks:
+                break
+
+            # Step 3: Execute commands and collect results
+            feedback = _Feedback(self.max_feedback_chars)
+            yield {"chunk": "\n\n"}
+            for cmd in self._commands(code_blocks):
+                yield {"chunk": f"🔧 Executando: {cmd}\n"}
+                with trace.span('execute_tool', command=cmd) as exec_span:
+                    result, cached, exec_seconds = self._execute(cmd, exec_span)
+                yield from self._command_result(cmd, result, cached, exec_seconds, feedback)
+                del result
+
+            self.governor.end_iteration()
+
+            # Step 4: Prepare feedback for next iteration
+            conversation_history = self._next_prompt(iteration, feedback)
+
+        yield from self._finish(iteration, actual_limit)
+
+    # Steps shared with the asyncio engine (async_engine.py); they return the
+    # events to stream / Etapas compartilhadas com o motor asyncio; retornam os eventos
+
+    def _begin(self):
+        """Per-task buffer limits and governor -> iteration limit / Limites por tarefa"""
+        cfg = self.loop.config
+        memory_config = cfg.get('memory', {})
+        self.max_response_chars = memory_config.get('max_response_chars', 262144)
+        self.max_result_chars = memory_config.get('max_result_chars', 65536)
+        self.max_feedback_chars = memory_config.get('max_feedback_chars', 131072)
+        # Loop detection and budgets / Detecção de loop e orçamentos
+        self.governor = LoopGovernor.from_config(cfg.get('governor'), self.options.get('budgets'))
+        # If unlimited, set a safe high limit or just use logic
+        return 1000 if self.options['unlimited'] else self.options['max_iterations']
+
+    def _check_governor(self, iteration):
+        """Stop events when a loop or budget stops the task / Eventos de parada do governador"""
+        stop = self.governor.check()
+        if not stop:
+            return []
+        if stop.get('loop_detected'):
+            message = "\n🛑 Loop detectado: o agente está repetindo os mesmos comandos. Encerrando.\n"
+            self.stop_reason = 'loop_detected'
+        else:
+            message = f"\n🛑 Orçamento esgotado ({stop['budget']}: {stop['used']}/{stop['limit']}). Encerrando.\n"
+            self.stop_reason = 'budget_exhausted'
+        return [{"chunk": message}, dict(stop, iterations=iteration, usage=self.governor.usage())]
+
+    def _iteration_marker(self, iteration):
+        if iteration > 1:
+            display_limit = "∞" if self.options['unlimited'] else self.options['max_iterations']
+            return {"chunk": f"\n\n{'='*60}\n🔄 Iteração {iteration}/{display_limit}\n{'='*60}\n\n"}
+        return None
+
+    def _decide(self, full_response):
+        """
+        (code_blocks to execute, events); no blocks means the loop stops
+        (blocos a executar, eventos); sem blocos o loop para
+        """
+        code_blocks = CODE_BLOCK_RE.findall(full_response)
+
+        # If no commands found, AI decided task is complete or gave final answer
+        if not code_blocks:
+            # Check if AI explicitly says task is complete
+            if any(phrase in full_response.lower() for phrase in COMPLETION_PHRASES):
+                self.stop_reason = 'completed'
+                return [], [{"chunk": "\n✅ Tarefa completada pelo agente!\n"}]
+            self.stop_reason = 'answered'
+            return [], []
+
+        # CHECK AUTO-EXECUTE: If False, send proposals to the frontend and stop,
+        # waiting for user action / Sem auto-execução: envia propostas e para
+        if not self.options['auto_execute']:
+            self.stop_reason = 'proposal'
+            return [], [{"proposal": cmd_block} for cmd_block in code_blocks]
+
+        if not self.core.body:
+            self.stop_reason = 'hexstrike_offline'
+            return [], [{"chunk": "\n⚠️ HexStrike offline - comandos não executados\n"}]
+        return code_blocks, []
+
+    @staticmethod
+    def _commands(code_blocks):
+        return [line.strip() for cmd_block in code_blocks for line in cmd_block.split('\n')
+                if line.strip() and not line.strip().startswith('#')]
+
+    def _execute(self, cmd, exec_span):
+        """
+        Run one command (thread-safe, no trace stack use) -> (result, cached, seconds)
+        Executa um comando (thread-safe, sem usar a pilha do trace)
+        """
+        exec_started = time.monotonic()
+        if self.options['use_tool_cache']:
+            result, cached = self.loop.tool_cache.get_or_execute(cmd, self.core.execute_tool)
+        else:
+            result, cached = self.core.execute_tool(cmd), False
+        exec_span.set(cached=cached, output_bytes=len(result or ''))
+        return result, cached, time.monotonic() - exec_started
+
+    def _command_result(self, cmd, result, cached, exec_seconds, feedback):
+        """
+        Account for one executed command; its events, adding it to feedback
+        Contabiliza um comando executado; seus eventos, adicionando-o ao feedback
+        """
+        events = []
+        self.exec_seconds += exec_seconds
+        self.commands += 1
+        self.recording.execute(cmd, result, exec_seconds, cached)
+        self.memory.execute(cmd, result)
+        metrics.EXECUTE_TOOL_SECONDS.labels('cache' if cached else 'hexstrike').observe(exec_seconds)
+        self.governor.record_execution(cmd, result, exec_seconds)
+        if cached:
+            events.append({"chunk": "♻️ Resultado reutilizado do cache\n", "cached": True, "command": cmd})
+
+        # Oversized output: spill to disk, keep only a preview
+        # Saída grande demais: grava em disco, mantém só uma prévia
+        result = result or ""
+        output_id = None
+        if len(result) > self.max_result_chars:
+            try:
+                output_id = self.loop.output_store.save(result)
+            except OSError as e:
+                print(f"[Chat] Failed to spill output: {e}")
+            result = preview(result, self.max_result_chars, output_id)
+        event = {"chunk": f"{result}\n\n"}
+        if self.options['ansi_spans'] and '\x1b' in result:
+            # Plain text plus spans, offsets relative to this chunk / Texto puro mais spans
+            with metrics.ANSI_SPANS_SECONDS.time():
+                plain, spans = to_spans(result)
+            event = {"chunk": f"{plain}\n\n", "spans": spans}
+        if output_id:
+            event.update(output_id=output_id, command=cmd)
+        events.append(event)
+        feedback.add(cmd, result, cached, output_id)
+        return events
+
+    def _next_prompt(self, iteration, feedback):
+        """Ask AI to analyze results and decide next step / Pede à IA para analisar e decidir"""
+        return f"""{self.user_input}
+
+[Histórico de Execução - Iteração {iteration}]:
+{"".join(feedback.parts)}
+
+Analise os resultados acima. Se a tarefa original ainda não está completa, sugira o PRÓXIMO comando necessário. Se a tarefa está completa, responda 'Tarefa concluída' e resuma o que foi feito."""
+
+    def _finish(self, iteration, actual_limit):
+        """Loop ended / Loop terminou"""
+        events = []
+        metrics.TASK_ITERATIONS.observe(iteration)
+        if iteration >= actual_limit:
+            if self.stop_reason is None:
+                self.stop_reason = 'limit_reached'
+            events.append({"chunk": f"\n⚠️ Limite de {actual_limit} iterações atingido.\n"})
+            events.append({"limit_reached": True, "iterations": actual_limit})
+        self.memory.conclude(self.final_response, self.stop_reason)
+        return events
+
+
+class _LLMStep:
+    """
+    One chat_step stream: chunks are joined once; past the cap they are
+    streamed but not kept
+    Um stream de chat_step: chunks são unidos uma vez; após o limite são
+    enviados mas não guardados
+    """
+
+    def __init__(self, run, prompt, iteration):
+        self.run = run
+        self.parts = []
+        self.chars = 0
+        self.count = 0
+        self.first_token_at = None
+        self.started = time.perf_counter()
+        self.span = run.trace.span('chat_step', iteration=iteration)
+        run.recording.begin_step(prompt, iteration)
+
+    def chunk(self, chunk):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            metrics.LLM_TTFT.observe(self.first_token_at - self.started)
+        self.count += 1
+        self.run.recording.chunk(chunk)
+        if self.chars < self.run.max_response_chars:
+            self.parts.append(chunk)
+            self.chars += len(chunk)
+        return {"chunk": chunk}
+
+    def fail(self, error):
+        """Event for a cache miss or provider error / Evento de cache miss ou erro do provedor"""
+        self.span.end(error=error)
+        if isinstance(error, CacheMiss):
+            self.run.stop_reason = 'cache_miss'
+            return {"chunk": f"\n⚠️ {error}\n", "cache_miss": True}
+        self.run.stop_reason = 'provider_error'
+        return {"chunk": f"\n⚠️ {error}\n", "provider_error": True}
+
+    def finish(self):
+        """Full (capped) response, with its metrics recorded / Resposta completa (limitada)"""
+        run = self.run
+        full_response = "".join(self.parts)
+        self.parts = None
+        step_ended = time.perf_counter()
+        run.llm_seconds += step_ended - self.started
+        run.final_response = full_response
+        self.span.set(chunks=self.count, chars=len(full_response),
+                      truncated=self.chars >= run.max_response_chars)
+        self.span.end()
+        metrics.LLM_STEP_SECONDS.observe(step_ended - self.started)
+        if self.count > 1 and step_ended > self.first_token_at:
+            metrics.LLM_TOKENS_PER_SECOND.observe((self.count - 1) / (step_ended - self.first_token_at))
+        run.governor.record_llm(full_response)
+        return full_response
+
+
+class _Feedback:
+    """
+    Execution summary for the next prompt, within the budget
+    Resumo de execução para o próximo prompt, dentro do orçamento
+    """
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.parts = []
+        self.chars = 0
+
+    def add(self, cmd, result, cached, output_id):
+        cache_note = " (cache, já executado antes)" if cached else ""
+        remaining = self.max_chars - self.chars
+        if len(result) > remaining:
+            result = preview(result, max(0, remaining), output_id) if remaining > 0 else \
+                "[omitido, limite de feedback atingido / omitted, feedback budget reached]"
+        entry = f"\nComando: {cmd}\nResultado{cache_note}: {result}\n"
+        self.parts.append(entry)
+        self.chars += len(entry)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - ANSI Spans / Spans ANSI
+======================================
+
+Converts colorized command output once, on the backend, into plain text plus
+styled spans, so the renderer no longer re-parses escape sequences on every
+render. A span is [gap, length, style_id]: gap is the unstyled text before
+it, counted from the end of the previous span (or the start of the text),
+which keeps the numbers short. Both are in UTF-16 code units of the plain
+text, so they index JavaScript strings directly.
+
+A style id is the normalized SGR state, for example "31", "1;31" or "1;4;94".
+Its color code is a key of ui.custom_ansi (styles.json), so clients resolve
+colors with the palette they already have. Like the renderer, only bold (1),
+underline (4) and the 16 foreground colors are kept. Every other escape
+sequence (cursor moves, 256-color, background, OSC titles) is dropped.
+
+Converte uma vez, no backend, a saída colorida de comandos em texto puro
+mais spans com estilo, para que o renderer não reprocesse as sequências de
+escape a cada renderização. Um span é [gap, tamanho, style_id]: gap é o
+texto sem estilo antes dele, contado a partir do fim do span anterior (ou do
+início do texto), o que mantém os números curtos. Ambos são em unidades
+UTF-16 do texto puro, e indexam strings JavaScript diretamente.
+
+O style id é o estado SGR normalizado, por exemplo "31", "1;31" ou
+"1;4;94". Seu código de cor é uma chave de ui.custom_ansi (styles.json),
+então os clientes resolvem as cores com a paleta que já têm. Como no
+renderer, só negrito (1), sublinhado (4) e as 16 cores de texto são
+mantidos. As demais sequências de escape são descartadas.
+"""
+
+import bisect
+import functools
+import re
+
+# CSI (ESC [ params final), OSC (ESC ] ... BEL or ESC \) and two-byte escapes
+# CSI (ESC [ parâmetros final), OSC (ESC ] ... BEL ou ESC \) e escapes de dois bytes
+_ESCAPE_PATTERN = r'\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\^_])'
+ESCAPE_RE = re.compile(_ESCAPE_PATTERN)
+ESCAPE_BYTES_RE = re.compile(_ESCAPE_PATTERN.encode('ascii'))
+ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+# An escape this long without a terminator is not waiting for more input
+# Um escape tão longo sem terminador não está esperando mais dados
+MAX_PENDING = 256
+
+# Style bits / Bits do estilo: foreground code in the low 7 bits / código da cor nos 7 bits baixos
+COLOR_MASK = 0x7f
+BOLD = 0x80
+UNDERLINE = 0x100
+
+
+@functools.lru_cache(maxsize=None)
+def style_id(style):
+    """Style bits -> id like "1;31", None when unstyled / Bits -> id como "1;31"""
+    if not style:
+        return None
+    parts = []
+    if style & BOLD:
+        parts.append('1')
+    if style & UNDERLINE:
+        parts.append('4')
+    if style & COLOR_MASK:
+        parts.append(str(style & COLOR_MASK))
+    return ';'.join(parts)
+
+
+def apply_sgr(style, params):
+    """
+    New style after one SGR sequence (ESC[...m); params is str or bytes
+    Novo estilo após uma sequência SGR (ESC[...m); params é str ou bytes
+    """
+    # Colon sub-parameters ("38:5:1") are not SGR codes the renderer knows / não são suportados
+    codes = [int(p) if p else 0 for p in params.split(';' if isinstance(params, str) else b';')
+             if not p or p.isdigit()] if params else [0]
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code == 0:
+            style = 0
+        elif code == 1:
+            style |= BOLD
+        elif code == 22:
+            style &= ~BOLD
+        elif code == 4:
+            style |= UNDERLINE
+        elif code == 24:
+            style &= ~UNDERLINE
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            style = (style & ~COLOR_MASK) | code
+        elif code == 39:
+            style &= ~COLOR_MASK
+        elif code in (38, 48) and i + 1 < len(codes):
+            # Extended colors: skip their arguments / Cores estendidas: pula os argumentos
+            i += 2 if codes[i + 1] == 5 else 4 if codes[i + 1] == 2 else 0
+        i += 1
+    return style
+
+
+class AnsiTokenizer:
+    """
+    Stateful tokenizer, fed in chunks (str or bytes); the style carries over
+    between chunks and an escape cut at a chunk end waits for the next one.
+    Tokenizador com estado, alimentado em blocos (str ou bytes); o estilo
+    continua entre blocos e um escape cortado no fim espera o próximo bloco.
+
+    feed() returns (plain, runs). runs holds (start, end, style) tuples in
+    units of the input (chars or bytes) relative to plain, only for styled
+    text, with adjacent runs of the same style merged.
+    feed() retorna (plain, runs), com runs (início, fim, estilo) nas unidades
+    da entrada, só para texto com estilo, unindo runs vizinhos iguais.
+    """
+
+    def __init__(self, binary=False):
+        self.binary = binary
+        self.regex = ESCAPE_BYTES_RE if binary else ESCAPE_RE
+        self.esc = b'\x1b' if binary else '\x1b'
+        self.empty = b'' if binary else ''
+        self.style = 0
+        self.pending = self.empty
+        # (style, params) -> style; outputs repeat a handful of sequences / poucas sequências se repetem
+        self._transitions = {}
+
+    def feed(self, data, final=False):
+        data = self.pending + data if self.pending else data
+        self.pending = self.empty
+        if self.esc not in data:
+            return data, ([(0, len(data), self.style)] if self.style and data else [])
+        # split() interleaves text with the (params, final) groups of each escape
+        # split() intercala o texto com os grupos (params, final) de cada escape
+        parts = self.regex.split(data)
+        tail = parts[-1]
+        cut = tail.rfind(self.esc)
+        if cut != -1 and not final and len(tail) - cut < MAX_PENDING:
+            # Possibly an escape split across chunks / Talvez um escape dividido entre blocos
+            self.pending = tail[cut:]
+            parts[-1] = tail[:cut]
+        runs = []
+        length = 0
+        style = self.style
+        transitions = self._transitions
+        sgr = 'm' if not self.binary else b'm'
+        for i in range(0, len(parts), 3):
+            text = parts[i]
+            if text:
+                end = length + len(text)
+                if style:
+                    if runs and runs[-1][1] == length and runs[-1][2] == style:
+                        runs[-1] = (runs[-1][0], end, style)
+                    else:
+                        runs.append((length, end, style))
+                length = end
+            if i + 2 < len(parts) and parts[i + 2] == sgr:
+                key = (style, parts[i + 1])
+                new_style = transitions.get(key)
+                if new_style is None:
+                    new_style = transitions[key] = apply_sgr(*key)
+                style = new_style
+        self.style = style
+        return self.empty.join(parts[::3]), runs
+
+
+def utf16_offsets(text):
+    """
+    Function mapping char offsets of text to UTF-16 offsets (JavaScript indices)
+    Função que converte offsets de caracteres em offsets UTF-16 (índices JavaScript)
+    """
+    astral = [m.start() for m in ASTRAL_RE.finditer(text)] if not text.isascii() else []
+    if not astral:
+        return lambda offset: offset
+    return lambda offset: offset + bisect.bisect_left(astral, offset)
+
+
+def to_spans(text):
+    """
+    Plain text and spans of one complete output -> (plain, spans)
+    Texto puro e spans de uma saída completa -> (plain, spans)
+    """
+    plain, runs = AnsiTokenizer().feed(text, final=True)
+    to16 = utf16_offsets(plain)
+    spans = []
+    previous = 0
+    for start, end, style in runs:
+        start16, end16 = to16(start), to16(end)
+        spans.append([start16 - previous, end16 - start16, style_id(style)])
+        previous = end16
+    return plain, spans
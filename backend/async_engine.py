@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Async Agent Engine / Motor Assíncrono do Agente
+==============================================================
+
+The agent loop of agent_loop.py as an asyncio coroutine, so the I/O of one
+task can overlap instead of running strictly one call after another:
+
+  - the web search starts when /chat is received and overlaps the admission
+    wait and the first LLM request. Its results join the prompt as soon as
+    they are ready, from the first step when the search finishes first
+    (or always, with overlap_web_search off)
+  - blocking calls (chat_step streams, execute_tool, output spills, ANSI
+    conversion) run in a thread pool, with chunks relayed to the loop
+  - consecutive read-only commands of one block (cat, grep, nmap without
+    -o, ...) can run concurrently, up to concurrent_commands. Their results
+    are still streamed and fed back in order
+  - recordings are written in the background instead of on the request
+    thread. Session memory stays synchronous, since the next task of the
+    session recalls it
+
+AsyncAgentRun.events() is the sync adapter: a plain generator yielding the
+same events, in the same order, as AgentRun.events(), so /chat and
+backend/batch.py work unchanged. The engine is opt-in ("async_engine" in
+the config, or "engine": "async" in a /chat body).
+
+O loop do agente como corrotina asyncio, para que a E/S de uma tarefa se
+sobreponha: a busca web começa ao receber o /chat e se sobrepõe à espera na
+fila e à primeira requisição ao LLM; chamadas bloqueantes rodam num pool de
+threads; comandos somente leitura consecutivos de um bloco podem rodar em
+paralelo até concurrent_commands, com os resultados ainda em ordem; e as
+gravações de sessões gravadas rodam em segundo plano (a memória da sessão
+continua síncrona). AsyncAgentRun.events() é o
+adaptador síncrono, com os mesmos eventos de AgentRun.events(). Opcional.
+"""
+
+import asyncio
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_loop import AgentRun, _Feedback, _LLMStep
+from llm_cache import CacheMiss
+from provider_router import ProviderError
+
+# Programs that only read, unless a redirect or an output flag says otherwise. Left
+# out on purpose: curl (-X POST, -d, -T, -F), hostname NAME, uniq IN OUT,
+# whatweb --log-*, searchsploit -m
+# Programas que só leem, a menos que um redirecionamento ou flag de saída diga o
+# contrário. Omitidos de propósito: os que enviam dados ou gravam com outras flags
+READ_ONLY_COMMANDS = [
+    'cat', 'head', 'tail', 'ls', 'grep', 'egrep', 'fgrep', 'wc', 'file', 'stat', 'strings', 'sort',
+    'cut', 'id', 'whoami', 'uname', 'ps', 'netstat', 'ss', 'whois', 'dig', 'host', 'nslookup',
+    'ping', 'traceroute', 'nmap',
+]
+# Redirects, command lists, substitutions / Redirecionamentos, listas de comandos, substituições
+UNSAFE_SHELL_RE = re.compile(r'[<>;&`\n]|\$\(')
+# Flags that write files (nmap -oN, sort -o) / Flags que gravam arquivos
+OUTPUT_FLAG_RE = re.compile(r'(?:^|\s)(?:-[oO]\S*|--output\S*|--remote-name\S*)')
+
+# Events buffered ahead of a slow client, and how often it hands back credit
+# Eventos acumulados à frente de um cliente lento, e a cada quantos devolve crédito
+MAX_PENDING_EVENTS = 1024
+CREDIT_BATCH = 64
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class AsyncEngine:
+    """
+    Event loop thread plus a pool for blocking I/O, shared by all runs
+    Thread do event loop mais um pool para E/S bloqueante, compartilhados
+
+    Args:
+        threads: Pool size for blocking calls / Tamanho do pool
+        read_only_commands: Programs safe to run concurrently / Programas seguros em paralelo
+    """
+
+    def __init__(self, threads=32, read_only_commands=None):
+        self.threads = max(2, int(threads))
+        self.read_only_commands = frozenset(READ_ONLY_COMMANDS if read_only_commands is None
+                                            else read_only_commands)
+        self.pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='agent-io')
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.concurrent_commands = 0
+        self.background_tasks = 0
+        self.background_errors = 0
+
+    @classmethod
+    def from_config(cls, engine_config):
+        """Build from the 'async_engine' config section / Cria a partir da seção 'async_engine'"""
+        cfg = engine_config or {}
+        return cls(threads=cfg.get('threads', 32), read_only_commands=cfg.get('read_only_commands'))
+
+    @property
+    def loop(self):
+        """The event loop, started on first use / O event loop, iniciado no primeiro uso"""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(self.pool)
+                    self._thread = threading.Thread(target=loop.run_forever, name='agent-loop', daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, fn, *args):
+        """Run fn in the pool -> concurrent.futures.Future / Executa fn no pool"""
+        return self.pool.submit(fn, *args)
+
+    def background(self, fn, *args):
+        """Fire-and-forget work off the request thread / Trabalho em segundo plano"""
+        def task():
+            try:
+                fn(*args)
+            except Exception as e:
+                self.background_errors += 1
+                print(f"[Engine] Background task failed: {e}")
+        self.background_tasks += 1
+        self.pool.submit(task)
+
+    def is_read_only(self, cmd):
+        """
+        Every pipeline stage is a read-only program, with no redirect, command
+        list or substitution / Todo estágio do pipeline é um programa somente leitura
+        """
+        if UNSAFE_SHELL_RE.search(cmd) or OUTPUT_FLAG_RE.search(cmd):
+            return False
+        for stage in cmd.split('|'):
+            words = stage.split()
+            if not words or words[0] not in self.read_only_commands:
+                return False
+        return True
+
+    def run(self, agent, core, user_input, options, trace, recording, memory, search=None):
+        self.runs += 1
+        return AsyncAgentRun(agent, core, user_input, options, trace, recording, memory, self, search)
+
+    async def iterate(self, factory):
+        """
+        Relay a blocking iterator, created by factory() in the pool, to the loop
+        Repassa ao loop um iterador bloqueante, criado por factory() no pool
+        """
+        aio = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            iterator = factory()
+            try:
+                for item in iterator:
+                    if cancelled.is_set():
+                        return
+                    aio.call_soon_threadsafe(items.put_nowait, item)
+            except Exception as e:
+                aio.call_soon_threadsafe(items.put_nowait, _Failure(e))
+                return
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close:
+                    close()
+            aio.call_soon_threadsafe(items.put_nowait, _DONE)
+
+        aio.run_in_executor(self.pool, produce)
+        try:
+            while True:
+                item = await items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        return {'runs': self.runs, 'concurrent_commands': self.concurrent_commands,
+                'background_tasks': self.background_tasks, 'background_errors': self.background_errors}
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self.pool.shutdown(wait=False)
+
+
+class AsyncAgentRun(AgentRun):
+    """
+    One task through the asyncio engine / Uma tarefa pelo motor asyncio
+
+    search: concurrent.futures.Future of the web search context, started
+    before the run / Future do contexto da busca web, iniciado antes
+    """
+
+    def __init__(self, loop, core, user_input, options, trace, recording, memory, engine, search=None):
+        super().__init__(loop, core, user_input, options, trace, recording, memory)
+        self.engine = engine
+        self.search = search
+        self._outstanding = 0
+        self._drained = None
+
+    def events(self):
+        """
+        Sync adapter: drive aevents() on the engine loop and yield its events
+        Adaptador síncrono: conduz aevents() no loop do motor e entrega os eventos
+        """
+        aio = self.engine.loop
+        handoff = queue.SimpleQueue()
+        task = asyncio.run_coroutine_threadsafe(self._pump(handoff), aio)
+        consumed = 0
+        try:
+            while True:
+                event = handoff.get()
+                if event is _DONE:
+                    return
+                if isinstance(event, _Failure):
+                    raise event.error
+                consumed += 1
+                if consumed == CREDIT_BATCH:
+                    aio.call_soon_threadsafe(self._credit, consumed)
+                    consumed = 0
+                yield event
+        finally:
+            # Client gone or run over: stop it on the loop / Cliente saiu ou fim: para no loop
+            task.cancel()
+
+    async def _pump(self, handoff):
+        self._drained = asyncio.Event()
+        try:
+            async for event in self.aevents():
+                handoff.put(event)
+                self._outstanding += 1
+                while self._outstanding >= MAX_PENDING_EVENTS:
+                    self._drained.clear()
+                    await self._drained.wait()
+        except Exception as e:
+            handoff.put(_Failure(e))
+        else:
+            handoff.put(_DONE)
+
+    def _credit(self, count):
+        self._outstanding -= count
+        if self._outstanding < MAX_PENDING_EVENTS:
+            self._drained.set()
+
+    async def aevents(self):
+        """The loop of AgentRun.events() as an async generator / O loop como gerador assíncrono"""
+        core = self.core
+        options = self.options
+        router, llm_cache = self.loop.router, self.loop.llm_cache
+        aio = asyncio.get_running_loop()
+
+        actual_limit = self._begin()
+        iteration = 0
+        try:
+            await self._fold_search(wait=not options.get('overlap_web_search', True))
+            conversation_history = self.user_input
+
+            while iteration < actual_limit:
+                stop_events = self._check_governor(iteration)
+                if stop_events:
+                    for event in stop_events:
+                        yield event
+                    break
+                iteration += 1
+                self.iterations = iteration
+                marker = self._iteration_marker(iteration)
+                if marker:
+                    yield marker
+
+                # Step 1: AI response, streamed from a pool thread / Resposta da IA, de uma thread do pool
+                step = _LLMStep(self, conversation_history, iteration)
+                producer = router.chat_step if options['use_routing'] else core.chat_step
+                prompt = conversation_history
+                try:
+                    async for chunk in self.engine.iterate(
+                            lambda: llm_cache.stream(prompt, options['llm_params'], producer,
+                                                     options['llm_cache_mode'], options['llm_cache_timing'])):
+                        yield step.chunk(chunk)
+                except (CacheMiss, ProviderError) as e:
+                    yield step.fail(e)
+                    break
+                except BaseException as e:
+                    step.span.end(error=e)
+                    raise
+                full_response = step.finish()
+
+                # Step 2: decide / Etapa 2: decide
+                code_blocks, decision_events = self._decide(full_response)
+                for event in decision_events:
+                    yield event
+                if not code_blocks:
+                    break
+
+                # Step 3: execute, read-only commands possibly ahead of their turn
+                # Etapa 3: executa, comandos somente leitura possivelmente adiantados
+                feedback = _Feedback(self.max_feedback_chars)
+                yield {"chunk": "\n\n"}
+                async for event in self._execute_all(aio, self._commands(code_blocks), feedback):
+                    yield event
+
+                self.governor.end_iteration()
+
+                # Step 4: next prompt, with the web results once they arrived
+                # Etapa 4: próximo prompt, com os resultados web se já chegaram
+                await self._fold_search(wait=False)
+                conversation_history = self._next_prompt(iteration, feedback)
+        finally:
+            if self.search is not None:
+                self.search.cancel()
+
+        for event in self._finish(iteration, actual_limit):
+            yield event
+
+    async def _fold_search(self, wait):
+        """Prepend the web search context when ready (or wait for it) / Adiciona o contexto da busca"""
+        search = self.search
+        if search is None or not (wait or search.done()):
+            return
+        self.search = None
+        try:
+            context = await asyncio.wrap_future(search)
+        except Exception as e:
+            print(f"[Web Search] Failed: {e}")
+            context = ''
+        if context:
+            self.user_input = context + "\n" + self.user_input
+
+    async def _execute_all(self, aio, commands, feedback):
+        """
+        Run a block's commands, yielding their events in order; while a
+        read-only command runs, the read-only ones right after it start too
+        Executa os comandos do bloco com os eventos em ordem; enquanto um
+        comando somente leitura roda, os seguintes somente leitura também iniciam
+        """
+        engine = self.engine
+        limit = max(1, int(self.options.get('concurrent_commands', 1)))
+        pool = engine.pool
+        running = {}
+
+        def start(index):
+            cmd = commands[index]
+            span = self.trace.detached_span('execute_tool', command=cmd)
+            running[index] = (span, aio.run_in_executor(pool, self._execute, cmd, span))
+
+        try:
+            for index, cmd in enumerate(commands):
+                if index not in running:
+                    start(index)
+                if limit > 1 and engine.is_read_only(cmd):
+                    ahead = index + 1
+                    # A repeat waits its turn, for the tool cache / Uma repetição espera a vez, pelo cache
+                    while (ahead < len(commands) and ahead - index < limit and engine.is_read_only(commands[ahead])
+                           and commands[ahead] not in commands[index:ahead]):
+                        if ahead not in running:
+                            start(ahead)
+                            engine.concurrent_commands += 1
+                        ahead += 1
+                yield {"chunk": f"🔧 Executando: {cmd}\n"}
+                span, future = running.pop(index)
+                try:
+                    result, cached, exec_seconds = await future
+                except BaseException as e:
+                    span.end(error=e)
+                    raise
+                span.end()
+                # Spills and ANSI conversion stay off the loop / Gravações e conversão ANSI fora do loop
+                events = await aio.run_in_executor(pool, self._command_result, cmd, result, cached,
+                                                   exec_seconds, feedback)
+                del result
+                for event in events:
+                    yield event
+        finally:
+            for span, future in running.values():
+                future.cancel()
+                span.end(error='cancelled')
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Headless Batch Runner / Executor em Lote sem GUI
+===============================================================
+
+Runs the /chat agent loop (backend/agent_loop.py) over a JSON-lines file of
+tasks with N workers, without Flask or the Electron UI. Each finished task
+appends one NDJSON result line with its timings, so an interrupted run can be
+resumed and only the missing tasks run again.
+
+Executa o loop do agente do /chat (backend/agent_loop.py) sobre um arquivo
+JSON-lines de tarefas com N workers, sem Flask nem a interface Electron. Cada
+tarefa concluída acrescenta uma linha NDJSON com seus tempos, permitindo
+retomar uma execução interrompida rodando apenas as tarefas que faltam.
+
+Task line / Linha de tarefa:
+    {"id": "scan-1", "message": "enumerate open ports on 10.0.0.5", "max_iterations": 5}
+    Any /chat option is accepted (language, web_search, auto_execute, tool_cache,
+    llm_cache, routing, budgets, record, memory). / Aceita qualquer opção do /chat.
+    Tasks with the same "session" share task memory / Tarefas com a mesma "session"
+    compartilham a memória de tarefas.
+
+Usage / Uso:
+    python -m backend.batch tasks.jsonl --out results.ndjson --workers 4
+    python -m backend.batch tasks.jsonl --out results.ndjson --resume
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def load_tasks(path):
+    """
+    Read task lines; ids default to the line number / Lê as tarefas; id padrão é o número da linha
+    """
+    tasks = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            task = json.loads(line)
+            if isinstance(task, str):
+                task = {'message': task}
+            task.setdefault('id', f"line-{number}")
+            task['id'] = str(task['id'])
+            tasks.append(task)
+    ids = [t['id'] for t in tasks]
+    if len(ids) != len(set(ids)):
+        raise ValueError("Duplicate task ids / Ids de tarefa duplicados")
+    return tasks
+
+
+def finished_ids(path):
+    """
+    Ids that already have a successful result line / Ids que já têm resultado com sucesso
+    A truncated last line (killed mid-write) is ignored / Última linha truncada é ignorada
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get('status') == 'ok':
+                done.add(str(result.get('id')))
+    return done
+
+
+class ResultWriter:
+    """Appends result lines from several workers / Acrescenta linhas de vários workers"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        # Terminate a line cut off by an earlier kill / Termina linha cortada por um kill anterior
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        self._file = open(path, 'a', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+
+    def write(self, result):
+        line = json.dumps(result, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_task(server, task, events_dir=None):
+    """
+    Drive one task through the agent loop; returns its result line
+    Executa uma tarefa pelo loop do agente; retorna sua linha de resultado
+    """
+    started_wall = time.time()
+    started = time.perf_counter()
+    result = {'id': task['id'], 'started': round(started_wall, 3)}
+    trace = server.tracer.start_trace('batch_task', task_id=task['id'])
+    recording = server.recorder.start(task, task.get('message', ''), trace.trace_id, task.get('record'))
+    options = server.agent.options(task)
+    memory_session = task.get('session') if options['use_memory'] else None
+    memory = server.task_memory.start(memory_session, task.get('message', ''), options['use_memory'])
+    events_file = None
+    error = None
+    run = None
+    try:
+        message = task.get('message', '')
+        if not message:
+            raise ValueError("Empty message")
+        ai = server.config['ai']
+        user_input = server.prepare_task(message, task.get('language', ai.get('language', 'auto')),
+                                         task.get('web_search', ai.get('web_search_enabled', False)), trace,
+                                         memory_session)
+        if events_dir:
+            events_file = open(os.path.join(events_dir, f"{task['id']}.ndjson"), 'w', encoding='utf-8')
+        run = server.agent.run(server.core, user_input, options, trace, recording, memory)
+        first_event = None
+        output_ids = []
+        proposals = []
+        for event in run.events():
+            if first_event is None:
+                first_event = time.perf_counter() - started
+            if 'output_id' in event:
+                output_ids.append(event['output_id'])
+            if 'proposal' in event:
+                proposals.append(event['proposal'])
+            if events_file:
+                events_file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        result.update(run.summary())
+        result['first_event_seconds'] = round(first_event or 0.0, 4)
+        result['response'] = run.final_response
+        if output_ids:
+            result['output_ids'] = output_ids
+        if proposals:
+            result['proposals'] = proposals
+    except Exception as e:
+        error = e
+        result['error'] = f"{type(e).__name__}: {e}"
+        if run is not None:
+            result.update(run.summary())
+    finally:
+        if events_file:
+            events_file.close()
+        recording.close()
+        memory.close()
+        trace.finish(error=error)
+    result['status'] = 'error' if error else 'ok'
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    result['finished'] = round(time.time(), 3)
+    return result
+
+
+def prepare_core(server, start_hexstrike=True):
+    """
+    Initialize AgentCore like /init does; returns an error string or None
+    Inicializa o AgentCore como o /init; retorna uma mensagem de erro ou None
+    """
+    core = server.core
+    if core is None:
+        return f"Agent Core not loaded: {server.init_error}"
+    if getattr(core, 'brain', None) is None:
+        api_key = server.resolve_api_key()
+        if not api_key:
+            return "API Key not found. Configure it in config.json or the HexSec env file."
+        if not core.initialize(api_key):
+            return "Failed to initialize Agent Core (check API key / logs)"
+        server._attach_hexstrike_session()
+    if start_hexstrike and getattr(core, 'body', None) is not None and not server.hexstrike_http.is_healthy():
+        print("[Batch] HexStrike not alive, starting it...")
+        if server._start_hexstrike():
+            server._wait_hexstrike(15)
+    return None
+
+
+def interrupt(signum, frame):
+    """SIGTERM stops the batch like Ctrl-C / SIGTERM interrompe o lote como Ctrl-C"""
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('tasks', help='JSON-lines task file / arquivo de tarefas')
+    parser.add_argument('--out', help='NDJSON results file (default: <tasks>.results.ndjson)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='tasks run at once (default: admission.chat_concurrency)')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip tasks that already have an ok result / pula tarefas já concluídas')
+    parser.add_argument('--overwrite', action='store_true', help='replace an existing results file')
+    parser.add_argument('--events-dir', help='also write each task event stream here / grava os eventos aqui')
+    parser.add_argument('--no-hexstrike', action='store_true', help='do not start HexStrike / não inicia o HexStrike')
+    args = parser.parse_args()
+
+    # The server module changes cwd into the workspace; resolve paths first
+    # O módulo server muda o cwd para o workspace; resolve os caminhos antes
+    tasks_path = os.path.abspath(args.tasks)
+    out_path = os.path.abspath(args.out or f"{os.path.splitext(args.tasks)[0]}.results.ndjson")
+    events_dir = os.path.abspath(args.events_dir) if args.events_dir else None
+    if os.path.exists(out_path) and not (args.resume or args.overwrite):
+        parser.error(f"{out_path} exists; use --resume or --overwrite")
+    if args.overwrite and os.path.exists(out_path):
+        os.remove(out_path)
+
+    tasks = load_tasks(tasks_path)
+    done = finished_ids(out_path) if args.resume else set()
+    pending = [t for t in tasks if t['id'] not in done]
+    if events_dir:
+        os.makedirs(events_dir, exist_ok=True)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+
+    # server installs a handler that shuts the core and HexStrike down at once;
+    # the batch drains its running tasks first and cleans up itself
+    # O server instala um handler que desliga o core e o HexStrike na hora; o
+    # lote termina as tarefas em andamento antes e faz a limpeza ele mesmo
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, interrupt)
+
+    error = prepare_core(server, start_hexstrike=not args.no_hexstrike)
+    if error:
+        print(f"[Batch] {error}")
+        sys.exit(2)
+
+    workers = max(1, args.workers or server.config.get('admission', {}).get('chat_concurrency', 2))
+    print(f"[Batch] {len(pending)} task(s) to run ({len(done)} already done), {workers} worker(s) -> {out_path}")
+
+    writer = ResultWriter(out_path)
+    started = time.perf_counter()
+    completed = failed = 0
+    interrupted = False
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+
+    def work(task):
+        # Written by the worker so tasks finishing after Ctrl-C are kept
+        # Gravado pelo worker para manter tarefas que terminam após Ctrl-C
+        result = run_task(server, task, events_dir)
+        writer.write(result)
+        return result
+
+    try:
+        futures = [executor.submit(work, task) for task in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            completed += 1
+            failed += result['status'] != 'ok'
+            print(f"[Batch] {completed}/{len(pending)} {result['id']}: {result.get('stop_reason') or result['status']}"
+                  f" in {result['seconds']:.2f}s")
+    except KeyboardInterrupt:
+        interrupted = True
+        print("[Batch] Interrupted; finishing running tasks. Re-run with --resume to continue.")
+        executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=True)
+        writer.close()
+        server.cleanup_handler()
+    if interrupted:
+        sys.exit(130)
+    elapsed = time.perf_counter() - started
+    rate = completed / elapsed if elapsed else 0.0
+    print(f"[Batch] Done: {completed - failed} ok, {failed} error(s) in {elapsed:.1f}s ({rate:.2f} tasks/s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Pooled HexStrike HTTP Client / Cliente HTTP HexStrike com Pool
+=============================================================================
+
+One shared keep-alive connection pool for backend-to-HexStrike calls, so the
+TCP connection to port 8888 is reused across the hundreds of execute and
+health calls of a long task instead of being opened per call.
+
+Commands still run through AgentCore (core.execute_tool), which formats
+their results. attach() mounts the pool on AgentCore's own requests.Session,
+keeping its headers and auth. It also applies the separate connect and read
+timeouts to calls made without a timeout, and counts every call. The
+backend's own health checks use the pool directly, and they are the only
+calls that are retried. When AgentCore exposes no requests.Session, only
+the health checks are pooled.
+
+Um pool de conexões keep-alive compartilhado para as chamadas do backend ao
+HexStrike, reutilizando a conexão TCP com a porta 8888. Os comandos
+continuam passando pelo AgentCore (core.execute_tool). attach() monta o pool
+na requests.Session do próprio AgentCore, mantendo cabeçalhos e
+autenticação, aplica os timeouts de conexão e leitura às chamadas sem
+timeout e conta todas as chamadas. Só a verificação de saúde é repetida.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HexStrikeHTTP:
+    """
+    Pooled keep-alive client for the HexStrike API / Cliente com pool para a API HexStrike
+
+    Args:
+        base_url: e.g. http://127.0.0.1:8888
+        pool_size: Connections kept per host / Conexões mantidas por host
+        connect_timeout: Seconds to open a connection / Segundos para conectar
+        read_timeout: Default seconds to wait for a command / Espera padrão por um comando
+        health_timeout: Read timeout of health checks / Timeout de leitura da saúde
+        health_retries: Extra attempts for health checks / Tentativas extras da saúde
+    """
+
+    def __init__(self, base_url, pool_size=8, connect_timeout=2.0, read_timeout=300.0, health_timeout=2.0,
+                 health_retries=2):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.health_timeout = health_timeout
+        self.health_retries = max(0, int(health_retries))
+        self.session = requests.Session()
+        # No transport-level retries: a command POST must never run twice
+        # Sem retries no transporte: um POST de comando nunca pode rodar duas vezes
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_size)), max_retries=0,
+                                   pool_block=False)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.agent_calls = 0
+
+    @classmethod
+    def from_config(cls, port, client_config):
+        """Build from the 'hexstrike_client' config section / Cria a partir da seção 'hexstrike_client'"""
+        cfg = client_config or {}
+        return cls(
+            f"http://127.0.0.1:{port}",
+            pool_size=cfg.get('pool_size', 8),
+            connect_timeout=cfg.get('connect_timeout', 2.0),
+            read_timeout=cfg.get('read_timeout', 300.0),
+            health_timeout=cfg.get('health_timeout', 2.0),
+            health_retries=cfg.get('health_retries', 2),
+        )
+
+    def _count(self, error=False, retry=False, agent=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.retries += retry
+            self.agent_calls += agent
+
+    def check_health(self):
+        """
+        GET /health with retries; returns the JSON body or {"alive": False, "error": ...}
+        GET /health com retries; retorna o JSON ou {"alive": False, "error": ...}
+        """
+        error = None
+        for attempt in range(1 + self.health_retries):
+            if attempt:
+                time.sleep(min(0.1 * (2 ** (attempt - 1)), 1.0))
+            try:
+                response = self.session.get(f"{self.base_url}/health",
+                                            timeout=(self.connect_timeout, self.health_timeout))
+                self._count(retry=bool(attempt))
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        return {"alive": True, "status": "ok"}
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count(error=True, retry=bool(attempt))
+                error = str(e)
+        return {"alive": False, "error": error}
+
+    def is_healthy(self):
+        health = self.check_health()
+        return bool(health.get('alive', False) or health.get('status') in ('ok', 'healthy'))
+
+    def attach(self, client):
+        """
+        Pool, time out and count the calls of an AgentCore HexStrike client (core.body)
+        Aplica pool, timeouts e contagem às chamadas do cliente HexStrike do AgentCore
+        Returns True when the client exposes a requests session / True se houver sessão
+        """
+        session = getattr(client, 'session', None) if client is not None else None
+        if not isinstance(session, requests.Session):
+            return False
+        if getattr(session, 'hexstrike_pooled', False):
+            return True
+        # Its own session keeps its headers, auth and cookies / A própria sessão mantém cabeçalhos
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        send = session.request
+
+        def request(method, url, **kwargs):
+            if kwargs.get('timeout') is None:
+                kwargs['timeout'] = (self.connect_timeout, self.read_timeout)
+            try:
+                response = send(method, url, **kwargs)
+            except requests.RequestException:
+                self._count(error=True, agent=True)
+                raise
+            self._count(error=response.status_code >= 500, agent=True)
+            return response
+
+        session.request = request
+        session.hexstrike_pooled = True
+        return True
+
+    def stats(self):
+        return {'base_url': self.base_url, 'calls': self.calls, 'agent_calls': self.agent_calls,
+                'errors': self.errors, 'retries': self.retries}
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - LLM Response Cache / Cache de Respostas do LLM
+=============================================================
+
+Disk-backed cache around core.chat_step(). A completed stream is stored as a
+list of (delay, chunk) pairs under a hash of prompt + model + parameters, so a
+later identical request can be replayed instantly or with the original timing
+without touching the provider. The "replay" mode never calls the provider,
+which makes runs deterministic and usable offline for performance testing.
+
+Cache em disco ao redor de core.chat_step(). Um stream completo é salvo como
+uma lista de pares (atraso, chunk) sob um hash de prompt + modelo + parâmetros,
+permitindo repetir uma requisição idêntica instantaneamente ou com o tempo
+original sem acessar o provedor. O modo "replay" nunca chama o provedor,
+tornando execuções determinísticas e utilizáveis offline em testes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+MODES = ('off', 'on', 'replay')
+TIMINGS = ('instant', 'original')
+
+
+class CacheMiss(Exception):
+    """Replay requested but no recording exists / Replay sem gravação"""
+
+
+def prompt_key(prompt, params):
+    """
+    Stable hash of prompt + model params / Hash estável do prompt + parâmetros
+    """
+    payload = json.dumps({'prompt': prompt, 'params': params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Recorded chat_step streams on disk with TTL and size-based eviction
+    Streams de chat_step gravados em disco com TTL e remoção por tamanho
+
+    Args:
+        cache_dir: Directory for recordings / Diretório das gravações
+        ttl_seconds: Entry lifetime / Tempo de vida da entrada
+        max_bytes: Total size limit, oldest evicted first / Limite total
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=86400, max_bytes=64 * 1024 * 1024,
+                 enabled=False, timing='instant'):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.timing = timing if timing in TIMINGS else 'instant'
+        self._lock = threading.Lock()
+        # key -> (size, last use for LRU, created or None until read)
+        # chave -> (tamanho, último uso para LRU, criação ou None até ser lido)
+        self._index = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    @classmethod
+    def from_config(cls, cache_dir, cache_config):
+        """Build from the 'llm_cache' config section / Cria a partir da seção 'llm_cache'"""
+        cfg = cache_config or {}
+        return cls(
+            cache_dir,
+            ttl_seconds=cfg.get('ttl_seconds', 86400),
+            max_bytes=cfg.get('max_bytes', 64 * 1024 * 1024),
+            enabled=cfg.get('enabled', False),
+            timing=cfg.get('timing', 'instant'),
+        )
+
+    def stream(self, prompt, params, producer, mode='on', timing=None):
+        """
+        Yield chunks for prompt, from cache or from producer(prompt).
+        Gera chunks para o prompt, do cache ou de producer(prompt).
+
+        Args:
+            mode: 'off' bypasses, 'on' reads and records, 'replay' only reads
+            timing: 'instant' or 'original' replay speed / velocidade do replay
+
+        Raises:
+            CacheMiss: mode is 'replay' and nothing was recorded
+        """
+        if mode == 'off':
+            yield from producer(prompt)
+            return
+
+        key = prompt_key(prompt, params)
+        recording = self._load(key)
+        if recording is not None:
+            with self._lock:
+                self.hits += 1
+            original = (timing or self.timing) == 'original'
+            for delay, chunk in recording['chunks']:
+                if original and delay > 0:
+                    time.sleep(delay)
+                yield chunk
+            return
+
+        with self._lock:
+            self.misses += 1
+        if mode == 'replay':
+            raise CacheMiss(f"No recorded response for prompt {key[:12]} / Sem resposta gravada")
+
+        chunks = []
+        last = time.monotonic()
+        for chunk in producer(prompt):
+            now = time.monotonic()
+            chunks.append((round(now - last, 4), chunk))
+            last = now
+            yield chunk
+        # Only complete streams get here / Apenas streams completos chegam aqui
+        self._store(key, params, chunks)
+
+    def stats(self):
+        """Counters and disk usage / Contadores e uso de disco"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._index),
+                'bytes': sum(meta[0] for meta in self._index.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def clear(self):
+        """Delete every recording / Apaga todas as gravações"""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    # Internal helpers / Auxiliares internos
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan(self):
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith('.json') and entry.is_file():
+                    st = entry.stat()
+                    self._index[entry.name[:-5]] = (st.st_size, st.st_mtime, None)
+
+    def _expired(self, created):
+        return created is not None and time.time() - created > self.ttl_seconds
+
+    def _load(self, key):
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+            if self._expired(meta[2]):
+                self._remove(key)
+                return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                recording = json.load(f)
+            # TTL counts from creation; mtime only orders LRU eviction
+            # O TTL conta da criação; o mtime só ordena a remoção LRU
+            created = recording.get('created', meta[1])
+            if self._expired(created):
+                with self._lock:
+                    self._remove(key)
+                return None
+            now = time.time()
+            os.utime(self._path(key), (now, now))
+            with self._lock:
+                self._index[key] = (meta[0], now, created)
+            return recording
+        except (OSError, ValueError) as e:
+            print(f"[LLMCache] Dropping unreadable entry {key[:12]}: {e}")
+            with self._lock:
+                self._remove(key)
+            return None
+
+    def _store(self, key, params, chunks):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            created = time.time()
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'params': params, 'chunks': chunks}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"[LLMCache] Failed to store entry: {e}")
+            return
+        with self._lock:
+            self._index[key] = (size, time.time(), created)
+            self._evict()
+
+    def _evict(self):
+        total = sum(meta[0] for meta in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
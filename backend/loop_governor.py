@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Loop Governor / Governador do Loop
+=================================================
+
+Stops runaway agent tasks. Every executed (command, output) pair is hashed;
+the same pair seen too often, or the same sequence of iterations repeating
+(A B A B A B), means the agent is stuck. Per-task budgets bound wall-clock
+time, LLM tokens and command execution time.
+
+Interrompe tarefas do agente descontroladas. Cada par (comando, saída)
+executado gera um hash; o mesmo par visto muitas vezes, ou a mesma sequência
+de iterações se repetindo (A B A B A B), indica que o agente travou.
+Orçamentos por tarefa limitam tempo de relógio, tokens do LLM e tempo de
+execução de comandos.
+"""
+
+import hashlib
+import time
+
+
+class LoopGovernor:
+    """
+    Per-task repeat/cycle detector and budget tracker
+    Detector de repetição/ciclo e controle de orçamento por tarefa
+
+    Args:
+        max_wall_seconds: Wall-clock budget / Orçamento de tempo total
+        max_tokens: LLM output token budget (estimated) / Orçamento de tokens (estimado)
+        max_exec_seconds: Total command execution budget / Orçamento de execução
+        repeat_threshold: Same (command, output) seen this many times = loop
+                          Mesmo (comando, saída) visto este número de vezes = loop
+        cycle_repeats: Times an iteration cycle must repeat / Repetições de um ciclo
+        max_cycle_length: Longest cycle (in iterations) checked / Maior ciclo verificado
+
+    A limit of 0 or None disables that check / Limite 0 ou None desativa a verificação
+    """
+
+    def __init__(self, max_wall_seconds=1800, max_tokens=200000, max_exec_seconds=900,
+                 repeat_threshold=3, cycle_repeats=3, max_cycle_length=4, enabled=True):
+        self.enabled = enabled
+        self.max_wall_seconds = max_wall_seconds
+        self.max_tokens = max_tokens
+        self.max_exec_seconds = max_exec_seconds
+        self.repeat_threshold = repeat_threshold
+        self.cycle_repeats = cycle_repeats
+        self.max_cycle_length = max_cycle_length
+
+        self.started_at = time.monotonic()
+        self.tokens = 0
+        self.exec_seconds = 0.0
+        self.pair_counts = {}
+        self.iteration_signatures = []
+        self._current = hashlib.sha1()
+        self._current_empty = True
+        self._stop = None
+
+    @classmethod
+    def from_config(cls, governor_config, overrides=None):
+        """
+        Build from the 'governor' config section plus per-request overrides
+        Cria a partir da seção 'governor' mais ajustes por requisição
+        """
+        cfg = dict(governor_config or {})
+        cfg.update({k: v for k, v in (overrides or {}).items() if v is not None})
+        return cls(
+            max_wall_seconds=cfg.get('max_wall_seconds', 1800),
+            max_tokens=cfg.get('max_tokens', 200000),
+            max_exec_seconds=cfg.get('max_exec_seconds', 900),
+            repeat_threshold=cfg.get('repeat_threshold', 3),
+            cycle_repeats=cfg.get('cycle_repeats', 3),
+            max_cycle_length=cfg.get('max_cycle_length', 4),
+            enabled=cfg.get('enabled', True),
+        )
+
+    def record_llm(self, text):
+        """Account an LLM response (~4 chars/token) / Contabiliza resposta do LLM"""
+        self.tokens += max(1, len(text) // 4) if text else 0
+
+    def record_execution(self, cmd, output, duration):
+        """
+        Account one command execution / Contabiliza uma execução de comando
+        """
+        self.exec_seconds += duration
+        digest = hashlib.sha1(f"{cmd}\0{output}".encode('utf-8', 'replace')).digest()
+        self._current.update(digest)
+        self._current_empty = False
+        count = self.pair_counts.get(digest, 0) + 1
+        self.pair_counts[digest] = count
+        if self.enabled and self.repeat_threshold and count >= self.repeat_threshold and self._stop is None:
+            self._stop = {
+                "loop_detected": True,
+                "reason": "repeated_command",
+                "command": cmd,
+                "repeats": count,
+            }
+
+    def end_iteration(self):
+        """Close the current iteration and look for cycles / Fecha a iteração e busca ciclos"""
+        if self._current_empty:
+            return
+        self.iteration_signatures.append(self._current.digest())
+        self._current = hashlib.sha1()
+        self._current_empty = True
+        if self.enabled and self._stop is None and self.cycle_repeats:
+            period = self._find_cycle()
+            if period:
+                self._stop = {
+                    "loop_detected": True,
+                    "reason": "cycle",
+                    "cycle_length": period,
+                    "repeats": self.cycle_repeats,
+                }
+
+    def check(self):
+        """
+        Return a stop event dict, or None to keep going
+        Retorna um evento de parada, ou None para continuar
+        """
+        if not self.enabled:
+            return None
+        if self._stop is not None:
+            return self._stop
+        elapsed = time.monotonic() - self.started_at
+        exhausted = None
+        if self.max_wall_seconds and elapsed >= self.max_wall_seconds:
+            exhausted = ("wall_clock", round(elapsed, 1), self.max_wall_seconds)
+        elif self.max_tokens and self.tokens >= self.max_tokens:
+            exhausted = ("tokens", self.tokens, self.max_tokens)
+        elif self.max_exec_seconds and self.exec_seconds >= self.max_exec_seconds:
+            exhausted = ("exec_time", round(self.exec_seconds, 1), self.max_exec_seconds)
+        if exhausted:
+            budget, used, limit = exhausted
+            self._stop = {"budget_exhausted": True, "budget": budget, "used": used, "limit": limit}
+        return self._stop
+
+    def usage(self):
+        """Budget consumption so far / Consumo de orçamento até agora"""
+        return {
+            "wall_seconds": round(time.monotonic() - self.started_at, 2),
+            "tokens": self.tokens,
+            "exec_seconds": round(self.exec_seconds, 2),
+            "iterations": len(self.iteration_signatures),
+        }
+
+    def _find_cycle(self):
+        sigs = self.iteration_signatures
+        for period in range(1, (self.max_cycle_length or 0) + 1):
+            span = period * self.cycle_repeats
+            if len(sigs) < span:
+                break
+            tail = sigs[-span:]
+            if all(tail[i] == tail[i % period] for i in range(span)):
+                return period
+        return None
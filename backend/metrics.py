@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Metrics / Métricas
+=================================
+
+Minimal Prometheus-style instrumentation for the agent loop, exposed in the
+text exposition format at /metrics. Metrics are created once at import time
+with preallocated buckets; recording a value is a bisect plus in-place
+integer/float additions with no locks, so it is cheap enough for the hot loop.
+Under the GIL a concurrent increment can very rarely be lost, which is an
+accepted trade-off for monitoring data.
+
+Instrumentação mínima no estilo Prometheus para o loop do agente, exposta no
+formato de texto em /metrics. As métricas são criadas uma vez na importação com
+buckets pré-alocados; registrar um valor é um bisect mais somas no lugar, sem
+locks, barato o bastante para o loop principal. Sob o GIL um incremento
+concorrente raramente pode se perder, o que é aceitável para monitoramento.
+"""
+
+import bisect
+import threading
+import time
+
+# Bucket presets (seconds) / Buckets pré-definidos (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LONG_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 500)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class _Child:
+    """One labelled series / Uma série com rótulos"""
+
+    __slots__ = ('value', 'buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=None):
+        self.value = 0.0
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) if buckets else None
+        self.sum = 0.0
+        self.count = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """
+    Counter, gauge or histogram with optional labels
+    Counter, gauge ou histograma com rótulos opcionais
+    """
+
+    def __init__(self, kind, name, documentation, labelnames=(), buckets=None):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bucket_bounds = tuple(buckets) if buckets else None
+        self._children = {}
+        self._create_lock = threading.Lock()
+        self._default = None if self.labelnames else self._new_child()
+
+    def _new_child(self):
+        return _Child(self.bucket_bounds if self.kind == 'histogram' else None)
+
+    def labels(self, *values):
+        """Series for the given label values / Série para os valores de rótulo"""
+        child = self._children.get(values)
+        if child is None:
+            with self._create_lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    # Unlabelled shortcuts / Atalhos sem rótulos
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self, *label_values):
+        """Context manager observing elapsed seconds / Context manager que mede segundos"""
+        return _Timer(self.labels(*label_values) if label_values else self._default)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        series = [((), self._default)] if self._default is not None else list(self._children.items())
+        for values, child in series:
+            labels = dict(zip(self.labelnames, values))
+            if self.kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(self.bucket_bounds + (float('inf'),), child.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _fmt(bound)
+                    lines.append(f"{self.name}_bucket{_labels(labels, le=le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_fmt(child.sum)}")
+                lines.append(f"{self.name}_count{_labels(labels)} {child.count}")
+            else:
+                lines.append(f"{self.name}{_labels(labels)} {_fmt(child.value)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors / Guarda métricas e coletores"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Metric('counter', name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Metric('gauge', name, documentation, labelnames))
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._add(Metric('histogram', name, documentation, labelnames, buckets))
+
+    def register_collector(self, collect):
+        """
+        collect() -> {(metric_name, help): [(labels_dict, value), ...]}, run per scrape
+        Executado a cada coleta; exporta estatísticas de outros componentes
+        """
+        self._collectors.append(collect)
+
+    def expose(self):
+        """Text exposition format / Formato de exposição em texto"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for collect in self._collectors:
+            try:
+                for (name, documentation), samples in collect().items():
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} gauge")
+                    for labels, value in samples:
+                        lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+            except Exception as e:
+                print(f"[Metrics] Collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+def _fmt(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return repr(float(value))
+
+
+def _labels(labels, **extra):
+    items = dict(labels, **extra)
+    if not items:
+        return ''
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in items.items())
+    return '{' + body + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Global registry and agent-loop metrics / Registro global e métricas do loop
+REGISTRY = Registry()
+
+CHAT_REQUESTS = REGISTRY.counter('hexagent_chat_requests_total', 'Agent tasks started via /chat')
+LLM_TTFT = REGISTRY.histogram('hexagent_llm_ttft_seconds', 'Time to first token per chat_step')
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram('hexagent_llm_tokens_per_second',
+                                           'Streamed chunks per second after the first token',
+                                           buckets=RATE_BUCKETS)
+LLM_STEP_SECONDS = REGISTRY.histogram('hexagent_llm_step_seconds', 'Total duration of one chat_step',
+                                      buckets=LONG_BUCKETS)
+EXECUTE_TOOL_SECONDS = REGISTRY.histogram('hexagent_execute_tool_seconds', 'execute_tool duration',
+                                          buckets=LONG_BUCKETS, labelnames=('source',))
+TASK_ITERATIONS = REGISTRY.histogram('hexagent_task_iterations', 'Agent loop iterations per task',
+                                     buckets=COUNT_BUCKETS)
+STREAM_BYTES = REGISTRY.counter('hexagent_stream_bytes_total', 'Bytes streamed to /chat clients')
+WEB_SEARCH_SECONDS = REGISTRY.histogram('hexagent_web_search_seconds', 'Web search latency')
+SESSION_IO_SECONDS = REGISTRY.histogram('hexagent_session_io_seconds', 'Session save/load latency',
+                                        labelnames=('op',))
+HEXSTRIKE_HEALTH_SECONDS = REGISTRY.histogram('hexagent_hexstrike_health_seconds',
+                                              'HexStrike health probe latency')
+ANSI_SPANS_SECONDS = REGISTRY.histogram('hexagent_ansi_spans_seconds',
+                                        'ANSI tokenization of one command output into spans')
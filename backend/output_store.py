@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Output Store / Armazenamento de Saídas
+=====================================================
+
+Keeps command outputs that are too large for the agent loop's in-memory
+buffers as files under ~/.hexagent-gui/tmp/outputs. The loop streams and
+feeds back only a head/tail preview plus the output id.
+
+Stored outputs are read back in windows through mmap: byte ranges, line
+ranges (a line-offset index with the newline count at every INDEX_BLOCK
+bytes is built once and saved next to the output) and grep-style matches,
+so viewing a huge output costs only the requested window in memory.
+With styled=True, windows come from the output with ANSI escapes converted
+once into plain text plus styled runs (see ansi_spans.py), cached next to it
+as <id>.plain and <id>.spans.
+
+Guarda saídas de comandos grandes demais para os buffers em memória do loop
+do agente como arquivos em ~/.hexagent-gui/tmp/outputs. O loop envia e
+realimenta apenas uma prévia (início/fim) mais o id da saída.
+
+As saídas são lidas em janelas via mmap: faixas de bytes, faixas de linhas
+(um índice com a contagem de quebras a cada INDEX_BLOCK bytes é criado uma
+vez e salvo ao lado da saída) e buscas estilo grep, então ver uma saída
+enorme custa só a janela pedida em memória. Com styled=True, as janelas vêm
+da saída com os escapes ANSI convertidos uma vez em texto puro mais runs com
+estilo (ver ansi_spans.py), em cache ao lado dela como <id>.plain e <id>.spans.
+"""
+
+import array
+import bisect
+import mmap
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from ansi_spans import AnsiTokenizer, style_id
+
+OUTPUT_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Newline count at every INDEX_BLOCK bytes / Contagem de quebras a cada INDEX_BLOCK bytes
+INDEX_BLOCK = 32 * 1024
+INDEX_SCAN_BYTES = 8 * 1024 * 1024
+MAX_WINDOW_BYTES = 4 * 1024 * 1024
+MAX_WINDOW_LINES = 10000
+SPANS_MAGIC = 0x48584153  # "HXAS", format version 1
+
+
+class LineIndex:
+    """
+    Line-offset index: newlines before each INDEX_BLOCK boundary, plus the line count.
+    Jumping to line N bisects the counts, then scans one block.
+    Índice de linhas: quebras antes de cada fronteira de INDEX_BLOCK, mais o total
+    de linhas. Ir para a linha N faz bisect nas contagens e percorre um bloco.
+    """
+
+    def __init__(self, counts, lines, size, block=INDEX_BLOCK):
+        self.counts = counts
+        self.lines = lines
+        self.size = size
+        self.block = block
+
+    @classmethod
+    def build(cls, mm, block=INDEX_BLOCK):
+        """Scan the output once, one block at a time / Percorre a saída uma vez, bloco a bloco"""
+        counts = array.array('Q')
+        size = len(mm)
+        newlines = 0
+        for start in range(0, size, block):
+            counts.append(newlines)
+            newlines += mm[start:start + block].count(b'\n')
+        lines = newlines + (1 if size and mm[size - 1:size] != b'\n' else 0)
+        return cls(counts, lines, size, block)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            array.array('Q', [self.block, self.lines, self.size]).tofile(f)
+            self.counts.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, size):
+        """Saved index, or None if missing or stale / Índice salvo, ou None se ausente ou velho"""
+        try:
+            with open(path, 'rb') as f:
+                data = array.array('Q')
+                data.frombytes(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(data) < 3 or data[2] != size:
+            return None
+        return cls(data[3:], data[1], data[2], data[0])
+
+    def line_start(self, mm, line):
+        """Byte offset where 0-based line starts / Offset onde a linha (base 0) começa"""
+        if line <= 0:
+            return 0
+        if line >= self.lines:
+            return self.size
+        # The line-th newline lies in the last block with fewer newlines before it
+        # A line-ésima quebra está no último bloco com menos quebras antes dele
+        block = bisect.bisect_left(self.counts, line) - 1
+        position = block * self.block
+        for _ in range(line - self.counts[block]):
+            position = mm.find(b'\n', position) + 1
+        return position
+
+    def line_at(self, mm, offset):
+        """0-based line containing offset / Linha (base 0) que contém o offset"""
+        block = min(offset // self.block, len(self.counts) - 1) if self.counts else 0
+        start = block * self.block
+        before = self.counts[block] if self.counts else 0
+        return before + mm[start:offset].count(b'\n')
+
+
+class SpanIndex:
+    """
+    Styled runs of a converted output, read through mmap. The .spans file is
+    an array of uint64: magic, raw size, plain size, has_plain, run count,
+    then the run starts, ends and styles (byte offsets into the plain text).
+    Runs estilizados de uma saída convertida, lidos via mmap. O arquivo
+    .spans é um array de uint64: magic, tamanho bruto, tamanho do texto puro,
+    has_plain, número de runs, e então inícios, fins e estilos dos runs.
+    """
+
+    HEADER = 5
+
+    def __init__(self, path, text_path):
+        self.text_path = text_path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm).cast('Q')
+        count = self._view[4]
+        self.starts = self._view[self.HEADER:self.HEADER + count]
+        self.ends = self._view[self.HEADER + count:self.HEADER + 2 * count]
+        self.styles = self._view[self.HEADER + 2 * count:self.HEADER + 3 * count]
+
+    @classmethod
+    def open(cls, path, plain_path, raw_path, raw_size):
+        """Index for the current raw output, or None if missing or stale / None se ausente ou velho"""
+        try:
+            with open(path, 'rb') as f:
+                header = array.array('Q')
+                header.frombytes(f.read(cls.HEADER * 8))
+            if len(header) < cls.HEADER or header[0] != SPANS_MAGIC or header[1] != raw_size:
+                return None
+            # Storage eviction may have removed the plain copy / A eviction pode ter apagado a cópia
+            if header[3] and os.path.getsize(plain_path) != header[2]:
+                return None
+            return cls(path, plain_path if header[3] else raw_path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def write(path, raw_size, plain_size, has_plain, starts, ends, styles):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            array.array('Q', [SPANS_MAGIC, raw_size, plain_size, int(has_plain), len(starts)]).tofile(f)
+            starts.tofile(f)
+            ends.tofile(f)
+            styles.tofile(f)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        for view in (self.starts, self.ends, self.styles, self._view):
+            view.release()
+        self._mm.close()
+        self._file.close()
+
+    def window(self, mm, start, end):
+        """
+        Spans [gap, length, style_id] of the plain bytes start..end, as
+        ansi_spans.to_spans() gives them for the decoded window text
+        Spans da janela start..end, como to_spans() daria para o texto dela
+        """
+        i = bisect.bisect_right(self.starts, start) - 1
+        if i < 0 or self.ends[i] <= start:
+            i += 1
+        spans = []
+        ascii_window = mm[start:end].isascii()
+        position = start
+        while i < len(self.starts) and self.starts[i] < end:
+            run_start, run_end = max(self.starts[i], start), min(self.ends[i], end)
+            if ascii_window:
+                spans.append([run_start - position, run_end - run_start, style_id(self.styles[i])])
+            else:
+                spans.append([_utf16_units(mm[position:run_start]), _utf16_units(mm[run_start:run_end]),
+                              style_id(self.styles[i])])
+            position = run_end
+            i += 1
+        return spans
+
+
+def _utf16_units(data):
+    return len(data.decode('utf-8', errors='replace').encode('utf-16-le')) // 2
+
+
+class OutputStore:
+    """
+    File-backed store of command outputs / Armazenamento em arquivo de saídas
+
+    Args:
+        directory: Where outputs are written / Onde as saídas são gravadas
+    """
+
+    MAX_CACHED_INDEXES = 16
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._indexes = OrderedDict()
+        self._index_lock = threading.Lock()
+
+    def save(self, text):
+        """
+        Write text to a new output file; returns its id
+        Grava o texto em um novo arquivo; retorna seu id
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        output_id = uuid.uuid4().hex
+        with open(self.path(output_id), 'w', encoding='utf-8', errors='replace') as f:
+            f.write(text)
+        return output_id
+
+    def path(self, output_id):
+        """File path for an id, rejecting anything that is not an id / Caminho do arquivo"""
+        if not OUTPUT_ID_RE.match(output_id or ''):
+            raise ValueError(f"Invalid output id: {output_id!r}")
+        return os.path.join(self.directory, f"{output_id}.txt")
+
+    def exists(self, output_id):
+        try:
+            return os.path.exists(self.path(output_id))
+        except ValueError:
+            return False
+
+    def reader(self, output_id, styled=False):
+        """OutputReader for an id; raises FileNotFoundError / ValueError"""
+        return OutputReader(self, output_id, styled)
+
+    def spans(self, output_id):
+        """
+        SpanIndex of an output, converting it on first use (caller closes it)
+        SpanIndex de uma saída, convertida no primeiro uso (quem chama fecha)
+        """
+        raw_path = self.path(output_id)
+        base = raw_path[:-4]
+        raw_size = os.path.getsize(raw_path)
+        index = SpanIndex.open(base + '.spans', base + '.plain', raw_path, raw_size)
+        if index is None:
+            self._convert(raw_path, base, raw_size)
+            index = SpanIndex.open(base + '.spans', base + '.plain', raw_path, raw_size)
+            if index is None:
+                raise FileNotFoundError(f"Output changed while converting: {output_id}")
+        return index
+
+    def _convert(self, raw_path, base, raw_size):
+        """
+        Strip ANSI escapes once, streaming in chunks / Remove escapes ANSI uma vez, em blocos
+        The plain copy is only kept when the output had escapes / A cópia só fica se havia escapes
+        """
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tokenizer = AnsiTokenizer(binary=True)
+        starts, ends, styles = array.array('Q'), array.array('Q'), array.array('Q')
+        plain_size = 0
+        has_escapes = False
+        with open(raw_path, 'rb') as raw, open(base + '.plain' + suffix, 'wb') as plain:
+            while True:
+                chunk = raw.read(INDEX_SCAN_BYTES)
+                has_escapes = has_escapes or b'\x1b' in chunk
+                text, runs = tokenizer.feed(chunk, final=not chunk)
+                for run_start, run_end, style in runs:
+                    if ends and ends[-1] == plain_size + run_start and styles[-1] == style:
+                        ends[-1] = plain_size + run_end
+                    else:
+                        starts.append(plain_size + run_start)
+                        ends.append(plain_size + run_end)
+                        styles.append(style)
+                plain.write(text)
+                plain_size += len(text)
+                if not chunk:
+                    break
+        if has_escapes:
+            os.replace(base + '.plain' + suffix, base + '.plain')
+        else:
+            os.remove(base + '.plain' + suffix)
+        SpanIndex.write(base + '.spans', raw_size, plain_size, has_escapes, starts, ends, styles)
+
+    def _index(self, path, mm):
+        """Cached or saved line index of a file, built on first use / Índice em cache, salvo ou criado"""
+        key = (path, len(mm))
+        with self._index_lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index_path = path[:-4] + '.idx' if path.endswith('.txt') else path + '.idx'
+        index = LineIndex.load(index_path, len(mm))
+        if index is None:
+            index = LineIndex.build(mm)
+            try:
+                index.save(index_path)
+            except OSError as e:
+                print(f"[Outputs] Failed to save line index: {e}")
+        with self._index_lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+
+class OutputReader:
+    """
+    Windows over one stored output via mmap (use as a context manager)
+    Janelas sobre uma saída armazenada via mmap (usar como context manager)
+    """
+
+    def __init__(self, store, output_id, styled=False):
+        self.store = store
+        self.output_id = output_id
+        # Styled windows read the plain copy and add spans / Janelas com estilo leem a cópia pura
+        self.spans = store.spans(output_id) if styled else None
+        self.path = self.spans.text_path if styled else store.path(output_id)
+        self._file = open(self.path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file / mmap não mapeia arquivo vazio
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+        if self.spans:
+            self.spans.close()
+
+    @property
+    def index(self):
+        return self.store._index(self.path, self.mm)
+
+    @staticmethod
+    def _text(data):
+        return data.decode('utf-8', errors='replace')
+
+    def _window(self, start, end, **fields):
+        window = dict(fields, text=self._text(self.mm[start:end]))
+        if self.spans:
+            window['spans'] = self.spans.window(self.mm, start, end)
+        return window
+
+    def bytes_range(self, offset=0, length=65536):
+        """
+        Up to length bytes from offset / Até length bytes a partir de offset
+        """
+        offset = min(max(0, offset), self.size)
+        length = min(max(0, length), MAX_WINDOW_BYTES)
+        end = min(self.size, offset + length)
+        return self._window(offset, end, offset=offset, length=end - offset,
+                            next_offset=end if end < self.size else None)
+
+    def lines_range(self, line=0, count=200):
+        """
+        count lines starting at 0-based line / count linhas a partir da linha (base 0)
+        """
+        index = self.index
+        line = min(max(0, line), index.lines)
+        count = min(max(0, count), MAX_WINDOW_LINES)
+        start = index.line_start(self.mm, line)
+        end = start
+        taken = 0
+        while taken < count and end < self.size and end - start < MAX_WINDOW_BYTES:
+            found = self.mm.find(b'\n', end)
+            end = self.size if found == -1 else found + 1
+            taken += 1
+        next_line = line + taken
+        return self._window(start, end, line=line, lines=taken, offset=start, length=end - start,
+                            total_lines=index.lines, next_line=next_line if next_line < index.lines else None)
+
+    def grep(self, pattern, ignore_case=False, fixed=False, offset=0, max_matches=100):
+        """
+        Lines matching a regex (or fixed string) from offset on, like grep -n
+        Linhas que casam com uma regex (ou texto fixo) a partir de offset, como grep -n
+        """
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        regex = re.compile(re.escape(pattern.encode('utf-8')) if fixed else pattern.encode('utf-8'), flags)
+        max_matches = min(max(1, max_matches), MAX_WINDOW_LINES)
+        index = self.index
+        matches = []
+        position = min(max(0, offset), self.size)
+        while len(matches) < max_matches and position < self.size:
+            match = regex.search(self.mm, position)
+            if match is None or (match.start() == self.size and self.mm[self.size - 1:] == b'\n'):
+                # No match, or only the empty "line" after the final newline / Só a "linha" vazia final
+                position = self.size
+                break
+            line_start = self.mm.rfind(b'\n', 0, match.start()) + 1
+            line_end = self.mm.find(b'\n', match.end())
+            line_end = self.size if line_end == -1 else line_end
+            matches.append(self._window(line_start, min(line_end, line_start + 4096),
+                                        line=index.line_at(self.mm, line_start), offset=line_start))
+            position = line_end + 1
+        return {'matches': matches, 'next_offset': position if position < self.size else None}
+
+
+def preview(text, limit, output_id=None):
+    """
+    Head and tail of text within limit chars, noting what was left out
+    Início e fim do texto dentro de limit caracteres, indicando o omitido
+    """
+    if len(text) <= limit:
+        return text
+    half = max(0, limit // 2)
+    omitted = len(text) - 2 * half
+    where = f", saída completa / full output: {output_id}" if output_id else ""
+    return f"{text[:half]}\n\n... [{omitted} caracteres omitidos / chars omitted{where}] ...\n\n{text[-half:]}"
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Live Profiler / Profiler ao Vivo
+===============================================
+
+On-demand diagnostics for a running backend, without restarting it under a
+profiler:
+
+  - sample(): a time-bounded wall-clock sampling profile of all threads via
+    sys._current_frames(). It is written in collapsed-stack format, one
+    "thread;frame;frame count" line per stack, ready for flamegraph.pl or
+    speedscope.
+  - memory_start() / memory_snapshot() / memory_stop(): tracemalloc with a
+    baseline snapshot, reporting the top-N allocation diffs against it.
+  - stacks(): live stack traces of tracked /chat generators, whether they
+    are running in a thread or suspended between events.
+
+Results are saved under ~/.hexagent-gui/log/profiles. Nothing runs while the
+profiler is idle. There is no sampling thread, no tracemalloc and no trace
+hook, only a dict entry per in-flight /chat.
+
+Diagnóstico sob demanda do backend em execução, sem reiniciá-lo sob um
+profiler: perfil por amostragem de todas as threads com limite de tempo (em
+formato de pilhas colapsadas), snapshots do tracemalloc com as N maiores
+diferenças de alocação, e pilhas ao vivo dos geradores /chat em andamento.
+Os resultados ficam em ~/.hexagent-gui/log/profiles. Nada roda enquanto o
+profiler está ocioso.
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+
+# Frames of the allocator itself are noise in memory diffs / Frames do próprio alocador são ruído
+MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class ProfilerBusy(RuntimeError):
+    """A sampling profile is already running / Um perfil já está em execução"""
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    """Root-first frame labels of a stack / Rótulos da pilha, da raiz para o topo"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class Profiler:
+    """
+    Live diagnostics of this process / Diagnóstico ao vivo deste processo
+
+    Args:
+        directory: Where results are saved / Onde os resultados são salvos
+        max_seconds: Longest sampling profile / Maior duração de um perfil
+        interval: Default seconds between samples / Intervalo padrão entre amostras
+        top_n: Default allocation diffs reported / Diferenças de alocação reportadas
+    """
+
+    def __init__(self, directory, max_seconds=60.0, interval=0.005, top_n=25):
+        self.directory = directory
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self.top_n = top_n
+        self._sampling = threading.Lock()
+        self._memory_lock = threading.Lock()
+        self._baseline = None
+        self._started_tracemalloc = False
+        self._chats = {}
+
+    @classmethod
+    def from_config(cls, directory, profiler_config):
+        """Build from the 'profiler' config section / Cria a partir da seção 'profiler'"""
+        cfg = profiler_config or {}
+        return cls(
+            directory,
+            max_seconds=cfg.get('max_seconds', 60.0),
+            interval=cfg.get('interval', 0.005),
+            top_n=cfg.get('top_n', 25),
+        )
+
+    def _save(self, kind, extension, text):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.{extension}"
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    # ------------------------------------------------------------ sampling
+
+    def sample(self, seconds=10.0, interval=None, idle=True):
+        """
+        Sample every thread's stack for seconds; returns a summary and the file
+        Amostra a pilha de todas as threads por seconds; retorna resumo e arquivo
+
+        idle=False skips threads parked in a wait (top frame in threading,
+        queue, selectors or socket) / idle=False ignora threads em espera
+        """
+        seconds = min(max(0.01, float(seconds)), self.max_seconds)
+        interval = max(0.001, float(interval or self.interval))
+        if not self._sampling.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running / Um perfil já está em execução")
+        try:
+            stacks = Counter()
+            leaves = Counter()
+            own = threading.get_ident()
+            samples = 0
+            started = time.monotonic()
+            deadline = started + seconds
+            while True:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    if not idle and os.path.basename(frame.f_code.co_filename) in (
+                            'threading.py', 'queue.py', 'selectors.py', 'socket.py', 'socketserver.py'):
+                        continue
+                    labels = _collapse(frame)
+                    stacks[(names.get(ident, str(ident)),) + tuple(labels)] += 1
+                    leaves[labels[-1]] += 1
+                del frame
+                samples += 1
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                time.sleep(min(interval, deadline - now))
+            elapsed = time.monotonic() - started
+        finally:
+            self._sampling.release()
+
+        collapsed = "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+        path = self._save('profile', 'collapsed', collapsed)
+        total = sum(leaves.values()) or 1
+        return {
+            'file': path,
+            'pid': os.getpid(),
+            'seconds': round(elapsed, 3),
+            'samples': samples,
+            'stacks': len(stacks),
+            'top_self': [{'frame': label, 'samples': count, 'percent': round(count * 100.0 / total, 1)}
+                         for label, count in leaves.most_common(self.top_n)],
+            'collapsed': collapsed,
+        }
+
+    # -------------------------------------------------------------- memory
+
+    def memory_start(self, frames=10):
+        """Start tracemalloc and take the baseline / Inicia o tracemalloc e tira a base"""
+        with self._memory_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, int(frames)))
+                self._started_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+            return self.memory_status()
+
+    def memory_snapshot(self, top=None, key='lineno'):
+        """
+        Top-N allocation diffs against the baseline, saved to a file
+        N maiores diferenças de alocação contra a base, salvas em arquivo
+        """
+        if key not in ('lineno', 'filename', 'traceback'):
+            raise ValueError(f"Invalid key: {key!r} (lineno, filename, traceback)")
+        top = max(1, int(top or self.top_n))
+        with self._memory_lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc not started; use action=start / tracemalloc não iniciado")
+            snapshot = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+            diffs = snapshot.compare_to(self._baseline, key)[:top]
+            current, peak = tracemalloc.get_traced_memory()
+        entries = []
+        lines = [f"# tracemalloc top {top} by {key}, pid {os.getpid()}, "
+                 f"traced {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+        for stat in diffs:
+            entries.append({
+                'size_diff_kib': round(stat.size_diff / 1024, 1),
+                'size_kib': round(stat.size / 1024, 1),
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+                'traceback': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            })
+            lines.append(str(stat))
+            if key == 'traceback':
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+        path = self._save('memory', 'txt', "\n".join(lines) + "\n")
+        return {'file': path, 'pid': os.getpid(), 'key': key, 'traced_kib': round(current / 1024, 1),
+                'peak_kib': round(peak / 1024, 1), 'top': entries}
+
+    def memory_stop(self):
+        """Drop the baseline; stop tracemalloc if we started it / Para o tracemalloc se foi iniciado aqui"""
+        with self._memory_lock:
+            self._baseline = None
+            if self._started_tracemalloc and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._started_tracemalloc = False
+            return self.memory_status()
+
+    def memory_status(self):
+        return {'tracing': tracemalloc.is_tracing(), 'baseline': self._baseline is not None,
+                'pid': os.getpid()}
+
+    # --------------------------------------------------------- chat stacks
+
+    def track(self, chat_id, generator, info):
+        """Remember an in-flight /chat generator / Registra um gerador /chat em andamento"""
+        self._chats[chat_id] = (generator, info)
+
+    def untrack(self, chat_id):
+        self._chats.pop(chat_id, None)
+
+    @staticmethod
+    def _generator_chain(generator):
+        """
+        A generator and the ones it drives, outermost first, followed through
+        yield from or generator locals / O gerador e os que ele conduz
+        """
+        chain = []
+        seen = set()
+        while generator is not None and id(generator) not in seen and getattr(generator, 'gi_frame', None):
+            seen.add(id(generator))
+            chain.append(generator)
+            inner = generator.gi_yieldfrom
+            if inner is None:
+                inner = next((value for value in generator.gi_frame.f_locals.values()
+                              if hasattr(value, 'gi_frame') and value.gi_frame is not None), None)
+            generator = inner
+        return chain
+
+    def stacks(self, all_threads=False):
+        """
+        Live stacks of tracked /chat streams (and every thread if all_threads)
+        Pilhas ao vivo dos streams /chat (e de todas as threads se all_threads)
+        """
+        frames = sys._current_frames()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        chats = {}
+        for chat_id, (generator, info) in list(self._chats.items()):
+            chain = self._generator_chain(generator)
+            entry = dict(info, seconds=round(time.time() - info.get('started', time.time()), 3))
+            if not chain:
+                entry.update(state='finished', stack=[])
+            elif chain[0].gi_running:
+                # Find the thread driving it and keep the frames from the generator in
+                # Acha a thread que o executa e mantém os frames a partir do gerador
+                outer = chain[0].gi_frame
+                entry.update(state='running', stack=[])
+                for ident, frame in frames.items():
+                    walked = []
+                    while frame is not None and frame is not outer:
+                        walked.append(frame)
+                        frame = frame.f_back
+                    if frame is outer:
+                        walked.append(outer)
+                        walked.reverse()
+                        entry.update(thread=names.get(ident, str(ident)),
+                                     stack=traceback.format_list(
+                                         [traceback.FrameSummary(f.f_code.co_filename, f.f_lineno, f.f_code.co_name)
+                                          for f in walked]))
+                        break
+            else:
+                entry.update(state='suspended', stack=traceback.format_list(
+                    [traceback.FrameSummary(g.gi_frame.f_code.co_filename, g.gi_frame.f_lineno,
+                                            g.gi_frame.f_code.co_name) for g in chain]))
+            chats[chat_id] = entry
+        result = {'pid': os.getpid(), 'chats': chats}
+        if all_threads:
+            result['threads'] = {names.get(ident, str(ident)): traceback.format_stack(frame)
+                                 for ident, frame in frames.items()}
+        del frames
+        lines = []
+        for chat_id, entry in chats.items():
+            lines.append(f"== chat {chat_id} [{entry['state']}] {entry.get('thread', '')} "
+                         f"{entry.get('seconds')}s: {entry.get('message', '')[:80]!r}")
+            lines.extend(line.rstrip('\n') for line in entry['stack'])
+        for name, stack in result.get('threads', {}).items():
+            lines.append(f"== thread {name}")
+            lines.extend(line.rstrip('\n') for line in stack)
+        result['file'] = self._save('stacks', 'txt', "\n".join(lines) + "\n")
+        return result
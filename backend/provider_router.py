@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Provider Router / Roteador de Provedores
+=======================================================
+
+Routes chat requests across the providers listed in config/ai_models.json.
+Each provider keeps moving averages of time-to-first-token (TTFT) and
+tokens/sec; the fastest healthy provider is tried first. Optionally a second
+(hedged) request is started when the first token does not arrive before a
+deadline, and the first provider to answer wins. A circuit breaker takes a
+provider out of rotation after consecutive errors and retries it after a
+cooldown.
+
+Roteia requisições de chat entre os provedores de config/ai_models.json.
+Cada provedor mantém médias móveis de tempo até o primeiro token (TTFT) e
+tokens/seg; o provedor saudável mais rápido é tentado primeiro. Opcionalmente
+uma segunda requisição (hedge) é iniciada se o primeiro token não chegar antes
+de um prazo, e vence o primeiro provedor a responder. Um circuit breaker
+remove um provedor após erros consecutivos e o testa novamente após um tempo.
+
+Providers speak the OpenAI-compatible /chat/completions streaming API.
+Os provedores usam a API de streaming /chat/completions compatível com OpenAI.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+
+
+class ProviderError(Exception):
+    """All candidate providers failed / Todos os provedores falharam"""
+
+
+class ProviderStats:
+    """Latency and health state for one provider / Latência e saúde de um provedor"""
+
+    def __init__(self, name, base_url, model, api_key=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.ttft = None          # EWMA seconds / Média móvel em segundos
+        self.tokens_per_sec = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0     # circuit open until (monotonic) / circuito aberto até
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            'model': self.model,
+            'ttft_seconds': round(self.ttft, 3) if self.ttft is not None else None,
+            'tokens_per_sec': round(self.tokens_per_sec, 1) if self.tokens_per_sec is not None else None,
+            'requests': self.requests,
+            'errors': self.errors,
+            'circuit': 'open' if self.open_until > now else 'closed',
+        }
+
+
+class ProviderRouter:
+    """
+    Latency-aware routing with hedging and circuit breaking
+    Roteamento por latência com hedge e circuit breaker
+
+    Args:
+        providers: name -> {"BASE_URL", "MODEL_NAME", "API_KEY"(optional)}
+        default_api_key: Key of active_provider only (ai.api_key) / Chave só do active_provider
+        active_provider: Provider default_api_key belongs to / Provedor dono de default_api_key
+        hedge_after_seconds: Start a backup request after this TTFT, None disables
+                             Inicia requisição reserva após este TTFT, None desativa
+        failure_threshold: Consecutive errors that open the circuit / Erros que abrem o circuito
+        cooldown_seconds: How long an open circuit stays open / Tempo com circuito aberto
+    """
+
+    def __init__(self, providers, system_prompt=None, temperature=0.7, default_api_key=None,
+                 active_provider=None, hedge_after_seconds=None, failure_threshold=3, cooldown_seconds=30,
+                 alpha=0.3, connect_timeout=5, read_timeout=120, enabled=False):
+        self.enabled = enabled
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.hedge_after_seconds = hedge_after_seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.alpha = alpha
+        self.timeout = (connect_timeout, read_timeout)
+        self._lock = threading.Lock()
+        self.providers = {}
+        for name, spec in providers.items():
+            api_key = spec.get('API_KEY') or os.environ.get(f"{name.upper()}_API_KEY")
+            if not api_key and name == active_provider:
+                api_key = default_api_key
+            if not api_key:
+                # Never send one provider's key to another / Nunca envia a chave de um provedor a outro
+                print(f"[Router] Skipping provider {name}: no API_KEY or {name.upper()}_API_KEY")
+                continue
+            self.providers[name] = ProviderStats(name, spec['BASE_URL'], spec['MODEL_NAME'], api_key)
+
+    @classmethod
+    def from_workspace(cls, workspace_dir, config):
+        """
+        Build from ai_models.json, agents/hexagent.json and the 'routing' config section
+        Cria a partir de ai_models.json, agents/hexagent.json e da seção 'routing'
+        """
+        cfg = config.get('routing', {})
+        providers = {}
+        active_provider = None
+        system_prompt = None
+        try:
+            with open(os.path.join(workspace_dir, 'config', 'ai_models.json'), 'r', encoding='utf-8') as f:
+                models = json.load(f)
+            providers = models.get('providers', {})
+            active_provider = models.get('active_provider')
+        except Exception as e:
+            print(f"[Router] Failed to load ai_models.json: {e}")
+        try:
+            with open(os.path.join(workspace_dir, 'config', 'agents', 'hexagent.json'), 'r', encoding='utf-8') as f:
+                system_prompt = json.load(f).get('system_prompt')
+        except Exception as e:
+            print(f"[Router] Failed to load agent persona: {e}")
+        return cls(
+            providers,
+            system_prompt=system_prompt,
+            temperature=config.get('ai', {}).get('temperature', 0.7),
+            default_api_key=config.get('ai', {}).get('api_key') or None,
+            active_provider=active_provider,
+            hedge_after_seconds=cfg.get('hedge_after_seconds'),
+            failure_threshold=cfg.get('failure_threshold', 3),
+            cooldown_seconds=cfg.get('cooldown_seconds', 30),
+            connect_timeout=cfg.get('connect_timeout', 5),
+            read_timeout=cfg.get('read_timeout', 120),
+            enabled=cfg.get('enabled', False),
+        )
+
+    def ranked(self):
+        """
+        Healthy providers, fastest expected first / Provedores saudáveis, mais rápido primeiro
+        Unmeasured providers rank first so they get measured / Sem medição vão primeiro
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [p for p in self.providers.values() if p.open_until <= now]
+        return sorted(healthy, key=lambda p: p.ttft if p.ttft is not None else -1.0)
+
+    def chat_step(self, prompt):
+        """
+        Stream a completion for prompt, same contract as core.chat_step()
+        Gera uma resposta em stream para o prompt, mesmo contrato de core.chat_step()
+
+        Raises:
+            ProviderError: No provider produced a first token / Nenhum provedor respondeu
+        """
+        candidates = self.ranked()
+        if not candidates:
+            raise ProviderError("No healthy provider available / Nenhum provedor disponível")
+
+        events = queue.Queue()
+        cancels = {}
+        started = []
+
+        def launch(provider):
+            cancel = threading.Event()
+            cancels[provider.name] = cancel
+            started.append(provider)
+            threading.Thread(target=self._run, args=(provider, prompt, events, cancel), daemon=True).start()
+
+        launch(candidates.pop(0))
+        winner = None
+        failed = set()
+        try:
+            # Phase 1: wait for a first token, hedging or failing over as needed
+            # Fase 1: aguarda o primeiro token, com hedge ou failover
+            while winner is None:
+                in_flight = len(started) - len(failed)
+                hedge = self.hedge_after_seconds if candidates and in_flight == 1 else None
+                try:
+                    name, kind, payload = events.get(timeout=hedge)
+                except queue.Empty:
+                    print(f"[Router] Hedging: no first token after {hedge}s, starting {candidates[0].name}")
+                    launch(candidates.pop(0))
+                    continue
+                if name in failed:
+                    continue
+                if kind == 'chunk':
+                    winner = name
+                    for other, cancel in cancels.items():
+                        if other != name:
+                            cancel.set()
+                    yield payload
+                elif kind == 'error':
+                    failed.add(name)
+                    print(f"[Router] Provider {name} failed: {payload}")
+                    if len(failed) == len(started):
+                        if not candidates:
+                            raise ProviderError(f"All providers failed, last error: {payload}")
+                        launch(candidates.pop(0))
+                elif kind == 'done' and name not in failed:
+                    # Empty completion / Resposta vazia
+                    return
+
+            # Phase 2: relay the winner's stream / Fase 2: repassa o stream do vencedor
+            while True:
+                name, kind, payload = events.get()
+                if name != winner:
+                    continue
+                if kind == 'chunk':
+                    yield payload
+                elif kind == 'done':
+                    return
+                elif kind == 'error':
+                    raise ProviderError(f"Provider {name} failed mid-stream: {payload}")
+        finally:
+            for cancel in cancels.values():
+                cancel.set()
+
+    def stats(self):
+        """Per-provider latency and health / Latência e saúde por provedor"""
+        with self._lock:
+            return {name: p.snapshot() for name, p in self.providers.items()}
+
+    # Internal helpers / Auxiliares internos
+
+    def _run(self, provider, prompt, events, cancel):
+        """Worker: stream one provider into the event queue / Worker de um provedor"""
+        messages = []
+        if self.system_prompt:
+            messages.append({'role': 'system', 'content': self.system_prompt})
+        messages.append({'role': 'user', 'content': prompt})
+        headers = {'Content-Type': 'application/json'}
+        if provider.api_key:
+            headers['Authorization'] = f"Bearer {provider.api_key}"
+        body = {'model': provider.model, 'messages': messages,
+                'temperature': self.temperature, 'stream': True}
+
+        start = time.monotonic()
+        first = None
+        tokens = 0
+        with self._lock:
+            provider.requests += 1
+        try:
+            with requests.post(f"{provider.base_url}/chat/completions", json=body, headers=headers,
+                               stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel.is_set():
+                        self._record_cancelled(provider, start, first)
+                        return
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+                    delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                    if not delta:
+                        continue
+                    if first is None:
+                        first = time.monotonic()
+                    tokens += 1
+                    events.put((provider.name, 'chunk', delta))
+        except Exception as e:
+            self._record_failure(provider)
+            events.put((provider.name, 'error', str(e)))
+            return
+        self._record_success(provider, start, first, tokens)
+        events.put((provider.name, 'done', None))
+
+    def _record_success(self, provider, start, first, tokens):
+        end = time.monotonic()
+        with self._lock:
+            provider.consecutive_failures = 0
+            provider.open_until = 0.0
+            if first is None:
+                return
+            ttft = first - start
+            provider.ttft = ttft if provider.ttft is None else (
+                self.alpha * ttft + (1 - self.alpha) * provider.ttft)
+            if tokens > 1 and end > first:
+                tps = (tokens - 1) / (end - first)
+                provider.tokens_per_sec = tps if provider.tokens_per_sec is None else (
+                    self.alpha * tps + (1 - self.alpha) * provider.tokens_per_sec)
+
+    def _record_cancelled(self, provider, start, first):
+        # A hedge loser without a first token was at least this slow
+        # Um perdedor do hedge sem primeiro token foi no mínimo tão lento
+        if first is not None:
+            return
+        elapsed = time.monotonic() - start
+        with self._lock:
+            if provider.ttft is None or provider.ttft < elapsed:
+                provider.ttft = elapsed
+
+    def _record_failure(self, provider):
+        with self._lock:
+            provider.errors += 1
+            provider.consecutive_failures += 1
+            if provider.consecutive_failures >= self.failure_threshold:
+                provider.open_until = time.monotonic() + self.cooldown_seconds
+                print(f"[Router] Circuit opened for {provider.name} ({self.cooldown_seconds}s)")
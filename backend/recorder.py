@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Session Recorder / Gravador de Sessões
+=====================================================
+
+Captures what a /chat run did: the request, every chat_step stream (chunks
+with inter-chunk delays, keyed by a hash of the prompt) and every
+execute_tool call with its result and duration. Each run becomes one
+gzip-compressed JSON-lines file under ~/.hexagent-gui/log/recordings.
+benchmarks/replay.py re-runs these traces against the backend, without
+network, to produce latency and memory numbers from real workloads.
+
+Captura o que uma execução do /chat fez: a requisição, cada stream do
+chat_step (chunks com atrasos, indexados por hash do prompt) e cada chamada
+execute_tool com resultado e duração. Cada execução vira um arquivo JSON-lines
+comprimido com gzip em ~/.hexagent-gui/log/recordings. benchmarks/replay.py
+re-executa esses traces no backend, sem rede, gerando números de latência e
+memória a partir de cargas reais.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+
+FORMAT_VERSION = 1
+
+
+def prompt_digest(prompt):
+    """Short stable hash of a prompt / Hash curto e estável de um prompt"""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:32]
+
+
+class Recording:
+    """
+    One /chat run being captured / Uma execução do /chat sendo gravada
+    """
+
+    def __init__(self, recorder, request_body, prompt, trace_id):
+        self.recorder = recorder
+        self.trace_id = trace_id
+        self.started = time.time()
+        self.request = request_body
+        self.prompt = prompt
+        self.steps = []
+        self._step = None
+        self._last = None
+        self.closed = False
+
+    def begin_step(self, prompt, iteration):
+        """Start a chat_step / Inicia um chat_step"""
+        self._step = {'iteration': iteration, 'prompt': prompt_digest(prompt), 'chunks': [], 'execs': []}
+        self.steps.append(self._step)
+        self._last = time.perf_counter()
+
+    def chunk(self, text):
+        """Record one streamed chunk and its delay / Grava um chunk e seu atraso"""
+        now = time.perf_counter()
+        self._step['chunks'].append((round(now - self._last, 4), text))
+        self._last = now
+
+    def execute(self, cmd, result, seconds, cached=False):
+        """Record one execute_tool call / Grava uma chamada execute_tool"""
+        self._step['execs'].append({'cmd': cmd, 'result': result, 'seconds': round(seconds, 4),
+                                    'cached': cached})
+
+    def close(self):
+        """Write the trace file (idempotent) / Grava o arquivo de trace (idempotente)"""
+        if self.closed:
+            return
+        self.closed = True
+        if not self.steps:
+            return
+        self.recorder.write(self)
+
+
+class _NullRecording:
+    """Recording disabled / Gravação desativada"""
+
+    def begin_step(self, prompt, iteration):
+        pass
+
+    def chunk(self, text):
+        pass
+
+    def execute(self, cmd, result, seconds, cached=False):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_RECORDING = _NullRecording()
+
+
+class Recorder:
+    """
+    Creates recordings and keeps the newest max_files on disk
+    Cria gravações e mantém as max_files mais recentes em disco
+    """
+
+    def __init__(self, directory, enabled=False, max_files=200):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_files = max_files
+
+    @classmethod
+    def from_config(cls, directory, recorder_config):
+        """Build from the 'recorder' config section / Cria a partir da seção 'recorder'"""
+        cfg = recorder_config or {}
+        return cls(directory, enabled=cfg.get('enabled', False), max_files=cfg.get('max_files', 200))
+
+    def start(self, request_body, prompt, trace_id, enabled=None):
+        """
+        Begin recording a run; prompt is the task after language/web-search preprocessing
+        Inicia a gravação; prompt é a tarefa após o pré-processamento de idioma/busca
+        """
+        if not (self.enabled if enabled is None else enabled):
+            return NULL_RECORDING
+        return Recording(self, request_body, prompt, trace_id)
+
+    def write(self, recording):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            name = time.strftime('%Y%m%d-%H%M%S', time.localtime(recording.started))
+            path = os.path.join(self.directory, f"{name}-{recording.trace_id}.jsonl.gz")
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                header = {'version': FORMAT_VERSION, 'started': recording.started,
+                          'trace_id': recording.trace_id, 'request': recording.request,
+                          'prompt': recording.prompt}
+                f.write(json.dumps(header, ensure_ascii=False) + "\n")
+                for step in recording.steps:
+                    f.write(json.dumps(step, ensure_ascii=False) + "\n")
+            self._prune()
+            return path
+        except Exception as e:
+            print(f"[Recorder] Failed to write recording: {e}")
+            return None
+
+    def _prune(self):
+        files = sorted(e.path for e in os.scandir(self.directory) if e.name.endswith('.jsonl.gz'))
+        for path in files[:-self.max_files] if self.max_files else []:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_recording(path):
+    """
+    Read a recording file -> {"header": {...}, "steps": [...]}
+    Lê um arquivo de gravação -> {"header": {...}, "steps": [...]}
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {header.get('version')}")
+        steps = [json.loads(line) for line in f if line.strip()]
+    return {'header': header, 'steps': steps}
@@ -26,7 +26,7 @@ License / Licença: MIT
 
 import sys
 import os
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import json
 import time
@@ -34,6 +34,26 @@ import subprocess
 import signal
 import atexit
 import threading
+import re
+
+from admission import AdmissionController, QueueFull
+from tool_cache import ToolCache
+from llm_cache import LLMCache
+from provider_router import ProviderRouter
+import metrics
+from tracing import Tracer
+from recorder import Recorder
+from output_store import OutputStore, preview
+from ansi_spans import to_spans
+from supervisor import ProcessSupervisor
+from hexstrike_client import HexStrikeHTTP
+from storage import StorageManager, list_entries
+from agent_loop import AgentLoop
+from async_engine import AsyncEngine, READ_ONLY_COMMANDS
+from task_memory import TaskMemory
+from profiler import Profiler, ProfilerBusy
+from state import StateStore, SessionStore, ProcessLock, write_json_atomic
+import workers
 
 # Add parent directories to sys.path to find HexAgent and its dependencies
 # Add path logic
@@ -112,6 +132,8 @@ CORS(app) # Enable CORS for Electron
 
 # Cleanup Handler / Handler de Limpeza
 # Cleanup Handler / Handler de Limpeza
+# None = single process, 'launcher' or 'worker' with --workers / Papel no modo multi-processo
+WORKER_ROLE = None
 cleaned_up = False
 def cleanup_handler(*args):
     global cleaned_up
@@ -125,14 +147,17 @@ def cleanup_handler(*args):
         if 'core' in globals() and hasattr(core, 'shutdown'):
             core.shutdown()
         
-        # Aggressive Zombie Cleanup / Limpeza Agressiva de Zumbis
-        # Using pkill to ensure all instances are dead
+        # Stop the supervised HexStrike process group / Para o grupo do HexStrike supervisionado
         print("[Shutdown] Ensuring HexStrike is dead...")
         try:
-            # Kill by pattern
-            subprocess.run(['pkill', '-f', 'hexstrike_server.py'], stderr=subprocess.DEVNULL)
-            # Find any stray python processes running hexstrike
-            subprocess.run("ps aux | grep hexstrike_server.py | grep -v grep | awk '{print $2}' | xargs -r kill -9", shell=True, stderr=subprocess.DEVNULL)
+            if globals().get('supervisor') is not None:
+                supervisor.shutdown()
+            elif WORKER_ROLE is not None and not hexstrike_owner.held:
+                # Another worker (or none) started it / Outro worker (ou nenhum) o iniciou
+                pass
+            else:
+                # Started by AgentCore, no handle to it / Iniciado pelo AgentCore, sem handle
+                subprocess.run(['pkill', '-f', 'hexstrike_server.py'], stderr=subprocess.DEVNULL)
         except Exception as k_err:
              print(f"[Shutdown] Cleanup warning: {k_err}")
              
@@ -320,15 +345,130 @@ def load_config():
         "services": {
             "flask_port": 5000, 
             "hexstrike_port": 8888,
-            "backend_host": "127.0.0.1"
+            "backend_host": "127.0.0.1",
+            "workers": 1
         },
         "ui": {
             "theme": "dark",
-            "show_iteration_markers": True
+            "show_iteration_markers": True,
+            # Stream command output as plain text + spans instead of raw ANSI
+            # Envia a saída como texto puro + spans em vez de ANSI bruto
+            "ansi_spans": False
         },
         "system": {
             "cleanup_on_exit": False,
             "auto_save_session": True
+        },
+        "admission": {
+            "enabled": True,
+            "chat_concurrency": 2,
+            "execute_concurrency": 4,
+            "max_queue_per_session": 4,
+            "max_queue_total": 32,
+            "queue_timeout": 300
+        },
+        "tool_cache": {
+            "enabled": False,
+            "ttl_seconds": 300,
+            "max_entries": 256,
+            # HexStrike runs commands in the backend's cwd / Mesmo diretório de trabalho
+            "shared_cwd": False
+        },
+        "llm_cache": {
+            "enabled": False,
+            "ttl_seconds": 86400,
+            "max_bytes": 67108864,
+            "timing": "instant"
+        },
+        "routing": {
+            "enabled": False,
+            "hedge_after_seconds": None,
+            "failure_threshold": 3,
+            "cooldown_seconds": 30,
+            "connect_timeout": 5,
+            "read_timeout": 120
+        },
+        "governor": {
+            "enabled": True,
+            "max_wall_seconds": 1800,
+            "max_tokens": 200000,
+            "max_exec_seconds": 900,
+            "repeat_threshold": 3,
+            "cycle_repeats": 3,
+            "max_cycle_length": 4
+        },
+        "tracing": {
+            "enabled": True,
+            "max_bytes": 10485760,
+            "backup_count": 5,
+            "queue_size": 10000,
+            "max_files": 50
+        },
+        "recorder": {
+            "enabled": False,
+            "max_files": 200
+        },
+        "memory": {
+            "max_response_chars": 262144,
+            "max_result_chars": 65536,
+            "max_feedback_chars": 131072
+        },
+        "supervisor": {
+            "enabled": True,
+            "script": "",
+            "health_interval": 5,
+            "health_timeout": 2,
+            "failure_threshold": 3,
+            "startup_grace": 15,
+            "backoff_initial": 1,
+            "backoff_max": 60,
+            "stop_timeout": 0.5
+        },
+        "hexstrike_client": {
+            "pool_size": 8,
+            "connect_timeout": 2,
+            "read_timeout": 300,
+            "health_timeout": 2,
+            "health_retries": 2
+        },
+        "storage": {
+            "enabled": True,
+            "interval_seconds": 300,
+            "min_age_seconds": 60,
+            "quotas": {
+                "tmp": 1073741824,
+                "downloads": 5368709120
+            }
+        },
+        "profiler": {
+            # Localhost-only /debug endpoints; checked live, no restart needed
+            # Endpoints /debug só locais; verificado ao vivo, sem reiniciar
+            "enabled": False,
+            "max_seconds": 60,
+            "interval": 0.005,
+            "top_n": 25
+        },
+        "async_engine": {
+            # asyncio agent loop for /chat and batch (opt-in); threads and
+            # read_only_commands apply on restart / Loop asyncio do agente (opcional)
+            "enabled": False,
+            "threads": 32,
+            "overlap_web_search": True,
+            "concurrent_commands": 1,
+            "read_only_commands": READ_ONLY_COMMANDS
+        },
+        "task_memory": {
+            "enabled": False,
+            "top_k": 4,
+            "max_tokens": 512,
+            "max_snippets": 500,
+            "max_snippet_chars": 400,
+            "max_sessions": 32
+        },
+        "state": {
+            "busy_timeout": 5,
+            "sync_interval": 0.5,
+            "job_retention_seconds": 86400
         }
     }
 
@@ -380,8 +520,7 @@ def save_config(config):
     """
     config_path = os.path.join(WORKSPACE_DIR, 'config', 'config.json')
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        write_json_atomic(config_path, config)
         return True
     except Exception as e:
         print(f"[Config] Failed to save config.json: {e}")
@@ -425,6 +564,316 @@ def detect_language(text):
 config = load_config()
 print(f"[Config] Loaded: {config}")
 
+# Shared state across worker processes / Estado compartilhado entre processos worker
+state_config = config.get('state', {})
+state = StateStore(os.path.join(WORKSPACE_DIR, 'state', 'state.db'), state_config.get('busy_timeout', 5))
+sessions = SessionStore(sessions_dir)
+# Versions of the shared values this process has applied / Versões já aplicadas por este processo
+_applied_versions = {}
+
+def _seed_config():
+    """
+    The newer of config.json and the shared copy wins; publish the result
+    Vence o mais novo entre config.json e a cópia compartilhada; publica o resultado
+    """
+    config_path = os.path.join(WORKSPACE_DIR, 'config', 'config.json')
+    file_mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else 0.0
+    shared, version = state.get_versioned('config', 'current')
+    if shared is not None and state.updated('config', 'current') >= file_mtime:
+        _deep_update(config, shared)
+    if shared != config:
+        version = state.put('config', 'current', config)
+    _applied_versions[('config', 'current')] = version
+
+def _apply_config(shared, version):
+    """Replace the live config in place / Substitui a config em uso no lugar"""
+    for key in [k for k in config if k not in shared]:
+        config.pop(key, None)
+    config.update(shared)
+    _applied_versions[('config', 'current')] = version
+
+def _sync_config():
+    """Pick up /config changes made by other workers / Aplica mudanças de outros workers"""
+    if state.version('config', 'current') != _applied_versions.get(('config', 'current')):
+        shared, version = state.get_versioned('config', 'current')
+        if shared is not None:
+            _apply_config(shared, version)
+
+_seed_config()
+
+# Admission Control / Controle de Admissão
+admission = AdmissionController.from_config(config.get('admission'))
+
+# Tool Result Cache (opt-in) / Cache de Resultados (opcional)
+tool_cache = ToolCache.from_config(config.get('tool_cache'))
+
+# LLM Response Cache (opt-in) / Cache de Respostas do LLM (opcional)
+llm_cache = LLMCache.from_config(os.path.join(WORKSPACE_DIR, 'cache', 'llm'), config.get('llm_cache'))
+
+# Latency-aware Provider Routing (opt-in) / Roteamento por Latência (opcional)
+router = ProviderRouter.from_workspace(WORKSPACE_DIR, config)
+
+def _component_metrics():
+    """Scrape-time gauges from admission, caches and router / Gauges dos componentes"""
+    admission_stats = admission.stats()
+    tool_stats = tool_cache.stats()
+    llm_stats = llm_cache.stats()
+    router_stats = router.stats()
+    return {
+        ('hexagent_admission_active', 'Requests currently admitted'):
+            [({'endpoint': k}, v['active']) for k, v in admission_stats.items()],
+        ('hexagent_admission_queued', 'Requests waiting for admission'):
+            [({'endpoint': k}, v['queued']) for k, v in admission_stats.items()],
+        ('hexagent_admission_rejected', 'Requests rejected with 429 since start'):
+            [({'endpoint': k}, v['rejected_total']) for k, v in admission_stats.items()],
+        ('hexagent_cache_hits', 'Cache hits since start'):
+            [({'cache': 'tool'}, tool_stats['hits']), ({'cache': 'llm'}, llm_stats['hits'])],
+        ('hexagent_cache_misses', 'Cache misses since start'):
+            [({'cache': 'tool'}, tool_stats['misses']), ({'cache': 'llm'}, llm_stats['misses'])],
+        ('hexagent_provider_ttft_seconds', 'Moving average time to first token per provider'):
+            [({'provider': k}, v['ttft_seconds']) for k, v in router_stats.items() if v['ttft_seconds'] is not None],
+    }
+
+metrics.REGISTRY.register_collector(_component_metrics)
+
+# Request Tracing to ~/.hexagent-gui/log / Rastreamento de Requisições
+tracer = Tracer.from_config(os.path.join(WORKSPACE_DIR, 'log'), config.get('tracing'))
+metrics.REGISTRY.register_collector(lambda: {
+    ('hexagent_trace_spans_dropped', 'Spans dropped because the trace queue was full'): [({}, tracer.dropped)]
+})
+
+# Session Recorder for replay benchmarks / Gravador de Sessões para replay
+recorder = Recorder.from_config(os.path.join(WORKSPACE_DIR, 'log', 'recordings'), config.get('recorder'))
+
+# Byte quotas and cleanup jobs for tmp/downloads / Cotas e limpeza de tmp/downloads
+storage = StorageManager.from_config({'tmp': tmp_dir, 'downloads': downloads_dir}, config.get('storage'))
+storage.on_job = lambda job: state.put('jobs', job['id'], job)
+state.prune('jobs', state_config.get('job_retention_seconds', 86400))
+storage.start()
+atexit.register(storage.stop)
+metrics.REGISTRY.register_collector(lambda: {
+    ('hexagent_storage_bytes', 'Bytes used per workspace directory at the last scan'):
+        [({'dir': k}, v['bytes']) for k, v in storage.usage().items() if 'bytes' in v],
+    ('hexagent_storage_evicted_files', 'Files evicted by storage quotas since start'):
+        [({}, storage.evicted_files)],
+})
+
+# Oversized command outputs spill here / Saídas grandes demais vão para cá
+output_store = OutputStore(os.path.join(tmp_dir, 'outputs'))
+
+# Per-session memory of earlier tasks (opt-in) / Memória de tarefas por sessão (opcional)
+task_memory = TaskMemory.from_config(os.path.join(WORKSPACE_DIR, 'memory'), config.get('task_memory'))
+metrics.REGISTRY.register_collector(lambda: {
+    ('hexagent_memory_recalls', 'Requests that queried session task memory since start'):
+        [({}, task_memory.recalls)],
+    ('hexagent_memory_snippets_injected', 'Memory snippets injected into prompts since start'):
+        [({}, task_memory.hits)],
+})
+
+# On-demand profiler, idle unless /debug is called / Profiler sob demanda, ocioso fora do /debug
+profiler = Profiler.from_config(os.path.join(WORKSPACE_DIR, 'log', 'profiles'), config.get('profiler'))
+
+# asyncio engine for the agent loop, idle until a task uses it / Motor asyncio, ocioso até ser usado
+async_engine = AsyncEngine.from_config(config.get('async_engine'))
+atexit.register(async_engine.stop)
+metrics.REGISTRY.register_collector(lambda: {
+    ('hexagent_engine_runs', 'Tasks run by the async engine since start'): [({}, async_engine.runs)],
+    ('hexagent_engine_concurrent_commands', 'Read-only commands started ahead of their turn since start'):
+        [({}, async_engine.concurrent_commands)],
+    ('hexagent_engine_background_tasks', 'Recordings written in the background since start'):
+        [({}, async_engine.background_tasks)],
+})
+
+# The agent loop, shared by /chat and backend/batch.py / Loop do agente, compartilhado
+agent = AgentLoop(config, router, llm_cache, tool_cache, output_store, task_memory, async_engine)
+
+# Shared keep-alive session for backend -> HexStrike calls
+# Sessão keep-alive compartilhada para chamadas do backend ao HexStrike
+hexstrike_http = HexStrikeHTTP.from_config(config.get('services', {}).get('hexstrike_port', 8888),
+                                           config.get('hexstrike_client'))
+
+def _attach_hexstrike_session():
+    """Route AgentCore's HexStrike calls through the pool / Usa o pool nas chamadas do AgentCore"""
+    if core and getattr(core, 'body', None) is not None and hexstrike_http.attach(core.body):
+        print("[HexStrike] Using pooled keep-alive session")
+
+_attach_hexstrike_session()
+metrics.REGISTRY.register_collector(lambda: {
+    ('hexagent_hexstrike_http_calls', 'Backend HTTP calls to HexStrike via the pooled connections'):
+        [({'source': 'agentcore'}, hexstrike_http.agent_calls),
+         ({'source': 'health'}, hexstrike_http.calls - hexstrike_http.agent_calls)],
+    ('hexagent_hexstrike_http_errors', 'Failed backend HTTP calls to HexStrike'):
+        [({}, hexstrike_http.errors)],
+})
+
+# HexStrike process supervisor; None when hexstrike_server.py is not found
+# Supervisor do processo HexStrike; None quando hexstrike_server.py não existe
+supervisor = ProcessSupervisor.for_hexstrike(
+    [parent_dir, grandparent_dir], config.get('services', {}).get('hexstrike_port', 8888),
+    config.get('supervisor'), os.path.join(WORKSPACE_DIR, 'log'), health_check=hexstrike_http.is_healthy)
+
+# With several workers only the holder of this lock starts HexStrike
+# Com vários workers só quem tem este lock inicia o HexStrike
+hexstrike_owner = ProcessLock(os.path.join(WORKSPACE_DIR, 'state', 'hexstrike.lock'))
+
+def _start_hexstrike():
+    """
+    Start HexStrike under the supervisor, or through AgentCore as before
+    Inicia o HexStrike pelo supervisor, ou pelo AgentCore como antes
+    """
+    if not hexstrike_owner.acquire():
+        # Another worker owns it; ask it to start / Outro worker é o dono; pede para iniciar
+        if not hexstrike_http.is_healthy():
+            state.put('hexstrike', 'command', {'action': 'start', 'pid': os.getpid()})
+        return True
+    state.put('hexstrike', 'owner', {'pid': os.getpid()})
+    if supervisor is not None:
+        return supervisor.start()
+    return core._start_hexstrike_server()
+
+def _wait_hexstrike(seconds):
+    """Wait for HexStrike to come up / Aguarda o HexStrike subir"""
+    if WORKER_ROLE is not None and not hexstrike_owner.held:
+        # Supervised by another worker: poll its health / Supervisionado por outro worker
+        deadline = time.monotonic() + seconds
+        while not hexstrike_http.is_healthy() and time.monotonic() < deadline:
+            time.sleep(0.1)
+    elif supervisor is not None:
+        supervisor.wait_healthy(seconds)
+    else:
+        time.sleep(seconds)
+
+if supervisor is not None:
+    # Only the worker holding the lock supervises / Só o worker com o lock supervisiona
+    metrics.REGISTRY.register_collector(lambda: {
+        ('hexagent_hexstrike_restarts', 'HexStrike restarts by the supervisor since start'):
+            [({}, supervisor.restarts)],
+        ('hexagent_hexstrike_uptime_seconds', 'Seconds since HexStrike was last started'):
+            [({}, supervisor.stats()['uptime_seconds'])],
+    } if WORKER_ROLE is None or hexstrike_owner.held else {})
+
+def _owns_hexstrike():
+    """
+    True unless another worker supervises HexStrike; takes ownership when nobody does
+    True a menos que outro worker supervisione o HexStrike; assume quando ninguém o faz
+    """
+    return hexstrike_owner.acquire()
+
+def _hexstrike_action(action):
+    """stop/restart here if this worker owns HexStrike, else in the owner / aqui ou no dono"""
+    if _owns_hexstrike():
+        return supervisor.stop() if action == 'stop' else supervisor.restart()
+    state.put('hexstrike', 'command', {'action': action, 'pid': os.getpid()})
+
+def _apply_hexstrike_command(command):
+    """
+    Run a start/stop/restart sent by another worker, if this one owns HexStrike
+    Executa start/stop/restart enviado por outro worker, se este for o dono
+    """
+    if not command or supervisor is None or not hexstrike_owner.held:
+        return
+    action = command.get('action')
+    print(f"[Workers] HexStrike {action} requested by worker {command.get('pid')}")
+    if action == 'start':
+        supervisor.start()
+    elif action == 'stop':
+        supervisor.stop()
+    elif action == 'restart':
+        supervisor.restart()
+
+def _publish_core_status(initialized):
+    """Tell the other workers to (de)initialize their AgentCore / Avisa os outros workers"""
+    _applied_versions[('core', 'status')] = state.put('core', 'status', {'initialized': initialized, 'pid': os.getpid()})
+
+def _apply_core_status(status):
+    """Mirror /init or a brain stop from another worker / Replica /init ou parada do brain"""
+    if not core or not status:
+        return
+    if status.get('initialized') and core.brain is None:
+        api_key = resolve_api_key()
+        if api_key and core.initialize(api_key):
+            _attach_hexstrike_session()
+            print(f"[Workers] AgentCore initialized after /init on worker {status.get('pid')}")
+    elif not status.get('initialized') and core.brain is not None:
+        core.shutdown()
+
+def _sync_shared_state():
+    """Apply config, AgentCore and HexStrike changes from other workers / Aplica mudanças de outros workers"""
+    _sync_config()
+    for key, apply in ((('core', 'status'), _apply_core_status), (('hexstrike', 'command'), _apply_hexstrike_command)):
+        value, version = state.get_versioned(*key)
+        if version != _applied_versions.get(key):
+            _applied_versions[key] = version
+            try:
+                apply(value)
+            except Exception as e:
+                print(f"[Workers] Failed to apply {key[0]} change: {e}")
+
+def _state_sync_loop(interval):
+    while True:
+        try:
+            _sync_shared_state()
+        except Exception as e:
+            print(f"[Workers] State sync failed: {e}")
+        time.sleep(interval)
+
+def _start_state_sync():
+    """Background sync for worker processes / Sincronização em background dos workers"""
+    # A worker started after /init still initializes its core, but never
+    # replays a HexStrike command sent before it existed
+    # Um worker iniciado após o /init ainda inicializa seu core, mas nunca
+    # repete um comando do HexStrike enviado antes de existir
+    _applied_versions[('hexstrike', 'command')] = state.version('hexstrike', 'command')
+    threading.Thread(target=_state_sync_loop, args=(state_config.get('sync_interval', 0.5),),
+                     name='state-sync', daemon=True).start()
+
+@app.before_request
+def _start_trace():
+    g.trace = tracer.start_trace(f"{request.method} {request.path}",
+                                 trace_id=request.headers.get('X-Trace-Id'))
+    if WORKER_ROLE == 'worker':
+        _sync_config()
+
+@app.after_request
+def _trace_header(response):
+    trace = g.get('trace')
+    if trace is not None:
+        response.headers['X-Trace-Id'] = trace.trace_id
+    return response
+
+@app.teardown_request
+def _finish_trace(exc):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace.finish(error=exc)
+
+def _session_id(data=None):
+    """
+    Identify the calling session for fair queuing / Identifica a sessão para fila justa
+    Priority: X-Session-Id header > "session_id" in body > client address
+    """
+    return request.headers.get('X-Session-Id') or (data or {}).get('session_id') or request.remote_addr
+
+def _relay_stream(stream, ticket):
+    """
+    Relay a /chat stream, counting bytes and freeing the admission slot when it ends
+    Repassa um stream do /chat, contando bytes e liberando a vaga ao final
+    """
+    stream_bytes = metrics.STREAM_BYTES
+    try:
+        for piece in stream:
+            stream_bytes.inc(len(piece))
+            yield piece
+    finally:
+        admission.release(ticket)
+
+def _queue_full_response(err):
+    """HTTP 429 with Retry-After / HTTP 429 com Retry-After"""
+    response = jsonify({"error": str(err), "retry_after": err.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(err.retry_after)
+    return response
+
 @app.route('/init_status', methods=['GET'])
 def init_status():
     """
@@ -436,7 +885,8 @@ def init_status():
         hexstrike_ready = False
         if core and core.body:
             try:
-                health = core.get_hexstrike_health()
+                with metrics.HEXSTRIKE_HEALTH_SECONDS.time():
+                    health = core.get_hexstrike_health()
                 hexstrike_ready = health.get('alive', False) or health.get('status') == 'ok'
             except:
                 pass
@@ -471,8 +921,10 @@ def init_status():
 def health():
     return jsonify({"status": "ok", "agent": "HexAgentGUI"})
 
-@app.route('/init', methods=['POST'])
-def init_agent():
+def resolve_api_key():
+    """
+    API key from config, else from the HexSec env file / Chave da config ou do arquivo env
+    """
     # Load env/key similar to HexAgentApp.on_mount
     # We look for .HexSec in HexSecGPT-main or env
     
@@ -493,6 +945,11 @@ def init_agent():
                 
         load_dotenv(dotenv_path=env_path)
         api_key = os.getenv(Config.API_KEY_NAME)
+    return api_key
+
+@app.route('/init', methods=['POST'])
+def init_agent():
+    api_key = resolve_api_key()
     
     if not api_key:
         return jsonify({"success": False, "error": "API Key not found. Please configure it in Settings."}), 200
@@ -503,25 +960,28 @@ def init_agent():
 
 
         if core.initialize(api_key):
+            _attach_hexstrike_session()
+            _publish_core_status(True)
             # Auto-start HexStrike logic
             started = False
             if core.body:
                  try:
-                     health = core.body.check_health()
+                     with metrics.HEXSTRIKE_HEALTH_SECONDS.time():
+                         health = core.body.check_health()
                      if health.get('alive') or health.get('status') == 'ok':
                          started = True
                      else:
                          print("[HexAgentGUI] HexStrike not alive, forcing start...")
-                         if core._start_hexstrike_server():
-                             time.sleep(3) # Wait for startup
+                         if _start_hexstrike():
+                             _wait_hexstrike(3) # Wait for startup
                              health = core.body.check_health()
                              if health.get('alive') or health.get('status') == 'ok':
                                  started = True
                  except Exception as e:
                      print(f"[HexAgentGUI] Error accessing HexStrike body: {e}")
                      # Try blind start
-                     core._start_hexstrike_server()
-                     time.sleep(3) 
+                     _start_hexstrike()
+                     _wait_hexstrike(3)
                      started = True # Optimistic
 
             message = "Neural Link Established."
@@ -559,17 +1019,100 @@ def config_endpoint():
     elif request.method == 'POST':
         try:
             new_config = request.json
-            # Merge with existing config / Mescla com config existente
-            config.update(new_config)
+            saved = []
+
+            def merge(current):
+                # Merge with the shared config / Mescla com a config compartilhada
+                merged = dict(current if current is not None else config)
+                merged.update(new_config)
+                # Saved under the store's write lock, so config.json follows the same order
+                # Salvo sob o lock de escrita do store, então o config.json segue a mesma ordem
+                saved.append(save_config(merged))
+                return merged
+
+            merged, version = state.update('config', 'current', merge)
+            _apply_config(merged, version)
             
             # Save to file / Salva no arquivo
-            if save_config(config):
+            if saved[0]:
                 return jsonify({"success": True, "config": config})
             else:
                 return jsonify({"success": False, "error": "Failed to save config"}), 500
         except Exception as e:
             return jsonify({"success": False, "error": str(e)}), 400
 
+def resolve_language(user_input, language):
+    """Auto-detect language if set to 'auto' / Auto-detecta idioma se 'auto'"""
+    if language == 'auto':
+        language = detect_language(user_input)
+        print(f"[Chat] Auto-detected language: {language}")
+    return language
+
+def with_language(user_input, language):
+    """Prepend language instruction / Prepara instrução de idioma"""
+    if language and language != 'en':
+        language_map = {'pt': 'português', 'es': 'español', 'fr': 'français', 'de': 'deutsch'}
+        lang_name = language_map.get(language, language)
+        user_input = f"Please respond in {lang_name}. {user_input}"
+    return user_input
+
+def web_search_context(query, trace):
+    """
+    Top DuckDuckGo result titles as prompt context, '' on failure (thread-safe)
+    Títulos dos primeiros resultados do DuckDuckGo como contexto, '' em falha
+    """
+    search_started = time.perf_counter()
+    search_span = trace.detached_span('web_search')
+    search_context = ""
+    try:
+        import requests
+        from bs4 import BeautifulSoup
+        
+        # Simple DuckDuckGo HTML search
+        search_url = f"https://html.duckduckgo.com/html/?q={requests.utils.quote(query)}"
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        search_response = requests.get(search_url, headers=headers, timeout=5)
+        
+        if search_response.status_code == 200:
+            soup = BeautifulSoup(search_response.text, 'html.parser')
+            results = soup.find_all('a', class_='result__a', limit=3)
+            
+            if results:
+                search_context = "\n\n[Web Search Results]:\n"
+                for i, result in enumerate(results, 1):
+                    title = result.get_text(strip=True)
+                    search_context += f"{i}. {title}\n"
+    except Exception as e:
+        # If web search fails, continue without it
+        print(f"[Web Search] Failed: {e}")
+    metrics.WEB_SEARCH_SECONDS.observe(time.perf_counter() - search_started)
+    search_span.end()
+    return search_context
+
+def prepare_task(user_input, language, web_search_enabled, trace, memory_session=None):
+    """
+    Add the language instruction, web search context and session memory to a task
+    Adiciona a instrução de idioma, o contexto de busca web e a memória da sessão a uma tarefa
+    memory_session: session whose earlier tasks are recalled, None = no memory
+    """
+    query = user_input
+    user_input = with_language(user_input, resolve_language(user_input, language))
+    
+    # Add web search context if enabled
+    if web_search_enabled:
+        search_context = web_search_context(user_input, trace)
+        if search_context:
+            user_input = search_context + "\n" + user_input
+
+    # Relevant snippets of earlier tasks in this session / Trechos relevantes de tarefas anteriores
+    if memory_session is not None:
+        with trace.span('memory_recall') as recall_span:
+            context, hits = task_memory.recall(memory_session, query)
+            recall_span.set(snippets=len(hits), chars=len(context))
+        if context:
+            user_input = context + "\n" + user_input
+    return user_input
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """
@@ -582,165 +1125,138 @@ def chat():
     user_input = data.get('message', '')
     language = data.get('language', config['ai'].get('language', 'auto'))
     web_search_enabled = data.get('web_search', config['ai'].get('web_search_enabled', False))
-    auto_execute = data.get('auto_execute', True) # Default to True if not specified
+    options = agent.options(data)
     
     if not user_input:
         return jsonify({"error": "Empty message"}), 400
 
-    # Auto-detect language if set to 'auto' / Auto-detecta idioma se 'auto'
-    if language == 'auto':
-        language = detect_language(user_input)
-        print(f"[Chat] Auto-detected language: {language}")
-
-    # Prepend language instruction / Prepara instrução de idioma
-    if language and language != 'en':
-        language_map = {'pt': 'português', 'es': 'español', 'fr': 'français', 'de': 'deutsch'}
-        lang_name = language_map.get(language, language)
-        user_input = f"Please respond in {lang_name}. {user_input}"
-    
-    # Add web search context if enabled
-    if web_search_enabled:
-        try:
-            import requests
-            from bs4 import BeautifulSoup
-            
-            # Simple DuckDuckGo HTML search
-            search_url = f"https://html.duckduckgo.com/html/?q={requests.utils.quote(user_input)}"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            search_response = requests.get(search_url, headers=headers, timeout=5)
-            
-            if search_response.status_code == 200:
-                soup = BeautifulSoup(search_response.text, 'html.parser')
-                results = soup.find_all('a', class_='result__a', limit=3)
-                
-                if results:
-                    search_context = "\n\n[Web Search Results]:\n"
-                    for i, result in enumerate(results, 1):
-                        title = result.get_text(strip=True)
-                        search_context += f"{i}. {title}\n"
-                    
-                    user_input = search_context + "\n" + user_input
-        except Exception as e:
-            # If web search fails, continue without it
-            print(f"[Web Search] Failed: {e}")
+    session_id = _session_id(data)
+    search = None
+    if web_search_enabled and options['engine'] == 'async':
+        # Searched now, overlapping the admission wait and the first LLM request
+        # Busca já, em paralelo à espera na fila e à primeira requisição ao LLM
+        language = resolve_language(user_input, language)
+        search = async_engine.submit(web_search_context, with_language(user_input, language), g.trace)
+        web_search_enabled = False
+    user_input = prepare_task(user_input, language, web_search_enabled, g.trace,
+                              session_id if options['use_memory'] else None)
+
+    # Admission: reserve a slot or a place in the queue / Reserva vaga ou lugar na fila
+    try:
+        ticket = admission.enqueue('chat', session_id)
+    except QueueFull as e:
+        return _queue_full_response(e)
+    queue_timeout = config.get('admission', {}).get('queue_timeout', 300)
+    metrics.CHAT_REQUESTS.inc()
+    # The stream outlives the request context / O stream sobrevive ao contexto da requisição
+    trace = g.trace
+    recording = recorder.start(data, user_input, trace.trace_id, data.get('record'))
+    memory = task_memory.start(session_id, data.get('message', ''), options['use_memory'])
+    # Visible to every worker in GET /chats / Visível a todos os workers em GET /chats
+    chat_info = {'pid': os.getpid(), 'session': session_id,
+                 'message': data.get('message', '')[:200], 'started': time.time()}
+    state.put('chats', trace.trace_id, chat_info)
 
     def generate():
-        import re
-        
-        # Autonomous Agentic Loop with iterative feedback / Loop autônomo com feedback iterativo
-        # Allow request override or config default
-        req_limit = data.get('max_iterations')
-        max_limit = req_limit if req_limit is not None else config['ai'].get('max_iterations', 10)
-        unlimited = config['ai'].get('unlimited_iterations', False)
-        
-        # If unlimited, set a safe high limit or just use logic
-        actual_limit = 1000 if unlimited else max_limit
-        
-        iteration = 0
-        conversation_history = user_input
-        
-        while iteration < actual_limit:
-            iteration += 1
-            
-            # Yield iteration marker
-            if iteration > 1:
-                display_limit = "∞" if unlimited else max_limit
-                yield json.dumps({"chunk": f"\n\n{'='*60}\n🔄 Iteração {iteration}/{display_limit}\n{'='*60}\n\n"}) + "\n"
-            
-            # Step 1: Get AI response for current state
-            full_response = ""
-            for chunk in core.chat_step(conversation_history):
-                full_response += chunk
-                yield json.dumps({"chunk": chunk}) + "\n"
-            
-            # Step 2: Parse bash code blocks from the response
-            code_blocks = re.findall(r'```(?:bash)?\n(.*?)\n```', full_response, re.DOTALL)
-            
-            # If no commands found, AI decided task is complete or gave final answer
-            if not code_blocks:
-                # Check if AI explicitly says task is complete
-                if any(phrase in full_response.lower() for phrase in ['tarefa concluída', 'completed', 'finalizado', 'pronto', 'done']):
-                    yield json.dumps({"chunk": "\n✅ Tarefa completada pelo agente!\n"}) + "\n"
-                break
-            
-            # CHECK AUTO-EXECUTE: If False, yield proposal and stop
-            if not auto_execute:
-                 for cmd_block in code_blocks:
-                     # Send proposal to frontend
-                     yield json.dumps({"proposal": cmd_block}) + "\n"
-                 # Stop the loop here, waiting for user action on frontend
-                 break
-
-            # Step 3: Execute commands and collect results
-            execution_summary = ""
-            
-            if core.body:
-                yield json.dumps({"chunk": "\n\n"}) + "\n"
-                for cmd_block in code_blocks:
-                    commands = [line.strip() for line in cmd_block.split('\n') 
-                               if line.strip() and not line.strip().startswith('#')]
-                    
-                    for cmd in commands:
-                        yield json.dumps({"chunk": f"🔧 Executando: {cmd}\n"}) + "\n"
-                        result = core.execute_tool(cmd)
-                        yield json.dumps({"chunk": f"{result}\n\n"}) + "\n"
-                        
-                        # Add to execution summary for AI feedback
-                        execution_summary += f"\nComando: {cmd}\nResultado: {result}\n"
-            else:
-                yield json.dumps({"chunk": "\n⚠️ HexStrike offline - comandos não executados\n"}) + "\n"
-                break
-            
-            # Step 4: Prepare feedback for next iteration
-            # Ask AI to analyze results and decide next step
-            conversation_history = f"""{user_input}
-
-[Histórico de Execução - Iteração {iteration}]:
-{execution_summary}
-
-Analise os resultados acima. Se a tarefa original ainda não está completa, sugira o PRÓXIMO comando necessário. Se a tarefa está completa, responda 'Tarefa concluída' e resuma o que foi feito."""
+        # Wait for admission, streaming queue position / Aguarda admissão informando posição
+        if not ticket.admitted:
+            yield json.dumps({"queue_position": admission.position(ticket)}) + "\n"
+            while not admission.wait(ticket, timeout=1.0):
+                if time.monotonic() - ticket.enqueued_at > queue_timeout:
+                    yield json.dumps({"chunk": "\n⚠️ Fila de execução cheia, tente novamente.\n", "queue_timeout": True}) + "\n"
+                    return
+                yield json.dumps({"queue_position": admission.position(ticket)}) + "\n"
+            yield json.dumps({"queue_position": 0, "admitted": True}) + "\n"
         
-        # Loop ended
-        if iteration >= actual_limit:
-            yield json.dumps({"chunk": f"\n⚠️ Limite de {actual_limit} iterações atingido.\n"}) + "\n"
-            yield json.dumps({"limit_reached": True, "iterations": actual_limit}) + "\n"
+        run = agent.run(core, user_input, options, trace, recording, memory, search)
+        # Kept in a local so GET /debug/stacks can follow it / Local para o /debug/stacks seguir
+        events = run.events()
+        for event in events:
+            yield json.dumps(event) + "\n"
     
-    return Response(generate(), mimetype='application/json')
+    stream = _relay_stream(generate(), ticket)
+    profiler.track(trace.trace_id, stream, chat_info)
+    response = Response(stream, mimetype='application/json')
+    # Runs even if the client disconnects before streaming starts
+    # Executa mesmo se o cliente desconectar antes do streaming
+    response.call_on_close(lambda: admission.release(ticket))
+    # Synchronous: the next task of this session recalls these snippets
+    # Síncrono: a próxima tarefa desta sessão busca estes trechos
+    response.call_on_close(memory.close)
+    if options['engine'] == 'async':
+        # The recording is only read offline / A gravação só é lida offline
+        response.call_on_close(lambda: async_engine.background(recording.close))
+        if search is not None:
+            response.call_on_close(search.cancel)
+    else:
+        response.call_on_close(recording.close)
+    response.call_on_close(lambda: state.delete('chats', trace.trace_id))
+    response.call_on_close(lambda: profiler.untrack(trace.trace_id))
+    return response
+
+@app.route('/memory', methods=['GET', 'DELETE'])
+def memory_endpoint():
+    """
+    Session task memory stats, or forget it / Estatísticas da memória da sessão, ou apagá-la
+    Session: X-Session-Id header or ?session_id= (default: client address)
+    """
+    session_id = request.args.get('session_id') or _session_id()
+    if request.method == 'DELETE':
+        return jsonify({"success": True, "deleted": task_memory.forget(session_id)})
+    query = request.args.get('q')
+    if query:
+        context, hits = task_memory.recall(session_id, query)
+        return jsonify({"hits": hits, "context_chars": len(context)})
+    return jsonify(task_memory.stats(session_id))
+
+@app.route('/chats', methods=['GET'])
+def chats_in_flight():
+    """
+    /chat streams running in any worker / Streams do /chat em andamento em qualquer worker
+    """
+    running = {}
+    for trace_id, chat in state.items('chats').items():
+        try:
+            os.kill(chat['pid'], 0)
+        except ProcessLookupError:
+            # Worker died mid-stream / Worker morreu durante o stream
+            state.delete('chats', trace_id)
+            continue
+        except PermissionError:
+            pass
+        running[trace_id] = dict(chat, seconds=round(time.time() - chat['started'], 3))
+    return jsonify({"count": len(running), "chats": running})
 
 @app.route('/cleanup', methods=['POST'])
 def cleanup_files():
     """
-    Delete temporary files and downloads.
+    Delete temporary files and downloads in a background job.
+    Apaga arquivos temporários e downloads em um job em background.
     Expected payload: {"target": "tmp" | "downloads" | "all"}
+    Returns 202 with a job; poll GET /cleanup/<job_id> for progress.
     """
     data = request.json or {}
     target = data.get('target', 'all')
-    deleted_count = 0
-    
-    dirs_to_clean = []
-    if target in ['tmp', 'all']:
-        dirs_to_clean.append(tmp_dir)
-    if target in ['downloads', 'all']:
-        dirs_to_clean.append(downloads_dir)
-        
-    try:
-        for d in dirs_to_clean:
-            if os.path.exists(d):
-                for filename in os.listdir(d):
-                    file_path = os.path.join(d, filename)
-                    try:
-                        if os.path.isfile(file_path) or os.path.islink(file_path):
-                            os.unlink(file_path)
-                            deleted_count += 1
-                        elif os.path.isdir(file_path):
-                            import shutil
-                            shutil.rmtree(file_path)
-                            deleted_count += 1
-                    except Exception as e:
-                        print(f"Failed to delete {file_path}. Reason: {e}")
-        return jsonify({"success": True, "message": f"Cleaned {deleted_count} items."})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    targets = ['tmp', 'downloads'] if target == 'all' else [target]
+    if not all(t in ('tmp', 'downloads') for t in targets):
+        return jsonify({"success": False, "error": f"Unknown target: {target}"}), 400
+    job = storage.start_cleanup(targets)
+    return jsonify({"success": True, "message": "Cleanup started.", "job": job}), 202
+
+@app.route('/cleanup/<job_id>', methods=['GET'])
+def cleanup_progress(job_id):
+    """Progress of a cleanup job / Progresso de um job de limpeza"""
+    # Jobs started by another worker are read from the shared state
+    # Jobs iniciados por outro worker são lidos do estado compartilhado
+    job = storage.job(job_id) or state.get('jobs', job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job})
+
+@app.route('/storage', methods=['GET'])
+def storage_status():
+    """Usage and quotas per directory / Uso e cotas por diretório"""
+    return jsonify(storage.usage(refresh=request.args.get('refresh') == '1'))
 
 @app.route('/save_session', methods=['POST'])
 def save_session_endpoint():
@@ -756,10 +1272,8 @@ def save_session_endpoint():
         return jsonify({"error": "Missing name or blocks"}), 400
         
     try:
-        filename = f"{name}.json"
-        filepath = os.path.join(sessions_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump({"blocks": blocks, "timestamp": time.time()}, f, ensure_ascii=False, indent=2)
+        with metrics.SESSION_IO_SECONDS.time('save'), g.trace.span('session_save', session=name):
+            filepath = sessions.save(name, {"blocks": blocks, "timestamp": time.time()})
         return jsonify({"success": True, "file": filepath})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -771,15 +1285,13 @@ def load_session_endpoint():
     Params: name=autosave
     """
     name = request.args.get('name', 'autosave')
-    filepath = os.path.join(sessions_dir, f"{name}.json")
-    
-    if not os.path.exists(filepath):
-        return jsonify({"success": False, "message": "Session not found", "blocks": []})
         
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return jsonify({"success": True, "blocks": data.get('blocks', [])})
+        with metrics.SESSION_IO_SECONDS.time('load'), g.trace.span('session_load', session=name):
+            data = sessions.load(name)
+        if data is None:
+            return jsonify({"success": False, "message": "Session not found", "blocks": []})
+        return jsonify({"success": True, "blocks": data.get('blocks', [])})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -875,7 +1387,11 @@ def shutdown_server():
 def execute_command():
     """
     Execute a tool/command.
-    Expects: { "command": "ls -la" }
+    Expects: { "command": "ls -la", "ansi_spans": false, "windowed": false }
+    With ansi_spans, "result" is plain text and "spans" holds its styles (ansi_spans.py)
+    With windowed, a result over memory.max_result_chars is stored and replaced by a
+    preview plus "output_id" for GET /outputs/<id>; otherwise it is returned whole
+    Com windowed, um resultado grande é armazenado e trocado por uma prévia mais "output_id"
     """
     data = request.json
     cmd = data.get('command')
@@ -884,9 +1400,175 @@ def execute_command():
         
     if not core:
         return jsonify({"error": f"Agent Core not loaded: {init_error}"}), 400
-        
-    result = core.execute_tool(cmd)
-    return jsonify({"result": result})
+    
+    try:
+        ticket = admission.enqueue('execute', _session_id(data))
+    except QueueFull as e:
+        return _queue_full_response(e)
+    
+    try:
+        queue_timeout = config.get('admission', {}).get('queue_timeout', 300)
+        if not admission.wait(ticket, timeout=queue_timeout):
+            return _queue_full_response(QueueFull("Execution queue timed out / Tempo de fila esgotado", retry_after=5))
+        with metrics.EXECUTE_TOOL_SECONDS.time('execute_endpoint'), g.trace.span('execute_tool', command=cmd):
+            result = core.execute_tool(cmd)
+    finally:
+        admission.release(ticket)
+    # Large outputs are stored for clients that read GET /outputs/<id> / Saídas grandes ficam em arquivo
+    max_result_chars = config.get('memory', {}).get('max_result_chars', 65536)
+    response = {"result": result}
+    if data.get('windowed', False) and result and len(result) > max_result_chars:
+        try:
+            output_id = output_store.save(result)
+        except OSError as e:
+            print(f"[Execute] Failed to store output: {e}")
+        else:
+            response = {"result": preview(result, max_result_chars, output_id), "output_id": output_id,
+                        "chars": len(result)}
+    if data.get('ansi_spans', config.get('ui', {}).get('ansi_spans', False)) and '\x1b' in (response['result'] or ''):
+        with metrics.ANSI_SPANS_SECONDS.time():
+            response['result'], response['spans'] = to_spans(response['result'])
+    return jsonify(response)
+
+@app.route('/outputs/<output_id>', methods=['GET'])
+def output_window(output_id):
+    """
+    A window of a stored command output, read through mmap
+    Uma janela de uma saída armazenada, lida via mmap
+    Query:
+        ?offset=0&length=65536      byte range / faixa de bytes
+        ?line=0&lines=200           0-based line range / faixa de linhas (base 0)
+        ?grep=regex[&fixed=1&ignore_case=1&offset=0&max_matches=100]
+                                    matching lines from offset on, with line numbers
+                                    linhas que casam a partir de offset, com números
+        &styled=1                   ANSI stripped, with spans; offsets and lines refer to
+                                    the plain text, converted once and cached
+                                    ANSI removido, com spans; convertido uma vez e em cache
+    """
+    args = request.args
+    try:
+        with output_store.reader(output_id, styled=args.get('styled') == '1') as reader:
+            if 'grep' in args:
+                window = reader.grep(args['grep'], ignore_case=args.get('ignore_case') == '1',
+                                     fixed=args.get('fixed') == '1', offset=int(args.get('offset', 0)),
+                                     max_matches=int(args.get('max_matches', 100)))
+            elif 'line' in args or 'lines' in args:
+                window = reader.lines_range(int(args.get('line', 0)), int(args.get('lines', 200)))
+            else:
+                window = reader.bytes_range(int(args.get('offset', 0)), int(args.get('length', 65536)))
+            window.update(id=output_id, size=reader.size)
+    except FileNotFoundError:
+        return jsonify({"error": "Output not found"}), 404
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(window)
+
+@app.route('/tool_cache', methods=['GET', 'DELETE'])
+def tool_cache_endpoint():
+    """
+    Tool cache counters (GET) or clear it (DELETE)
+    Contadores do cache de ferramentas (GET) ou limpeza (DELETE)
+    """
+    if request.method == 'DELETE':
+        tool_cache.clear()
+    return jsonify(tool_cache.stats())
+
+@app.route('/llm_cache', methods=['GET', 'DELETE'])
+def llm_cache_endpoint():
+    """
+    LLM cache counters (GET) or delete all recordings (DELETE)
+    Contadores do cache do LLM (GET) ou apagar gravações (DELETE)
+    """
+    if request.method == 'DELETE':
+        llm_cache.clear()
+    return jsonify(llm_cache.stats())
+
+@app.route('/providers', methods=['GET'])
+def providers_status():
+    """Provider latency and circuit state / Latência e circuito dos provedores"""
+    return jsonify({"enabled": router.enabled, "ranking": [p.name for p in router.ranked()],
+                    "providers": router.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition / Exposição em texto do Prometheus"""
+    return Response(metrics.REGISTRY.expose(), mimetype='text/plain; version=0.0.4')
+
+def _debug_denied():
+    """
+    None if /debug is allowed: profiler enabled and a local client
+    None se o /debug é permitido: profiler ativado e cliente local
+    """
+    if not config.get('profiler', {}).get('enabled', False):
+        return jsonify({"error": "Profiler disabled (profiler.enabled) / Profiler desativado"}), 404
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({"error": "Localhost only / Apenas localhost"}), 403
+    return None
+
+@app.route('/debug/profile', methods=['POST'])
+def debug_profile():
+    """
+    Sampling profile of all threads of this worker, saved to ~/.hexagent-gui/log/profiles
+    Perfil por amostragem de todas as threads deste worker
+    Expects: { "seconds": 10, "interval": 0.005, "idle": true, "format": "json" | "collapsed" }
+    """
+    denied = _debug_denied()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    try:
+        result = profiler.sample(data.get('seconds', 10), data.get('interval'), data.get('idle', True))
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    print(f"[Profiler] {result['samples']} samples in {result['seconds']}s -> {result['file']}")
+    if data.get('format') == 'collapsed':
+        return Response(result['collapsed'], mimetype='text/plain')
+    result.pop('collapsed')
+    return jsonify(result)
+
+@app.route('/debug/memory', methods=['GET', 'POST'])
+def debug_memory():
+    """
+    tracemalloc: start a baseline, diff against it, or stop / base, diferença ou parar
+    Expects: { "action": "start" | "snapshot" | "stop", "top": 25, "key": "lineno", "frames": 10 }
+    """
+    denied = _debug_denied()
+    if denied:
+        return denied
+    if request.method == 'GET':
+        return jsonify(profiler.memory_status())
+    data = request.get_json(silent=True) or {}
+    action = data.get('action', 'snapshot')
+    try:
+        if action == 'start':
+            return jsonify(profiler.memory_start(data.get('frames', 10)))
+        if action == 'snapshot':
+            return jsonify(profiler.memory_snapshot(data.get('top'), data.get('key', 'lineno')))
+        if action == 'stop':
+            return jsonify(profiler.memory_stop())
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"error": f"Unknown action: {action}"}), 400
+
+@app.route('/debug/stacks', methods=['GET'])
+def debug_stacks():
+    """
+    Live stacks of in-flight /chat streams of this worker (?threads=1 adds every thread)
+    Pilhas ao vivo dos streams /chat deste worker (?threads=1 inclui todas as threads)
+    """
+    denied = _debug_denied()
+    if denied:
+        return denied
+    return jsonify(profiler.stacks(request.args.get('threads') == '1'))
+
+@app.route('/admission', methods=['GET'])
+def admission_status():
+    """Concurrency and queue counters / Contadores de concorrência e fila"""
+    return jsonify(admission.stats())
 
 @app.route('/status', methods=['GET'])
 def status():
@@ -904,20 +1586,21 @@ def status():
 @app.route('/start_service', methods=['POST'])
 def start_service():
     if not core: return jsonify({"success": False, "error": "Core not loaded"}), 400
-    if core._start_hexstrike_server():
+    if _start_hexstrike():
         return jsonify({"success": True, "message": "Service starting..."})
     return jsonify({"success": False, "error": "Failed to start service"}), 500
 
 @app.route('/stop_service', methods=['POST'])
 def stop_service():
     if core: core.shutdown()
+    if supervisor is not None: _hexstrike_action('stop')
     return jsonify({"success": True, "message": "Service stopped"})
 
 @app.route('/service', methods=['POST'])
 def service_control():
     """
     Control services (hexstrike, brain) / Controlar serviços
-    { "service": "hexstrike", "action": "start"|"stop" }
+    { "service": "hexstrike", "action": "start"|"stop"|"restart"|"status" }
     """
     data = request.json
     service = data.get('service')
@@ -925,18 +1608,34 @@ def service_control():
     
     if service == 'hexstrike':
         try:
+            if action in ('stop', 'restart', 'status') and supervisor is not None and not _owns_hexstrike():
+                # Supervised by another worker / Supervisionado por outro worker
+                if action == 'status':
+                    return jsonify({"success": True, "supervised": True, "owner": state.get('hexstrike', 'owner'),
+                                    "alive": hexstrike_http.is_healthy()})
+                _hexstrike_action(action)
+                return jsonify({"success": True, "message": f"HexStrike {action} sent to its worker"})
             if action == 'start':
                 # Force start check
-                if core._start_hexstrike_server():
+                if _start_hexstrike():
                     return jsonify({"success": True, "message": "HexStrike starting..."})
                 else:
                     return jsonify({"success": False, "message": "Failed to trigger start"}), 500
             elif action == 'stop':
-                # Try to kill port 8888 or use internal method if available
-                # AgentCore might not have public stop method for body only.
-                # using fuser/kill for linux
-                subprocess.run("fuser -k 8888/tcp", shell=True)
+                if supervisor is not None:
+                    result = supervisor.stop()
+                    return jsonify({"success": result['stopped'], "message": "HexStrike stopped", **result})
+                # Not started by us: free the configured port / Não iniciado por nós: libera a porta
+                port = config.get('services', {}).get('hexstrike_port', 8888)
+                subprocess.run(['fuser', '-k', f"{port}/tcp"], stderr=subprocess.DEVNULL)
                 return jsonify({"success": True, "message": "HexStrike stopped"})
+            elif action == 'restart' and supervisor is not None:
+                return jsonify({"success": supervisor.restart(), "message": "HexStrike restarting...",
+                                **supervisor.stats()})
+            elif action == 'status':
+                if supervisor is None:
+                    return jsonify({"success": True, "supervised": False})
+                return jsonify({"success": True, "supervised": True, **supervisor.stats()})
         except Exception as e:
             return jsonify({"success": False, "message": str(e)}), 500
             
@@ -944,6 +1643,7 @@ def service_control():
         try:
             if action == 'stop':
                 core.shutdown() # This might kill everything? NO, core.shutdown usually clears brain/body.
+                _publish_core_status(False)
                 return jsonify({"success": True, "message": "Brain disconnected"})
             elif action == 'start':
                 # We need API key. Core might have it cached?
@@ -965,40 +1665,31 @@ def session_control():
     action = data.get('action')
     name = data.get('name', 'default')
     
-    sessions_dir = os.path.join(WORKSPACE_DIR, 'sessions')
-    if not os.path.exists(sessions_dir):
-        os.makedirs(sessions_dir)
-        
-    safe_name = "".join([c for c in name if c.isalnum() or c in ('-','_')])
-    file_path = os.path.join(sessions_dir, f"{safe_name}.json")
+    safe_name = SessionStore.safe_name(name)
     
     try:
         if action == 'save':
             session_data = data.get('data', [])
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, indent=2, ensure_ascii=False)
+            # Locked atomic write: concurrent saves from other workers never interleave
+            # Escrita atômica com lock: saves concorrentes de outros workers não se misturam
+            with metrics.SESSION_IO_SECONDS.time('save'), g.trace.span('session_save', session=safe_name):
+                sessions.save(safe_name, session_data)
             return jsonify({"success": True, "message": f"Session '{safe_name}' saved"})
             
         elif action == 'load':
-            if not os.path.exists(file_path):
+            with metrics.SESSION_IO_SECONDS.time('load'), g.trace.span('session_load', session=safe_name):
+                content = sessions.load(safe_name)
+            if content is None:
                  return jsonify({"success": False, "message": "Session not found"}), 404
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
             return jsonify({"success": True, "data": content})
             
         elif action == 'delete':
-             if os.path.exists(file_path):
-                 os.remove(file_path)
+             if sessions.delete(safe_name):
                  return jsonify({"success": True, "message": f"Session '{safe_name}' deleted"})
              return jsonify({"success": False, "message": "Session not found"}), 404
 
         elif action == 'list':
-             # List files
-             try:
-                 files = [f.replace('.json', '') for f in os.listdir(sessions_dir) if f.endswith('.json')]
-                 return jsonify({"success": True, "sessions": sorted(files)})
-             except Exception:
-                 return jsonify({"success": True, "sessions": []})
+             return jsonify({"success": True, "sessions": sessions.list()})
                  
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -1007,16 +1698,24 @@ def session_control():
 
 @app.route('/files/temp', methods=['GET'])
 def list_temp_files():
-    """List files in the temp directory / Listar arquivos no diretório temporário"""
+    """
+    List files in the temp directory / Listar arquivos no diretório temporário
+    Query: ?offset=0&limit=100; "count" is the total, "files" one page with sizes and mtimes
+    """
     tmp_files_dir = os.path.join(WORKSPACE_DIR, 'tmp', 'files')
-    files = []
-    if os.path.exists(tmp_files_dir):
-        try:
-            files = [f for f in os.listdir(tmp_files_dir) if os.path.isfile(os.path.join(tmp_files_dir, f))]
-        except Exception as e:
-            print(f"Error listing temp files: {e}")
-            
-    return jsonify({"files": files, "count": len(files), "path": tmp_files_dir})
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(1000, max(1, int(request.args.get('limit', 100))))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    files, count, total_bytes = [], 0, 0
+    try:
+        files, count, total_bytes = list_entries(tmp_files_dir, offset, limit)
+    except Exception as e:
+        print(f"Error listing temp files: {e}")
+    next_offset = offset + len(files) if offset + len(files) < count else None
+    return jsonify({"files": files, "count": count, "total_bytes": total_bytes, "offset": offset,
+                    "limit": limit, "next_offset": next_offset, "path": tmp_files_dir})
 
 if __name__ == '__main__':
     # Check for setup-only mode
@@ -1024,5 +1723,25 @@ if __name__ == '__main__':
         print("[Setup] Configuration initialized. Exiting setup mode.")
         sys.exit(0)
         
-    # Run slightly different port to avoid conflict
-    app.run(host='127.0.0.1', port=5000, debug=True, use_reloader=False)
+    import argparse
+    parser = argparse.ArgumentParser(description="HexAgentGUI backend")
+    parser.add_argument('--workers', type=int, default=config.get('services', {}).get('workers', 1),
+                        help='worker processes sharing the port / processos worker na mesma porta')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args()
+
+    if args.worker_fd is not None:
+        # One of N workers on the launcher's socket / Um de N workers no socket do launcher
+        WORKER_ROLE = 'worker'
+        _start_state_sync()
+        workers.run_worker(app, args.worker_fd)
+    elif args.workers > 1:
+        # Launcher only: the workers own HexStrike and the background jobs
+        # Só o launcher: os workers cuidam do HexStrike e dos jobs em background
+        WORKER_ROLE = 'launcher'
+        storage.stop()
+        workers.serve(os.path.abspath(__file__), '127.0.0.1', args.port, args.workers)
+    else:
+        # Run slightly different port to avoid conflict
+        app.run(host='127.0.0.1', port=args.port, debug=True, use_reloader=False)
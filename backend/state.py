@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Shared State / Estado Compartilhado
+==================================================
+
+State that must agree across backend worker processes lives outside the
+Python process: a SQLite database in WAL mode (~/.hexagent-gui/state) holds
+versioned JSON values (shared config, core initialization, cleanup jobs,
+in-flight chats), and session files are written under an exclusive file
+lock with an atomic rename, so readers never see a half-written session.
+
+Estado que precisa ser igual entre processos worker do backend fica fora do
+processo Python: um banco SQLite em modo WAL (~/.hexagent-gui/state) guarda
+valores JSON versionados (config compartilhada, inicialização do core, jobs
+de limpeza, chats em andamento), e arquivos de sessão são gravados sob lock
+exclusivo de arquivo com rename atômico, sem leitores vendo sessões pela
+metade.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+SESSION_NAME_CHARS = ('-', '_')
+
+
+@contextlib.contextmanager
+def file_lock(path, shared=False, blocking=True):
+    """
+    flock() on path (created if missing); yields True when the lock is held
+    flock() no caminho (criado se faltar); retorna True quando o lock é obtido
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path, data, indent=2):
+    """
+    Write JSON to a temp file, fsync and rename it over path
+    Grava JSON em arquivo temporário, fsync e renomeia sobre o caminho
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+class ProcessLock:
+    """
+    Non-blocking flock held by this process until release() or exit
+    flock não bloqueante mantido por este processo até release() ou sair
+
+    Used to elect one worker as the owner of a singleton, e.g. HexStrike
+    Usado para eleger um worker como dono de um recurso único, ex. HexStrike
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self):
+        return self._fd is not None
+
+    def acquire(self):
+        """True if this process holds the lock / True se este processo tem o lock"""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._fd = fd
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+
+
+class StateStore:
+    """
+    Versioned JSON key/value store on SQLite (WAL), safe across processes
+    Armazenamento chave/valor JSON versionado em SQLite (WAL), seguro entre processos
+
+    Args:
+        path: Database file / Arquivo do banco
+        busy_timeout: Seconds to wait for a writer lock / Segundos de espera pelo lock de escrita
+    """
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS kv (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                updated REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+
+    def _conn(self):
+        """One connection per thread / Uma conexão por thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic
+        # BEGIN IMMEDIATE pega o lock de escrita antes, tornando leitura+escrita atômicas
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace, key, default=None):
+        value, _ = self.get_versioned(namespace, key)
+        return default if value is None else value
+
+    def get_versioned(self, namespace, key):
+        """(value, version); (None, 0) when missing / (None, 0) quando ausente"""
+        row = self._conn().execute("SELECT value, version FROM kv WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, 0)
+
+    def version(self, namespace, key):
+        row = self._conn().execute("SELECT version FROM kv WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+        return row[0] if row else 0
+
+    def updated(self, namespace, key):
+        row = self._conn().execute("SELECT updated FROM kv WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+        return row[0] if row else 0.0
+
+    def put(self, namespace, key, value):
+        """Store value; returns the new version / Grava o valor; retorna a nova versão"""
+        with self._write() as conn:
+            return self._put(conn, namespace, key, value)
+
+    @staticmethod
+    def _put(conn, namespace, key, value):
+        conn.execute("""
+            INSERT INTO kv (namespace, key, value, version, updated) VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT (namespace, key) DO UPDATE
+                SET value = excluded.value, version = kv.version + 1, updated = excluded.updated
+        """, (namespace, key, json.dumps(value, ensure_ascii=False), time.time()))
+        return conn.execute("SELECT version FROM kv WHERE namespace = ? AND key = ?",
+                            (namespace, key)).fetchone()[0]
+
+    def update(self, namespace, key, fn):
+        """
+        Atomically replace value with fn(current_value_or_None); returns (value, version)
+        Substitui atomicamente o valor por fn(valor_atual_ou_None); retorna (valor, versão)
+        """
+        with self._write() as conn:
+            row = conn.execute("SELECT value FROM kv WHERE namespace = ? AND key = ?",
+                               (namespace, key)).fetchone()
+            value = fn(json.loads(row[0]) if row else None)
+            return value, self._put(conn, namespace, key, value)
+
+    def delete(self, namespace, key):
+        with self._write() as conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def items(self, namespace):
+        """{key: value} of a namespace / {chave: valor} de um namespace"""
+        rows = self._conn().execute("SELECT key, value FROM kv WHERE namespace = ? ORDER BY key",
+                                    (namespace,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def prune(self, namespace, older_than):
+        """Delete entries not updated for older_than seconds / Apaga entradas antigas"""
+        with self._write() as conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND updated < ?",
+                         (namespace, time.time() - older_than))
+
+
+class SessionStore:
+    """
+    Session JSON files with locked, atomic writes / Arquivos de sessão com escrita travada e atômica
+
+    Writers take an exclusive flock on .<name>.lock, write a temp file, fsync
+    and rename it over the session; readers open the current file directly.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def safe_name(name):
+        return "".join(c for c in name if c.isalnum() or c in SESSION_NAME_CHARS)
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def save(self, name, data, indent=2):
+        """Write a session; returns its path / Grava uma sessão; retorna o caminho"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        with file_lock(os.path.join(self.directory, f".{name}.lock")):
+            write_json_atomic(path, data, indent)
+        return path
+
+    def load(self, name):
+        """Session data, or None if it does not exist / Dados da sessão ou None"""
+        try:
+            with open(self.path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name):
+        with file_lock(os.path.join(self.directory, f".{name}.lock")):
+            try:
+                os.remove(self.path(name))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def list(self):
+        try:
+            with os.scandir(self.directory) as it:
+                return sorted(e.name[:-5] for e in it
+                              if e.name.endswith('.json') and not e.name.startswith('.'))
+        except FileNotFoundError:
+            return []
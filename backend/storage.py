@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Workspace Storage Manager / Gerenciador de Armazenamento
+=======================================================================
+
+Keeps ~/.hexagent-gui/tmp and ~/.hexagent-gui/downloads under per-directory
+byte quotas. A background thread walks each directory with os.scandir
+(one stat per entry, reused for size and access time) and deletes the least
+recently used files until the directory fits its quota again. Manual cleanups
+run as background jobs whose progress can be polled, so no request thread
+blocks on deletion.
+
+Mantém ~/.hexagent-gui/tmp e ~/.hexagent-gui/downloads dentro de cotas em
+bytes por diretório. Uma thread em background percorre cada diretório com
+os.scandir (um stat por entrada, reaproveitado para tamanho e acesso) e apaga
+os arquivos usados há mais tempo até o diretório caber na cota. Limpezas
+manuais rodam como jobs em background com progresso consultável, sem
+bloquear a thread da requisição.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+
+
+def scan_files(directory):
+    """
+    All files under directory -> [(last_used, size, path)], last_used = max(atime, mtime)
+    Todos os arquivos sob directory -> [(último_uso, tamanho, caminho)]
+
+    mtime is included because relatime/noatime mounts rarely update atime
+    mtime entra porque montagens relatime/noatime raramente atualizam o atime
+    """
+    files = []
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    files.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+        except OSError:
+            continue
+    return files
+
+
+def list_entries(directory, offset=0, limit=100, files_only=True):
+    """
+    One page of a directory listing sorted by name, with sizes and mtimes
+    Uma página da listagem de um diretório por nome, com tamanhos e mtimes
+    Returns / Retorna: (page, total_count, total_bytes)
+    """
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if files_only and not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append({'name': entry.name, 'size': st.st_size, 'mtime': st.st_mtime,
+                                'is_dir': entry.is_dir()})
+    except FileNotFoundError:
+        return [], 0, 0
+    entries.sort(key=lambda e: e['name'])
+    total_bytes = sum(e['size'] for e in entries)
+    return entries[offset:offset + limit], len(entries), total_bytes
+
+
+class StorageManager:
+    """
+    Quota enforcement and cleanup jobs / Aplicação de cotas e jobs de limpeza
+
+    Args:
+        directories: {label: path}, e.g. {"tmp": ..., "downloads": ...}
+        quotas: {label: max_bytes}; 0/None = unlimited / ilimitado
+        interval: Seconds between background passes / Segundos entre passadas
+        min_age: Files used more recently are never evicted / Arquivos usados há
+                 menos tempo nunca são removidos
+        on_job: Called with a job copy when it starts, advances or ends, e.g. to
+                share progress across worker processes / Chamado com uma cópia do
+                job ao iniciar, avançar ou terminar
+    """
+
+    MAX_JOBS = 20
+    JOB_REPORT_EVERY = 100
+
+    def __init__(self, directories, quotas=None, interval=300.0, min_age=60.0, enabled=True):
+        self.directories = dict(directories)
+        self.quotas = {k: v for k, v in (quotas or {}).items() if k in self.directories}
+        self.interval = interval
+        self.min_age = min_age
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._usage = {}
+        self._jobs = {}
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.on_job = None
+
+    @classmethod
+    def from_config(cls, directories, storage_config):
+        """Build from the 'storage' config section / Cria a partir da seção 'storage'"""
+        cfg = storage_config or {}
+        return cls(
+            directories,
+            quotas=cfg.get('quotas'),
+            interval=cfg.get('interval_seconds', 300),
+            min_age=cfg.get('min_age_seconds', 60),
+            enabled=cfg.get('enabled', True),
+        )
+
+    # --------------------------------------------------------------- background
+
+    def start(self):
+        """Start the background quota thread / Inicia a thread de cotas"""
+        if not self.enabled or not self.quotas or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='storage-manager', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"[Storage] Quota pass failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def enforce(self, label=None):
+        """
+        Evict least recently used files until each directory fits its quota
+        Remove os arquivos usados há mais tempo até cada diretório caber na cota
+        Returns / Retorna: {label: {"bytes": n, "evicted": n, "freed": n}}
+        """
+        report = {}
+        for name, path in self.directories.items():
+            if label is not None and name != label:
+                continue
+            files = scan_files(path)
+            used = sum(size for _, size, _ in files)
+            quota = self.quotas.get(name)
+            evicted = freed = 0
+            if quota and used > quota:
+                cutoff = time.time() - self.min_age
+                files.sort()
+                for last_used, size, file_path in files:
+                    if used <= quota or last_used > cutoff:
+                        break
+                    try:
+                        os.unlink(file_path)
+                    except OSError:
+                        continue
+                    used -= size
+                    freed += size
+                    evicted += 1
+                if evicted:
+                    print(f"[Storage] {name}: evicted {evicted} file(s), {freed} bytes (quota {quota})")
+            with self._lock:
+                self.evicted_files += evicted
+                self.evicted_bytes += freed
+                self._usage[name] = {'bytes': used, 'files': len(files) - evicted, 'scanned_at': time.time()}
+            report[name] = {'bytes': used, 'evicted': evicted, 'freed': freed}
+        return report
+
+    def usage(self, refresh=False):
+        """
+        Bytes and file count per directory, from the last pass unless refresh
+        Bytes e arquivos por diretório, da última passada a menos que refresh
+        """
+        if refresh or len(self._usage) < len(self.directories):
+            for name, path in self.directories.items():
+                files = scan_files(path)
+                with self._lock:
+                    self._usage[name] = {'bytes': sum(size for _, size, _ in files), 'files': len(files),
+                                         'scanned_at': time.time()}
+        with self._lock:
+            return {name: dict(self._usage.get(name, {}), path=self.directories[name],
+                               quota_bytes=self.quotas.get(name))
+                    for name in self.directories}
+
+    # -------------------------------------------------------------- manual jobs
+
+    def start_cleanup(self, labels):
+        """
+        Delete everything in the given directories in a background job
+        Apaga todo o conteúdo dos diretórios informados em um job em background
+        Returns the job dict / Retorna o dict do job
+        """
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'targets': [label for label in labels if label in self.directories],
+            'state': 'running',
+            'total': None,
+            'deleted': 0,
+            'bytes_freed': 0,
+            'errors': [],
+            'started': time.time(),
+            'finished': None,
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            for old in sorted(self._jobs.values(), key=lambda j: j['started'])[:-self.MAX_JOBS]:
+                if old['state'] != 'running':
+                    del self._jobs[old['id']]
+        self._report(job)
+        threading.Thread(target=self._run_cleanup, args=(job,), name=f"storage-cleanup-{job['id']}",
+                         daemon=True).start()
+        return dict(job)
+
+    def job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, errors=list(job['errors'])) if job else None
+
+    def _report(self, job):
+        if self.on_job is None:
+            return
+        with self._lock:
+            snapshot = dict(job, errors=list(job['errors']))
+        try:
+            self.on_job(snapshot)
+        except Exception as e:
+            print(f"[Storage] Job report failed: {e}")
+
+    def _run_cleanup(self, job):
+        entries = []
+        for label in job['targets']:
+            path = self.directories[label]
+            try:
+                with os.scandir(path) as it:
+                    entries.extend(it)
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            job['total'] = len(entries)
+        self._report(job)
+        for index, entry in enumerate(entries, 1):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    size = sum(size for _, size, _ in scan_files(entry.path))
+                    shutil.rmtree(entry.path)
+                else:
+                    size = entry.stat(follow_symlinks=False).st_size
+                    os.unlink(entry.path)
+            except OSError as e:
+                with self._lock:
+                    job['errors'].append(f"{entry.path}: {e}")
+                continue
+            with self._lock:
+                job['deleted'] += 1
+                job['bytes_freed'] += size
+            if index % self.JOB_REPORT_EVERY == 0:
+                self._report(job)
+        with self._lock:
+            job['state'] = 'done'
+            job['finished'] = time.time()
+            for label in job['targets']:
+                self._usage.pop(label, None)
+        self._report(job)
+        print(f"[Storage] Cleanup {job['id']}: {job['deleted']} item(s), {job['bytes_freed']} bytes")
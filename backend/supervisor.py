@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Process Supervisor / Supervisor de Processos
+===========================================================
+
+Owns the HexStrike child process: starts it in its own process group, keeps
+the Popen handle, polls its health endpoint and restarts it with exponential
+backoff when it dies or stops answering. Shutdown signals the whole group
+with SIGTERM, waits up to a short deadline and then sends SIGKILL, so no
+pkill/ps/fuser processes are spawned and no unrelated process is touched.
+
+Controla o processo filho do HexStrike: inicia em um grupo de processos
+próprio, mantém o handle do Popen, consulta o endpoint de saúde e reinicia
+com backoff exponencial quando ele morre ou para de responder. O desligamento
+envia SIGTERM ao grupo inteiro, espera um prazo curto e então envia SIGKILL,
+sem criar processos pkill/ps/fuser e sem afetar processos alheios.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+
+class ProcessSupervisor:
+    """
+    Supervises one child process / Supervisiona um processo filho
+
+    Args:
+        name: Label for logs / Rótulo para logs
+        argv: Command line / Linha de comando
+        health_url: GET endpoint answering 200 when healthy / Endpoint de saúde
+        health_check: Callable used instead of health_url / Função usada no lugar de health_url
+        cwd: Working directory / Diretório de trabalho
+        log_path: File receiving the child's output / Arquivo com a saída do filho
+        health_interval: Seconds between health checks / Segundos entre verificações
+        health_timeout: Timeout of one health check / Timeout de uma verificação
+        failure_threshold: Failed checks before a restart / Falhas antes de reiniciar
+        startup_grace: Seconds after start before checks count / Carência após iniciar
+        backoff_initial: First restart delay / Primeiro atraso de reinício
+        backoff_max: Restart delay cap / Atraso máximo de reinício
+        stop_timeout: Seconds between SIGTERM and SIGKILL / Segundos entre SIGTERM e SIGKILL
+    """
+
+    def __init__(self, name, argv, health_url=None, health_check=None, cwd=None, log_path=None, health_interval=5.0,
+                 health_timeout=2.0, failure_threshold=3, startup_grace=15.0, backoff_initial=1.0,
+                 backoff_max=60.0, stop_timeout=0.5):
+        self.name = name
+        self.argv = argv
+        self.health_url = health_url
+        self.health_check = health_check
+        self.cwd = cwd
+        self.log_path = log_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.startup_grace = startup_grace
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stop_timeout = stop_timeout
+
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._monitor = None
+        self.process = None
+        # 'stopped' (by request), 'running', 'backoff' (waiting to restart)
+        self.state = 'stopped'
+        self.started_at = None
+        self.restarts = 0
+        self.crashes = 0
+        self.consecutive_failures = 0
+        self.last_exit_code = None
+        self.last_stop_seconds = None
+        self.last_start_seconds = None
+        self._next_restart_at = None
+
+    @classmethod
+    def for_hexstrike(cls, search_dirs, port, supervisor_config, log_dir=None, health_check=None):
+        """
+        Build a supervisor for hexstrike_server.py, or None if the script is not found
+        Cria um supervisor para hexstrike_server.py, ou None se o script não existir
+        """
+        cfg = supervisor_config or {}
+        if not cfg.get('enabled', True):
+            return None
+        script = cfg.get('script') or ''
+        if not script:
+            for directory in search_dirs:
+                candidate = os.path.join(directory, 'hexstrike-ai', 'hexstrike_server.py')
+                if os.path.isfile(candidate):
+                    script = candidate
+                    break
+        if not script or not os.path.isfile(script):
+            return None
+        return cls(
+            'hexstrike',
+            [sys.executable, script, '--port', str(port)],
+            health_url=f"http://127.0.0.1:{port}/health",
+            health_check=health_check,
+            cwd=os.path.dirname(script),
+            log_path=os.path.join(log_dir, 'hexstrike.log') if log_dir else None,
+            health_interval=cfg.get('health_interval', 5.0),
+            health_timeout=cfg.get('health_timeout', 2.0),
+            failure_threshold=cfg.get('failure_threshold', 3),
+            startup_grace=cfg.get('startup_grace', 15.0),
+            backoff_initial=cfg.get('backoff_initial', 1.0),
+            backoff_max=cfg.get('backoff_max', 60.0),
+            stop_timeout=cfg.get('stop_timeout', 0.5),
+        )
+
+    # ------------------------------------------------------------------ control
+
+    def is_running(self):
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def start(self):
+        """
+        Start the child if it is not running; returns True when it runs
+        Inicia o filho se não estiver rodando; retorna True quando roda
+        """
+        with self._lock:
+            self.state = 'running'
+            self._next_restart_at = None
+            if self.is_running():
+                return True
+            ok = self._spawn()
+            self._ensure_monitor()
+            return ok
+
+    def stop(self, timeout=None):
+        """
+        SIGTERM the process group, SIGKILL after the deadline; no restart follows
+        SIGTERM no grupo, SIGKILL após o prazo; não há reinício depois
+        Returns / Retorna: {"stopped": bool, "forced": bool, "seconds": float}
+        """
+        with self._lock:
+            self.state = 'stopped'
+            self._next_restart_at = None
+            result = self._terminate(self.stop_timeout if timeout is None else timeout)
+            self._wake.set()
+            return result
+
+    def restart(self):
+        """Stop then start / Para e inicia"""
+        with self._lock:
+            self._terminate(self.stop_timeout)
+            self.restarts += 1
+            return self.start()
+
+    def wait_healthy(self, timeout):
+        """
+        Poll the health endpoint until it answers or timeout elapses
+        Consulta o endpoint de saúde até responder ou esgotar o timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.check_health():
+                return True
+            if not self.is_running() or time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+
+    def check_health(self):
+        if not self.is_running():
+            return False
+        if self.health_check is not None:
+            return self.health_check()
+        if not self.health_url:
+            return True
+        try:
+            return requests.get(self.health_url, timeout=self.health_timeout).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def stats(self):
+        process = self.process
+        running = self.is_running()
+        return {
+            'name': self.name,
+            'state': self.state,
+            'running': running,
+            'pid': process.pid if process is not None and running else None,
+            'uptime_seconds': round(time.monotonic() - self.started_at, 3) if running and self.started_at else 0.0,
+            'restarts': self.restarts,
+            'crashes': self.crashes,
+            'consecutive_health_failures': self.consecutive_failures,
+            'last_exit_code': self.last_exit_code,
+            'last_start_seconds': self.last_start_seconds,
+            'last_stop_seconds': self.last_stop_seconds,
+        }
+
+    def shutdown(self):
+        """Stop the child and the monitor thread / Para o filho e a thread monitora"""
+        self.stop()
+        monitor = self._monitor
+        if monitor is not None and monitor is not threading.current_thread():
+            monitor.join(timeout=1.0)
+
+    # ----------------------------------------------------------------- internal
+
+    def _spawn(self):
+        started = time.perf_counter()
+        log = subprocess.DEVNULL
+        try:
+            if self.log_path:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                log = open(self.log_path, 'ab')
+            self.process = subprocess.Popen(
+                self.argv, cwd=self.cwd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                start_new_session=True,  # own process group / grupo de processos próprio
+            )
+        except OSError as e:
+            print(f"[Supervisor] Failed to start {self.name}: {e}")
+            self.process = None
+            return False
+        finally:
+            if log is not subprocess.DEVNULL:
+                log.close()
+        self.started_at = time.monotonic()
+        self.consecutive_failures = 0
+        self.last_start_seconds = round(time.perf_counter() - started, 4)
+        print(f"[Supervisor] Started {self.name} (pid {self.process.pid})")
+        return True
+
+    def _terminate(self, timeout):
+        process = self.process
+        if process is None or process.poll() is not None:
+            if process is not None:
+                self.last_exit_code = process.returncode
+            return {'stopped': True, 'forced': False, 'seconds': 0.0}
+        started = time.perf_counter()
+        forced = False
+        self._signal_group(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            forced = True
+            self._signal_group(process, signal.SIGKILL)
+            try:
+                process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                pass
+        seconds = round(time.perf_counter() - started, 4)
+        self.last_exit_code = process.poll()
+        self.last_stop_seconds = seconds
+        print(f"[Supervisor] Stopped {self.name} in {seconds:.3f}s{' (forced)' if forced else ''}")
+        return {'stopped': process.poll() is not None, 'forced': forced, 'seconds': seconds}
+
+    @staticmethod
+    def _signal_group(process, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+        except OSError:
+            # Not a group leader (e.g. setsid failed) / Não é líder de grupo
+            try:
+                process.send_signal(sig)
+            except OSError:
+                pass
+
+    def _ensure_monitor(self):
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._run_monitor, name=f"supervisor-{self.name}", daemon=True)
+            self._monitor.start()
+
+    def _backoff(self):
+        return min(self.backoff_max, self.backoff_initial * (2 ** max(0, self.crashes - 1)))
+
+    def _run_monitor(self):
+        while True:
+            with self._lock:
+                if self.state == 'backoff':
+                    timeout = max(0.0, self._next_restart_at - time.monotonic())
+                else:
+                    timeout = self.health_interval
+            self._wake.wait(timeout)
+            self._wake.clear()
+            with self._lock:
+                if self.state == 'stopped':
+                    return
+                now = time.monotonic()
+                if self.state == 'backoff':
+                    if now >= self._next_restart_at:
+                        self.restarts += 1
+                        self.state = 'running'
+                        self._spawn()
+                    continue
+
+                process = self.process
+                if process is None or process.poll() is not None:
+                    self.last_exit_code = process.returncode if process is not None else None
+                    reason = f"exited with {self.last_exit_code}"
+                elif now - (self.started_at or now) < self.startup_grace:
+                    continue
+                else:
+                    reason = None
+
+            # Health check without holding the lock / Verificação sem segurar o lock
+            if reason is None:
+                if self.check_health():
+                    with self._lock:
+                        self.consecutive_failures = 0
+                        # Stable for a while: forget earlier crashes / Estável: esquece falhas antigas
+                        if self.started_at and time.monotonic() - self.started_at > self.backoff_max:
+                            self.crashes = 0
+                    continue
+                with self._lock:
+                    self.consecutive_failures += 1
+                    if self.consecutive_failures < self.failure_threshold:
+                        continue
+                    reason = f"{self.consecutive_failures} failed health checks"
+
+            with self._lock:
+                if self.state != 'running':
+                    continue
+                self._terminate(self.stop_timeout)
+                self.crashes += 1
+                delay = self._backoff()
+                self.state = 'backoff'
+                self._next_restart_at = time.monotonic() + delay
+                print(f"[Supervisor] {self.name} {reason}; restarting in {delay:.1f}s")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Session Task Memory / Memória de Tarefas da Sessão
+=================================================================
+
+Each /chat request used to start from the user's message alone. With task
+memory, the commands, results and conclusions of earlier tasks in the same
+session are kept as short snippets, indexed with BM25 over their keywords
+(hosts, ports, paths, tool names), and the top-k snippets relevant to a new
+request are prepended to it within a token budget. Snippets persist as
+JSON lines under ~/.hexagent-gui/memory, one file per session.
+
+Cada requisição /chat começava só com a mensagem do usuário. Com a memória
+de tarefas, os comandos, resultados e conclusões de tarefas anteriores da
+mesma sessão viram trechos curtos, indexados com BM25 pelas palavras-chave
+(hosts, portas, caminhos, ferramentas), e os top-k trechos relevantes para
+uma nova requisição são adicionados a ela dentro de um orçamento de tokens.
+Os trechos persistem como JSON lines em ~/.hexagent-gui/memory, um arquivo
+por sessão.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from output_store import preview
+from state import file_lock
+
+# Keeps IPs, ports, paths, flags and URLs as single terms / Mantém IPs, portas, caminhos e URLs inteiros
+TOKEN_RE = re.compile(r"[a-z0-9_][a-z0-9_.:/\-]*[a-z0-9_]|[a-z0-9_]")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how i in is it its of on or that the this to was were what
+which with you your please respond o os a as de da do das dos e em um uma para por que com no na se
+""".split())
+
+MEMORY_HEADER = "[Session Memory - earlier tasks in this session / memória de tarefas anteriores]:"
+
+
+PART_RE = re.compile(r"[./:\-]+")
+
+
+def tokenize(text):
+    """
+    Lower-cased terms without stopwords; compound terms also yield their parts
+    ("3306/tcp" -> "3306/tcp", "3306", "tcp")
+    Termos em minúsculas sem stopwords; termos compostos também geram suas partes
+    """
+    terms = []
+    for term in TOKEN_RE.findall(text.lower()):
+        if term in STOPWORDS:
+            continue
+        terms.append(term)
+        if PART_RE.search(term):
+            terms.extend(p for p in PART_RE.split(term) if len(p) > 1 and p not in STOPWORDS)
+    return terms
+
+
+def estimate_tokens(text):
+    """~4 chars per token, as the loop governor estimates / ~4 caracteres por token"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a growing list of documents / BM25 sobre documentos incrementais
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = []
+        self.lengths = []
+        self.df = Counter()
+        self.total_length = 0
+
+    def add(self, text):
+        terms = Counter(tokenize(text))
+        self.docs.append(terms)
+        self.lengths.append(sum(terms.values()))
+        self.total_length += self.lengths[-1]
+        self.df.update(terms.keys())
+
+    def search(self, query, k):
+        """Top-k (score, doc_index) with score > 0 / Top-k (score, índice) com score > 0"""
+        terms = set(tokenize(query))
+        n = len(self.docs)
+        if not terms or not n:
+            return []
+        avg_length = self.total_length / n or 1.0
+        idf = {t: math.log(1.0 + (n - self.df[t] + 0.5) / (self.df[t] + 0.5)) for t in terms if self.df[t]}
+        if not idf:
+            return []
+        scores = []
+        for index, doc in enumerate(self.docs):
+            score = 0.0
+            norm = self.k1 * (1.0 - self.b + self.b * self.lengths[index] / avg_length)
+            for term, weight in idf.items():
+                tf = doc.get(term)
+                if tf:
+                    score += weight * tf * (self.k1 + 1.0) / (tf + norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(key=lambda s: (-s[0], -s[1]))
+        return scores[:k]
+
+
+class SessionMemory:
+    """
+    Snippets of one session and their index / Trechos de uma sessão e seu índice
+    The file is reloaded when another worker appended to it / Recarrega se outro worker gravou
+    """
+
+    def __init__(self, path, max_snippets):
+        self.path = path
+        self.max_snippets = max_snippets
+        self.snippets = []
+        self.index = BM25Index()
+        self._signature = None
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        snippets = []
+        if signature is not None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        snippets.append(json.loads(line))
+                    except ValueError:
+                        continue
+        self._rebuild(snippets[-self.max_snippets:])
+        self._signature = signature
+
+    def _rebuild(self, snippets):
+        self.snippets = snippets
+        self.index = BM25Index()
+        for snippet in snippets:
+            self.index.add(snippet['text'])
+
+    def append(self, snippets):
+        """Persist and index new snippets / Persiste e indexa novos trechos"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with file_lock(self.path + '.lock'):
+            self.refresh()
+            known = {s['text'] for s in self.snippets}
+            fresh = [s for s in snippets if s['text'] not in known]
+            if not fresh:
+                return 0
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for snippet in fresh:
+                    f.write(json.dumps(snippet, ensure_ascii=False) + "\n")
+            for snippet in fresh:
+                self.snippets.append(snippet)
+                self.index.add(snippet['text'])
+            if len(self.snippets) > self.max_snippets:
+                # Compact: keep the newest snippets / Compacta: mantém os mais novos
+                self._rebuild(self.snippets[-self.max_snippets:])
+                tmp_path = self.path + '.compact'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for snippet in self.snippets:
+                        f.write(json.dumps(snippet, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.path)
+            self._signature = self._file_signature()
+        return len(fresh)
+
+
+class MemoryWriter:
+    """
+    Collects what one task did, written when the stream closes
+    Coleta o que uma tarefa fez, gravado ao fechar o stream
+    """
+
+    def __init__(self, memory, session_id, message):
+        self.memory = memory
+        self.session_id = session_id
+        self.message = message
+        self.executions = []
+        self.conclusion = None
+        self.closed = False
+
+    def execute(self, cmd, result):
+        """Keep a short excerpt of a command result / Guarda um trecho curto do resultado"""
+        self.executions.append((cmd, preview(result or "", self.memory.max_snippet_chars)))
+
+    def conclude(self, final_response, stop_reason):
+        if final_response and stop_reason in ('completed', 'answered'):
+            self.conclusion = preview(final_response, self.memory.max_snippet_chars)
+
+    def close(self):
+        """Store the snippets (idempotent) / Grava os trechos (idempotente)"""
+        if self.closed:
+            return
+        self.closed = True
+        now = time.time()
+        task = preview(self.message, 200)
+        snippets = [{'kind': 'command', 'task': task, 'time': now, 'text': f"$ {cmd}\n{result}"}
+                    for cmd, result in self.executions]
+        if self.conclusion:
+            snippets.append({'kind': 'conclusion', 'task': task, 'time': now,
+                             'text': f"Task: {task}\nConclusion: {self.conclusion}"})
+        if snippets:
+            self.memory.remember(self.session_id, snippets)
+
+
+class _NullMemoryWriter:
+    """Memory disabled for this task / Memória desativada para esta tarefa"""
+
+    def execute(self, cmd, result):
+        pass
+
+    def conclude(self, final_response, stop_reason):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_MEMORY = _NullMemoryWriter()
+
+
+class TaskMemory:
+    """
+    Per-session memory store / Memória por sessão
+
+    Args:
+        directory: Where session files live / Onde ficam os arquivos de sessão
+        enabled: Default for requests that do not say / Padrão quando a requisição não informa
+        top_k: Snippets injected per request / Trechos injetados por requisição
+        max_tokens: Token budget of the injected block / Orçamento de tokens do bloco injetado
+        max_snippets: Snippets kept per session / Trechos mantidos por sessão
+        max_snippet_chars: Excerpt size per result / Tamanho do trecho por resultado
+        max_sessions: Sessions kept loaded / Sessões mantidas carregadas
+    """
+
+    def __init__(self, directory, enabled=False, top_k=4, max_tokens=512, max_snippets=500,
+                 max_snippet_chars=400, max_sessions=32):
+        self.directory = directory
+        self.enabled = enabled
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self.max_snippets = max_snippets
+        self.max_snippet_chars = max_snippet_chars
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.recalls = 0
+        self.hits = 0
+
+    @classmethod
+    def from_config(cls, directory, memory_config):
+        """Build from the 'task_memory' config section / Cria a partir da seção 'task_memory'"""
+        cfg = memory_config or {}
+        return cls(
+            directory,
+            enabled=cfg.get('enabled', False),
+            top_k=cfg.get('top_k', 4),
+            max_tokens=cfg.get('max_tokens', 512),
+            max_snippets=cfg.get('max_snippets', 500),
+            max_snippet_chars=cfg.get('max_snippet_chars', 400),
+            max_sessions=cfg.get('max_sessions', 32),
+        )
+
+    def _path(self, session_id):
+        # Session ids may be addresses or arbitrary headers / Ids podem ser endereços ou headers
+        digest = hashlib.sha256(str(session_id).encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.directory, f"{digest}.jsonl")
+
+    def _session(self, session_id):
+        """Loaded SessionMemory (LRU); call with the lock held / Chamar com o lock"""
+        memory = self._sessions.get(session_id)
+        if memory is None:
+            memory = SessionMemory(self._path(session_id), self.max_snippets)
+            self._sessions[session_id] = memory
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        memory.refresh()
+        return memory
+
+    def start(self, session_id, message, enabled=None):
+        """Writer for one task / Writer para uma tarefa"""
+        if not (self.enabled if enabled is None else enabled) or not session_id:
+            return NULL_MEMORY
+        return MemoryWriter(self, session_id, message)
+
+    def remember(self, session_id, snippets):
+        try:
+            with self._lock:
+                self._session(session_id).append(snippets)
+        except Exception as e:
+            print(f"[Memory] Failed to store snippets: {e}")
+
+    def recall(self, session_id, query):
+        """
+        Top-k snippets for query within the token budget -> (context_block, hits)
+        Top-k trechos para a consulta dentro do orçamento -> (bloco_de_contexto, hits)
+        """
+        with self._lock:
+            memory = self._session(session_id)
+            ranked = [(score, memory.snippets[i]) for score, i in memory.index.search(query, self.top_k)]
+        self.recalls += 1
+        chosen = []
+        budget = self.max_tokens
+        for score, snippet in ranked:
+            cost = estimate_tokens(snippet['text'])
+            if cost > budget:
+                continue
+            budget -= cost
+            chosen.append(dict(snippet, score=round(score, 3)))
+        if not chosen:
+            return "", []
+        self.hits += len(chosen)
+        lines = [MEMORY_HEADER]
+        for snippet in chosen:
+            lines.append(f"- ({snippet['kind']}) {snippet['text']}")
+        return "\n".join(lines) + "\n", chosen
+
+    def stats(self, session_id=None):
+        stats = {'enabled': self.enabled, 'recalls': self.recalls, 'hits': self.hits,
+                 'sessions_loaded': len(self._sessions)}
+        if session_id is not None:
+            with self._lock:
+                stats['snippets'] = len(self._session(session_id).snippets)
+        return stats
+
+    def forget(self, session_id):
+        """Delete a session's memory / Apaga a memória de uma sessão"""
+        path = self._path(session_id)
+        with self._lock, file_lock(path + '.lock'):
+            self._sessions.pop(session_id, None)
+            try:
+                os.remove(path)
+                return True
+            except FileNotFoundError:
+                return False
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Tool Result Cache / Cache de Resultados de Ferramentas
+=====================================================================
+
+Memoizes results of read-only commands (uname, whoami, cat, ls, ...) that the
+agent tends to repeat across iterations. Entries are keyed on the normalized
+command, expire after a TTL, are evicted LRU past a size limit, and are
+invalidated when a file the command reads changes (mtime/size).
+
+Memoriza resultados de comandos somente-leitura (uname, whoami, cat, ls, ...)
+que o agente costuma repetir entre iterações. As entradas são indexadas pelo
+comando normalizado, expiram após um TTL, são removidas (LRU) acima de um
+limite e invalidadas quando um arquivo lido pelo comando muda (mtime/tamanho).
+
+Only successful results are stored: error text from a timeout or an outage
+is returned but not replayed. Relative paths are resolved by HexStrike in
+its own working directory, so commands with them are not cached unless
+shared_cwd says both processes share one.
+
+Só resultados bem-sucedidos são guardados: erros de timeout ou
+indisponibilidade são retornados mas não reutilizados. Caminhos relativos
+são resolvidos pelo HexStrike no seu próprio diretório, então comandos com
+eles não são cacheados, a menos que shared_cwd diga que o diretório é o mesmo.
+"""
+
+import os
+import shlex
+import threading
+import time
+from collections import OrderedDict
+
+# Commands with no side effects whose output depends only on the system state
+# Comandos sem efeitos colaterais cuja saída depende só do estado do sistema
+# stat is left out: it prints atime/ctime, which (mtime, size) does not track
+# stat fica de fora: mostra atime/ctime, que (mtime, tamanho) não acompanha
+DEFAULT_ALLOWLIST = [
+    'uname', 'whoami', 'id', 'hostname', 'pwd', 'arch', 'nproc', 'lsb_release',
+    'cat', 'ls', 'head', 'tail', 'wc', 'file', 'md5sum', 'sha256sum', 'which',
+]
+
+# Commands whose non-flag arguments are paths to watch / Argumentos são caminhos
+FILE_READERS = {'cat', 'ls', 'head', 'tail', 'wc', 'stat', 'file', 'md5sum', 'sha256sum'}
+
+# Options that take the next token as their value / Opções cujo valor é o próximo token
+VALUE_OPTIONS = {'head': {'-n', '-c'}, 'tail': {'-n', '-c'}}
+
+# Commands that change state when given arguments (hostname NAME)
+# Comandos que mudam o estado quando recebem argumentos
+NO_ARGUMENTS = {'hostname'}
+
+# ls options whose output depends only on the directory entries; any other
+# option (-l, -s, -t, ...) also depends on each child's stat, -R on subdirectories
+# Opções do ls cuja saída depende só das entradas do diretório
+LS_NAME_FLAGS = set('1aAr')
+LS_NAME_LONG = {'--all', '--almost-all', '--reverse'}
+LS_RECURSIVE = {'-R', '--recursive'}
+# Children stat()ed for ls -l and friends; larger directories are not cached
+# Filhos consultados para ls -l e similares; diretórios maiores não são cacheados
+MAX_LS_CHILDREN = 256
+
+# Start of results that are errors, not command output / Início de resultados que são erros
+ERROR_MARKERS = (
+    'error', 'erro', '❌', '⚠️', 'traceback (most recent call last)', 'hexstrike offline',
+)
+ERROR_TEXT = (
+    '"success": false', "'success': false", 'connection refused', 'connectionerror', 'read timed out',
+    'max retries exceeded', 'timed out after', 'command timed out',
+)
+ERROR_SCAN_CHARS = 512
+
+# Anything that redirects, chains, substitutes or backgrounds is never cached
+# Redirecionamento, encadeamento, substituição ou background nunca são cacheados
+SHELL_METACHARS = set(';|&<>$`(){}*?[]!\n')
+
+
+def normalize_command(cmd):
+    """
+    Canonical form of a command, or None if it cannot be parsed safely
+    Forma canônica de um comando, ou None se não puder ser analisado com segurança
+    """
+    if not cmd or any(ch in SHELL_METACHARS for ch in cmd):
+        return None
+    try:
+        tokens = shlex.split(cmd)
+    except ValueError:
+        return None
+    if not tokens:
+        return None
+    return tokens
+
+
+def looks_successful(result):
+    """
+    False for results shaped like an executor error (timeout, outage, failed call)
+    False para resultados com forma de erro do executor (timeout, falha, indisponível)
+    """
+    head = result[:ERROR_SCAN_CHARS].lower().lstrip()
+    return not (head.startswith(ERROR_MARKERS) or any(text in head for text in ERROR_TEXT))
+
+
+class ToolCache:
+    """
+    Thread-safe TTL + LRU cache for idempotent tool executions
+    Cache TTL + LRU thread-safe para execuções idempotentes
+
+    Args:
+        ttl_seconds: Entry lifetime / Tempo de vida da entrada
+        max_entries: Size limit before LRU eviction / Limite antes da remoção LRU
+        allowlist: Command names considered pure / Comandos considerados puros
+        shared_cwd: HexStrike runs commands in the backend's working directory,
+                    so relative paths can be cached / Mesmo diretório de trabalho
+        succeeded: result -> bool, only successful results are stored
+                   (default looks_successful) / Só resultados bem-sucedidos são guardados
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=256, allowlist=None, enabled=False, shared_cwd=False,
+                 succeeded=None):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.allowlist = set(allowlist or DEFAULT_ALLOWLIST)
+        self.shared_cwd = shared_cwd
+        self.succeeded = succeeded or looks_successful
+        self._entries = OrderedDict()  # key -> (result, stored_at, deps)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_config(cls, cache_config):
+        """Build from the 'tool_cache' config section / Cria a partir da seção 'tool_cache'"""
+        cfg = cache_config or {}
+        return cls(
+            ttl_seconds=cfg.get('ttl_seconds', 300),
+            max_entries=cfg.get('max_entries', 256),
+            allowlist=cfg.get('allowlist'),
+            enabled=cfg.get('enabled', False),
+            shared_cwd=cfg.get('shared_cwd', False),
+        )
+
+    def cache_key(self, cmd):
+        """
+        Normalized key for a cacheable command, else None
+        Chave normalizada para comando cacheável, senão None
+        """
+        tokens = normalize_command(cmd)
+        if not tokens:
+            return None
+        name = os.path.basename(tokens[0])
+        if name not in self.allowlist or (name in NO_ARGUMENTS and len(tokens) > 1):
+            return None
+        if name == 'ls' and any(t in LS_RECURSIVE or (t[:1] == '-' and t[1:2] != '-' and 'R' in t)
+                                for t in tokens[1:]):
+            return None
+        if not self.shared_cwd and name in FILE_READERS and any(
+                not os.path.isabs(os.path.expanduser(path)) for path in _paths(tokens)):
+            return None
+        return tuple(tokens)
+
+    def get_or_execute(self, cmd, execute):
+        """
+        Return (result, hit). Calls execute(cmd) on a miss.
+        Retorna (resultado, hit). Chama execute(cmd) em caso de miss.
+        """
+        key = self.cache_key(cmd)
+        if key is None:
+            return execute(cmd), False
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+
+        # stat() the files outside the lock, then validate under it
+        # stat() dos arquivos fora do lock, depois valida com ele
+        deps = _file_dependencies(key)
+        if entry is not None:
+            with self._lock:
+                latest = self._entries.get(key)
+                if latest is not None and latest[2] == deps:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return latest[0], True
+                if latest is entry:
+                    del self._entries[key]
+                    self.invalidations += 1
+                self.misses += 1
+
+        # Execute outside the lock / Executa fora do lock
+        result = execute(cmd)
+        if deps is None:
+            return result, False
+        if result and self.succeeded(result):
+            with self._lock:
+                self._entries[key] = (result, time.monotonic(), deps)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result, False
+
+    def clear(self):
+        """Drop all entries / Remove todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters / Contadores de hit/miss"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def _paths(tokens):
+    """Path arguments of a file-reading command / Argumentos de caminho"""
+    name = os.path.basename(tokens[0])
+    value_options = VALUE_OPTIONS.get(name, ())
+    paths = []
+    skip = False
+    for token in tokens[1:]:
+        if skip:
+            skip = False
+        elif token in value_options:
+            skip = True
+        elif not token.startswith('-'):
+            paths.append(token)
+    if name == 'ls' and not paths:
+        paths = ['.']
+    return paths
+
+
+def _ls_lists_names_only(tokens):
+    """ls output depends only on the directory entries / Depende só das entradas"""
+    for token in tokens[1:]:
+        if token.startswith('--'):
+            if token not in LS_NAME_LONG:
+                return False
+        elif token.startswith('-') and not set(token[1:]) <= LS_NAME_FLAGS:
+            return False
+    return True
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (path, None, None)
+
+
+def _file_dependencies(tokens):
+    """
+    (path, mtime_ns, size) for every path a file-reading command touches, and
+    for the children of listed directories when ls shows their details; None
+    when there are too many to watch
+    (caminho, mtime_ns, tamanho) de cada caminho lido pelo comando, e dos filhos
+    dos diretórios listados quando o ls mostra detalhes; None se forem muitos
+    """
+    name = os.path.basename(tokens[0])
+    if name not in FILE_READERS:
+        return ()
+    deps = []
+    details = name == 'ls' and not _ls_lists_names_only(tokens)
+    for path in _paths(tokens):
+        full = os.path.abspath(os.path.expanduser(path))
+        deps.append(_stat(full))
+        if details and os.path.isdir(full):
+            try:
+                children = sorted(os.listdir(full))
+            except OSError:
+                continue
+            if len(children) > MAX_LS_CHILDREN:
+                return None
+            deps.extend(_stat(os.path.join(full, child)) for child in children)
+    return tuple(deps)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Request Tracing / Rastreamento de Requisições
+============================================================
+
+Every request gets a trace id; work inside it (web search, each chat_step,
+each execute_tool, session I/O) is recorded as timed spans. Finished spans are
+handed to a bounded in-memory queue and written as JSON lines by a background
+listener into rotating files under ~/.hexagent-gui/log, so the request thread
+never waits on disk. When the queue is full, spans are dropped and counted.
+Each process (every --workers worker, a batch run) writes its own
+trace-<pid>.jsonl, since file rotation is not safe across processes.
+
+Cada requisição recebe um trace id; o trabalho dentro dela (busca web, cada
+chat_step, cada execute_tool, I/O de sessão) é registrado como spans
+cronometrados. Spans finalizados vão para uma fila limitada em memória e são
+gravados como linhas JSON por um listener em background em arquivos
+rotativos em ~/.hexagent-gui/log, sem que a requisição espere pelo disco.
+Com a fila cheia, spans são descartados e contabilizados. Cada processo grava
+o seu próprio trace-<pid>.jsonl, pois a rotação não é segura entre processos.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Never blocks and never formats on the caller's thread
+    Nunca bloqueia e nunca formata na thread do chamador
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class Span:
+    """
+    A timed unit of work; usable as a context manager or ended with end()
+    Unidade de trabalho cronometrada; context manager ou finalizada com end()
+    """
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'attrs', 'start_wall', 'start', 'ended', 'detached')
+
+    def __init__(self, trace, name, parent_id, attrs, detached=False):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        self.ended = False
+        self.detached = detached
+
+    def set(self, **attrs):
+        """Attach attributes / Anexa atributos"""
+        self.attrs.update(attrs)
+
+    def end(self, error=None):
+        if self.ended:
+            return
+        self.ended = True
+        duration = time.perf_counter() - self.start
+        if not self.detached:
+            stack = self.trace.stack
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i] is self:
+                    del stack[i:]
+                    break
+        record = {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start_wall, 6),
+            'duration_ms': round(duration * 1000.0, 3),
+            'status': 'error' if error else 'ok',
+        }
+        if error:
+            record['error'] = str(error)
+        if self.attrs:
+            record['attrs'] = self.attrs
+        self.trace.tracer.emit(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(error=exc)
+        return False
+
+
+class Trace:
+    """
+    Spans of one request, nested by a per-trace stack (single-threaded use)
+    Spans de uma requisição, aninhados por uma pilha (uso em uma thread)
+    """
+
+    def __init__(self, tracer, name, trace_id=None, **attrs):
+        self.tracer = tracer
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.stack = []
+        self.root = None
+        self.root = self.span(name, **attrs)
+
+    def span(self, name, **attrs):
+        """
+        Start a child of the innermost open span (or of the root once it ended,
+        e.g. spans of a /chat stream that outlives the view function)
+        Inicia um filho do span aberto mais interno (ou da raiz já finalizada)
+        """
+        if self.stack:
+            parent = self.stack[-1].span_id
+        else:
+            parent = self.root.span_id if self.root is not None else None
+        span = Span(self, name, parent, attrs)
+        self.stack.append(span)
+        return span
+
+    def detached_span(self, name, **attrs):
+        """
+        A child of the innermost open span that is not pushed on the stack, for
+        work that overlaps its siblings or ends in another thread
+        Filho do span mais interno fora da pilha, para trabalho concorrente
+        ou finalizado em outra thread
+        """
+        if self.stack:
+            parent = self.stack[-1].span_id
+        else:
+            parent = self.root.span_id if self.root is not None else None
+        return Span(self, name, parent, attrs, detached=True)
+
+    def finish(self, error=None):
+        """End the root span / Finaliza o span raiz"""
+        self.root.end(error=error)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    """Used when tracing is disabled / Usado com rastreamento desativado"""
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+
+    def span(self, name, **attrs):
+        return _NULL_SPAN
+
+    def detached_span(self, name, **attrs):
+        return _NULL_SPAN
+
+    def finish(self, error=None):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Creates traces and ships finished spans to rotating JSONL files
+    Cria traces e envia spans finalizados para arquivos JSONL rotativos
+
+    Args:
+        log_dir: Directory for trace files / Diretório dos arquivos
+        max_bytes: Size before rotating / Tamanho antes de rotacionar
+        backup_count: Rotated files kept / Arquivos rotacionados mantidos
+        queue_size: Spans buffered before dropping / Spans em buffer antes de descartar
+        max_files: Trace files of all processes kept at start / Arquivos de todos os processos mantidos
+    """
+
+    def __init__(self, log_dir, enabled=True, max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=10000,
+                 max_files=50):
+        self.enabled = enabled
+        self.log_dir = log_dir
+        self.max_files = max_files
+        self.path = os.path.join(log_dir, f"trace-{os.getpid()}.jsonl")
+        self._handler = None
+        self._listener = None
+        if not enabled:
+            return
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            self._prune()
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            file_handler.setFormatter(_JsonLineFormatter())
+            self._handler = _DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+            self._listener = logging.handlers.QueueListener(self._handler.queue, file_handler)
+            self._listener.start()
+            atexit.register(self.close)
+            self._logger = logging.getLogger('hexagent.trace')
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(self._handler)
+        except Exception as e:
+            print(f"[Tracing] Disabled, failed to open {self.path}: {e}")
+            self.enabled = False
+
+    @classmethod
+    def from_config(cls, log_dir, tracing_config):
+        """Build from the 'tracing' config section / Cria a partir da seção 'tracing'"""
+        cfg = tracing_config or {}
+        return cls(
+            log_dir,
+            enabled=cfg.get('enabled', True),
+            max_bytes=cfg.get('max_bytes', 10 * 1024 * 1024),
+            backup_count=cfg.get('backup_count', 5),
+            queue_size=cfg.get('queue_size', 10000),
+            max_files=cfg.get('max_files', 50),
+        )
+
+    def _prune(self):
+        """Drop the oldest trace files of past processes / Remove os arquivos mais antigos"""
+        if not self.max_files:
+            return
+        files = [e for e in os.scandir(self.log_dir) if e.name.startswith('trace') and '.jsonl' in e.name]
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for entry in files[:-self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def start_trace(self, name, trace_id=None, **attrs):
+        if not self.enabled:
+            return _NullTrace(trace_id or uuid.uuid4().hex[:16])
+        return Trace(self, name, trace_id, **attrs)
+
+    def emit(self, record):
+        self._logger.info(record)
+
+    @property
+    def dropped(self):
+        return self._handler.dropped if self._handler else 0
+
+    def close(self):
+        """Flush pending spans and stop the listener / Grava pendentes e para o listener"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
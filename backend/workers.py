@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexAgentGUI - Pre-fork Workers / Workers Pré-fork
+==================================================
+
+Runs the backend as N worker processes sharing one listening socket. The
+parent binds the port and starts each worker as a fresh interpreter with
+the socket inherited by file descriptor, so background threads (tracing,
+storage, supervisor) are created inside each worker instead of being lost
+to fork(). The kernel spreads incoming connections across the workers;
+state they must agree on lives in backend/state.py.
+
+Executa o backend como N processos worker compartilhando um socket. O pai
+abre a porta e inicia cada worker como um interpretador novo herdando o
+socket por descritor, então as threads em background (tracing, storage,
+supervisor) são criadas dentro de cada worker em vez de perdidas no fork().
+O kernel distribui as conexões entre os workers; o estado que precisam
+compartilhar fica em backend/state.py.
+"""
+
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+
+def run_worker(app, fd):
+    """
+    Serve app on an inherited listening socket (inside a worker)
+    Serve o app em um socket herdado (dentro de um worker)
+    """
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    sock = socket.socket(fileno=fd)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    print(f"[Workers] Worker {os.getpid()} serving on {host}:{port}")
+    server.serve_forever()
+
+
+def bind(host, port, backlog=128):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn(script, sock, workers, extra_args=(), env=None):
+    """
+    Start workers running `script --worker-fd FD`; returns the Popen list
+    Inicia workers executando `script --worker-fd FD`; retorna a lista de Popen
+    """
+    fd = sock.fileno()
+    return [
+        subprocess.Popen([sys.executable, script, '--worker-fd', str(fd), *extra_args],
+                         pass_fds=(fd,), env=env)
+        for _ in range(workers)
+    ]
+
+
+def stop(processes, timeout=5.0):
+    """SIGTERM workers, SIGKILL stragglers / SIGTERM nos workers, SIGKILL nos restantes"""
+    for p in processes:
+        if p.poll() is None:
+            p.send_signal(signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+    for p in processes:
+        try:
+            p.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+
+
+def serve(script, host, port, workers, extra_args=()):
+    """
+    Parent process: bind, start workers, restart any that die, stop all on SIGTERM/SIGINT
+    Processo pai: abre a porta, inicia workers, reinicia os que morrem, para todos no SIGTERM/SIGINT
+    """
+    sock = bind(host, port)
+    processes = spawn(script, sock, workers, extra_args)
+    print(f"[Workers] {workers} worker(s) on {host}:{port}")
+    stopping = []
+
+    def handle(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, handle)
+    signal.signal(signal.SIGINT, handle)
+    try:
+        while not stopping:
+            time.sleep(0.5)
+            for i, p in enumerate(processes):
+                if p.poll() is not None and not stopping:
+                    print(f"[Workers] Worker {p.pid} exited with {p.returncode}; restarting")
+                    processes[i] = spawn(script, sock, 1, extra_args)[0]
+    finally:
+        stop(processes)
+        sock.close()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ANSI spans: parse cost and payload size / Spans ANSI: custo e tamanho
+=====================================================================
+
+For synthetic command outputs with different color densities (plain, nmap
+style with a few colored words, linpeas style with colors on most words):
+
+  - parse: ansi_spans.to_spans() cost per MB, the work done per command
+    output when /chat or /execute run with ansi_spans
+  - payload: bytes of the NDJSON event a client receives, raw ANSI chunk vs
+    plain chunk + spans, both serialized like /chat does (json.dumps)
+  - stored: the one-time conversion of a stored output (<id>.plain and
+    <id>.spans) per MB, then GET /outputs/<id> line windows with styled=1 vs
+    the raw window
+
+Para saídas sintéticas com densidades de cor diferentes: custo de
+to_spans() por MB, bytes do evento NDJSON (chunk ANSI bruto vs texto puro +
+spans) e, para saídas armazenadas, a conversão única por MB e as janelas
+GET /outputs/<id> com styled=1 vs a janela bruta.
+
+Usage / Uso:
+    python benchmarks/bench_ansi.py --out ansi.json
+    python benchmarks/bench_ansi.py --size-mb 1 --store-mb 16 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, load_server, summarize, write_results
+
+sys.path.insert(0, BACKEND_DIR)
+from ansi_spans import to_spans
+
+MB = 1024 * 1024
+WORDS = ['open', 'filtered', 'closed', 'http', 'ssh', 'mysql', 'Apache/2.4.41', 'OpenSSH_8.2p1', '/admin',
+         'CVE-2021-41773', 'root', 'www-data', 'SUID', '/usr/bin/passwd', 'writable', 'ação', 'não']
+COLORS = ['31', '32', '33', '34', '36', '1;31', '1;33', '1;32', '91', '93', '1;4;31', '38;5;196']
+
+
+def make_output(profile, size_mb, seed=3):
+    """
+    Synthetic output of about size_mb / Saída sintética de cerca de size_mb
+    plain: no escapes; nmap: ~1 colored word per line; linpeas: most words colored
+    """
+    rng = random.Random(seed)
+    density = {'plain': 0.0, 'nmap': 0.15, 'linpeas': 0.7}[profile]
+    target = size_mb * MB
+    lines = []
+    size = 0
+    while size < target:
+        words = []
+        for _ in range(rng.randint(4, 10)):
+            word = rng.choice(WORDS)
+            if rng.random() < density:
+                word = f"\x1b[{rng.choice(COLORS)}m{word}\x1b[0m"
+            words.append(word)
+        line = ' '.join(words)
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+
+def bench_parse(text, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        plain, spans = to_spans(text)
+        samples.append(time.perf_counter() - started)
+    mb = len(text.encode('utf-8')) / MB
+    best = min(samples)
+    return {'ms_per_mb': round(best / mb * 1000, 2), 'mb_per_second': round(mb / best, 1),
+            'spans': len(spans), 'escape_chars': len(text) - len(plain)}, plain, spans
+
+
+def bench_payload(text, plain, spans):
+    raw_event = json.dumps({"chunk": f"{text}\n\n"}) + "\n"
+    span_event = json.dumps({"chunk": f"{plain}\n\n", "spans": spans}) + "\n"
+    return {'raw_bytes': len(raw_event), 'spans_bytes': len(span_event),
+            'change_percent': round((len(span_event) - len(raw_event)) / len(raw_event) * 100.0, 1)}
+
+
+def bench_stored(server, text, repeat):
+    store = server.output_store
+    output_id = store.save(text)
+    mb = os.path.getsize(store.path(output_id)) / MB
+    started = time.perf_counter()
+    store.spans(output_id).close()
+    convert = time.perf_counter() - started
+    client = server.app.test_client()
+    with store.reader(output_id) as reader:
+        total_lines = reader.index.lines
+    rng = random.Random(5)
+    windows = {}
+    for label, query in (('raw', ''), ('styled', '&styled=1')):
+        samples = []
+        payload = 0
+        for _ in range(repeat):
+            line = rng.randrange(max(1, total_lines - 200))
+            started = time.perf_counter()
+            response = client.get(f"/outputs/{output_id}?line={line}&lines=200{query}")
+            samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            payload += len(response.get_data())
+        windows[label] = dict(summarize(samples), avg_bytes=payload // repeat)
+    base = store.path(output_id)[:-4]
+    for suffix in ('.txt', '.idx', '.plain', '.plain.idx', '.spans'):
+        if os.path.exists(base + suffix):
+            os.remove(base + suffix)
+    return {'convert_ms_per_mb': round(convert / mb * 1000, 2), 'convert_seconds': round(convert, 3),
+            'window_200_lines': windows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=4, help='output size for parse/payload / tamanho da saída')
+    parser.add_argument('--store-mb', type=int, default=64, help='stored output size / tamanho da saída armazenada')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+
+    server = load_server()
+    results = {}
+    for profile in ('plain', 'nmap', 'linpeas'):
+        text = make_output(profile, args.size_mb)
+        parse, plain, spans = bench_parse(text, args.repeat)
+        payload = bench_payload(text, plain, spans)
+        del text, plain, spans
+        stored = bench_stored(server, make_output(profile, args.store_mb), args.repeat * 10)
+        results[profile] = {'parse': parse, 'payload': payload, 'stored': stored}
+        styled, raw = stored['window_200_lines']['styled'], stored['window_200_lines']['raw']
+        print(f"[ANSI] {profile:<8} parse {parse['ms_per_mb']:>7} ms/MB  spans {parse['spans']:>7}"
+              f"  payload {payload['raw_bytes'] / MB:6.2f} -> {payload['spans_bytes'] / MB:6.2f} MB"
+              f" ({payload['change_percent']:+}%)")
+        print(f"       stored: convert {stored['convert_ms_per_mb']} ms/MB, 200-line window p50"
+              f" raw {raw['p50_ms']} ms / {raw['avg_bytes']} B, styled {styled['p50_ms']} ms / {styled['avg_bytes']} B")
+    write_results(args.out, 'ansi', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
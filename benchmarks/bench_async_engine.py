@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Async agent engine vs the sync loop / Motor assíncrono vs o loop síncrono
+=========================================================================
+
+End-to-end /chat task latency (request sent to stream end) and time to the
+first LLM token, with the sync loop and the asyncio engine
+(backend/async_engine.py), over a live local server. The I/O is stubbed:
+FakeAgentCore streams tokens at a fixed rate and sleeps per execute_tool, and
+the web search is replaced by a fixed delay.
+
+  - web_search: a web search, then one command and a final answer. The
+    async engine overlaps the search with the first LLM request
+  - read_only_block: one block of read-only commands (cat ...), run up to
+    concurrent_commands at a time by the async engine
+  - write_block: one block of commands that are not read-only (echo ...),
+    so both engines run them one by one. This is the overhead of the engine
+
+Each scenario also runs the async engine with its features off
+(overlap_web_search false, concurrent_commands 1) and checks that its
+events are identical to the sync loop's.
+
+Latência fim a fim de uma tarefa /chat e tempo até o primeiro token, com o
+loop síncrono e o motor asyncio, com E/S simulada: busca web com atraso
+fixo seguida de um comando; um bloco de comandos somente leitura; e um
+bloco de comandos comuns (o overhead do motor). Cada cenário também
+verifica que o motor assíncrono, com os recursos desligados, gera os
+mesmos eventos que o loop síncrono.
+
+Usage / Uso:
+    python benchmarks/bench_async_engine.py --out async_engine.json
+    python benchmarks/bench_async_engine.py --repeat 3 --concurrent-commands 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import LiveServer, load_server, summarize, write_results
+from fakes import FakeAgentCore
+
+SEARCH_CONTEXT = "\n\n[Web Search Results]:\n1. Stub result\n"
+
+
+def stub_web_search(latency):
+    """Web search replaced by a fixed delay / Busca web trocada por um atraso fixo"""
+    def web_search_context(query, trace):
+        time.sleep(latency)
+        return SEARCH_CONTEXT
+    return web_search_context
+
+
+def chat_task(session, url, body):
+    """
+    One /chat task -> (seconds, seconds to first token, events)
+    Uma tarefa /chat -> (segundos, segundos até o primeiro token, eventos)
+    """
+    started = time.perf_counter()
+    first_token = None
+    events = []
+    with session.post(f"{url}/chat", json=body, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            event = json.loads(line)
+            if 'queue_position' in event:
+                continue
+            if first_token is None and 'chunk' in event:
+                first_token = time.perf_counter() - started
+            events.append(event)
+    return time.perf_counter() - started, first_token, events
+
+
+def scenarios(args):
+    """name -> (FakeAgentCore kwargs, /chat body) / nome -> (argumentos, corpo)"""
+    llm = {'token_rate': args.token_rate, 'tokens_per_reply': args.tokens_per_reply, 'code_iterations': 1,
+           'exec_latency': args.exec_latency}
+    return {
+        'web_search': (dict(llm, commands_per_block=1), {'web_search': True}),
+        'read_only_block': (dict(llm, commands_per_block=args.commands, command="cat /tmp/step-{iteration}-{n}.txt"),
+                            {}),
+        'write_block': (dict(llm, commands_per_block=args.commands), {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help='tasks per engine and scenario / tarefas por cenário')
+    parser.add_argument('--token-rate', type=int, default=100, help='LLM tokens per second / tokens por segundo')
+    parser.add_argument('--tokens-per-reply', type=int, default=40)
+    parser.add_argument('--exec-latency', type=float, default=0.25, help='seconds per command / segundos por comando')
+    parser.add_argument('--search-latency', type=float, default=0.5, help='web search seconds / segundos da busca')
+    parser.add_argument('--commands', type=int, default=4, help='commands per block / comandos por bloco')
+    parser.add_argument('--concurrent-commands', type=int, default=4)
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+
+    server = load_server()
+    server.web_search_context = stub_web_search(args.search_latency)
+    engines = {
+        'sync': {'engine': 'sync'},
+        'async': {'engine': 'async', 'overlap_web_search': True, 'concurrent_commands': args.concurrent_commands},
+    }
+    features_off = {'engine': 'async', 'overlap_web_search': False, 'concurrent_commands': 1}
+    results = {}
+    failed = False
+    session = requests.Session()
+    with LiveServer(server.app) as live:
+        for name, (core_kwargs, extra) in scenarios(args).items():
+            server.core = FakeAgentCore(**core_kwargs)
+            base = dict({'message': 'benchmark task', 'language': 'en', 'max_iterations': 5, 'tool_cache': False,
+                         'llm_cache': 'off', 'routing': False}, **extra)
+            results[name] = {}
+            for engine, options in engines.items():
+                chat_task(session, live.url, dict(base, **options))
+                samples, first_tokens = [], []
+                for _ in range(args.repeat):
+                    seconds, first_token, _ = chat_task(session, live.url, dict(base, **options))
+                    samples.append(seconds)
+                    first_tokens.append(first_token)
+                results[name][engine] = dict(summarize(samples), first_token_p50_ms=summarize(first_tokens)['p50_ms'])
+
+            _, _, sync_events = chat_task(session, live.url, dict(base, **engines['sync']))
+            _, _, async_events = chat_task(session, live.url, dict(base, **features_off))
+            equivalent = sync_events == async_events
+            failed = failed or not equivalent
+            sync, fast = results[name]['sync'], results[name]['async']
+            results[name].update(equivalent_events=equivalent,
+                                 p50_speedup=round(sync['p50_ms'] / fast['p50_ms'], 2))
+            print(f"[Engine] {name:<16} sync p50 {sync['p50_ms']:>8} ms p95 {sync['p95_ms']:>8} ms"
+                  f" | async p50 {fast['p50_ms']:>8} ms p95 {fast['p95_ms']:>8} ms"
+                  f" | x{results[name]['p50_speedup']}  first token {sync['first_token_p50_ms']} ->"
+                  f" {fast['first_token_p50_ms']} ms  events {'identical' if equivalent else 'DIFFERENT'}")
+    write_results(args.out, 'async_engine', results, vars(args))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backend benchmark suite / Suíte de benchmark do backend
+========================================================
+
+Runs backend/server.py with a FakeAgentCore on a local port and measures:
+  - /chat stream throughput at several token rates
+  - per-iteration overhead of the agent loop
+  - /complete, /history/system, /save_session and /load_session at several sizes
+
+Executa backend/server.py com um FakeAgentCore em porta local e mede:
+  - vazão do stream do /chat em várias taxas de tokens
+  - overhead por iteração do loop do agente
+  - /complete, /history/system, /save_session e /load_session em vários tamanhos
+
+Usage / Uso:
+    python benchmarks/bench_backend.py --out bench-$(git rev-parse --short HEAD).json
+    python benchmarks/compare.py old.json new.json
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import LiveServer, load_server, summarize, time_calls, write_results
+from fakes import FakeAgentCore
+
+
+def chat_request(session, url, max_iterations=1, **extra):
+    """
+    Run one /chat task to completion; returns (seconds, bytes, lines)
+    Executa uma tarefa /chat até o fim; retorna (segundos, bytes, linhas)
+    """
+    body = {'message': 'benchmark task', 'language': 'en', 'max_iterations': max_iterations,
+            'tool_cache': False, 'llm_cache': 'off', 'routing': False}
+    body.update(extra)
+    start = time.perf_counter()
+    total_bytes = 0
+    lines = 0
+    with session.post(f"{url}/chat", json=body, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            total_bytes += len(line) + 1
+            lines += 1
+    return time.perf_counter() - start, total_bytes, lines
+
+
+def bench_chat_stream(server, url, repeat, token_rates, tokens_per_reply):
+    """Stream throughput per token rate / Vazão do stream por taxa de tokens"""
+    results = {}
+    session = requests.Session()
+    for rate in token_rates:
+        server.core = FakeAgentCore(token_rate=rate, tokens_per_reply=tokens_per_reply)
+        samples, sizes, counts = [], [], []
+        for _ in range(repeat):
+            seconds, size, lines = chat_request(session, url)
+            samples.append(seconds)
+            sizes.append(size)
+            counts.append(lines)
+        total = sum(samples)
+        results[f"rate_{rate or 'max'}"] = dict(
+            summarize(samples),
+            chunks_per_sec=round(sum(counts) / total, 1),
+            bytes_per_sec=round(sum(sizes) / total, 1),
+        )
+    return results
+
+
+def bench_iteration_overhead(server, url, repeat, iterations_list, output_size):
+    """
+    Loop cost per iteration with zero-latency fakes / Custo por iteração com fakes instantâneos
+    """
+    results = {}
+    session = requests.Session()
+    for iterations in iterations_list:
+        server.core = FakeAgentCore(tokens_per_reply=10, code_iterations=iterations,
+                                    output_size=output_size)
+        samples = [chat_request(session, url, max_iterations=iterations + 1)[0] for _ in range(repeat)]
+        summary = summarize(samples)
+        summary['per_iteration_ms'] = round(summary['mean_ms'] / (iterations + 1), 3)
+        results[f"iterations_{iterations}"] = summary
+    return results
+
+
+def bench_chat_concurrency(server, url, concurrency, tasks_per_worker, exec_latency):
+    """Concurrent tasks through admission control / Tarefas concorrentes com admissão"""
+    server.core = FakeAgentCore(token_rate=0, tokens_per_reply=20, code_iterations=2,
+                                exec_latency=exec_latency)
+    samples = []
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        for _ in range(tasks_per_worker):
+            seconds = chat_request(session, url, max_iterations=3, session_id=f"w{threading.get_ident()}")[0]
+            with lock:
+                samples.append(seconds)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return dict(summarize(samples), concurrency=concurrency, tasks_per_sec=round(len(samples) / elapsed, 2))
+
+
+def bench_complete(url, repeat):
+    session = requests.Session()
+    results = {}
+    for prefix in ('ls -', 'py', 'cat /etc/'):
+        samples = time_calls(lambda: session.post(f"{url}/complete", json={'prefix': prefix}).raise_for_status(), repeat)
+        results[prefix] = summarize(samples)
+    return results
+
+
+def bench_history(server, url, repeat, sizes):
+    """/history/system vs shell history size / vs tamanho do histórico"""
+    session = requests.Session()
+    results = {}
+    history_path = os.path.join(os.path.expanduser('~'), '.bash_history')
+    for size in sizes:
+        with open(history_path, 'w') as f:
+            for i in range(size):
+                f.write(f"nmap -sV 10.0.{i % 255}.{i % 7} --top-ports {i}\n")
+        samples = time_calls(lambda: session.get(f"{url}/history/system").raise_for_status(), repeat)
+        results[f"lines_{size}"] = summarize(samples)
+    return results
+
+
+def bench_sessions(url, repeat, sizes, block_bytes):
+    """/save_session and /load_session vs number of blocks / vs número de blocos"""
+    session = requests.Session()
+    results = {}
+    for size in sizes:
+        blocks = [{'type': 'agent', 'content': 'x' * block_bytes, 'id': i} for i in range(size)]
+        payload = {'name': f"bench_{size}", 'blocks': blocks}
+        save = time_calls(lambda: session.post(f"{url}/save_session", json=payload).raise_for_status(), repeat)
+        load = time_calls(lambda: session.get(f"{url}/load_session", params={'name': f"bench_{size}"}).raise_for_status(), repeat)
+        results[f"blocks_{size}"] = {'save': summarize(save), 'load': summarize(load)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', help='JSON results file / arquivo JSON de resultados')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--quick', action='store_true', help='smaller sizes for a fast smoke run')
+    args = parser.parse_args()
+
+    quick = args.quick
+    repeat = 5 if quick else args.repeat
+    params = {
+        'repeat': repeat,
+        'token_rates': [0, 200] if quick else [0, 50, 200, 1000],
+        'tokens_per_reply': 100 if quick else 500,
+        'iterations': [1, 5] if quick else [1, 5, 20],
+        'output_size': 4096,
+        'concurrency': 4 if quick else 8,
+        'history_sizes': [1000, 10000] if quick else [1000, 10000, 100000],
+        'session_sizes': [10, 1000] if quick else [10, 1000, 10000],
+        'block_bytes': 256,
+    }
+
+    server = load_server()
+    results = {}
+    with LiveServer(server.app) as live:
+        url = live.url
+        print("[Bench] chat stream throughput")
+        results['chat_stream'] = bench_chat_stream(server, url, repeat, params['token_rates'], params['tokens_per_reply'])
+        print("[Bench] per-iteration overhead")
+        results['chat_iterations'] = bench_iteration_overhead(server, url, repeat, params['iterations'], params['output_size'])
+        print("[Bench] concurrent chat")
+        results['chat_concurrency'] = bench_chat_concurrency(server, url, params['concurrency'], 2 if quick else 5, 0.01)
+        print("[Bench] /complete")
+        results['complete'] = bench_complete(url, repeat)
+        print("[Bench] /history/system")
+        results['history_system'] = bench_history(server, url, repeat, params['history_sizes'])
+        print("[Bench] sessions")
+        results['sessions'] = bench_sessions(url, repeat, params['session_sizes'], params['block_bytes'])
+
+    document = write_results(args.out, 'backend', results, params)
+    if not args.out:
+        import json
+        print(json.dumps(document, indent=2))
+
+
+if __name__ == '__main__':
+    main()
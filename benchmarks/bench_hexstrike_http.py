@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HexStrike HTTP client benchmark / Benchmark do cliente HTTP do HexStrike
+=========================================================================
+
+Measures per-call overhead of backend -> HexStrike calls against a local stub
+(benchmarks/stub_hexstrike_server.py), with a new connection per call (plain
+requests.get/post, the previous behaviour) and with the pooled keep-alive
+client from backend/hexstrike_client.py, sequentially and with N threads.
+Pooled commands go the way the backend sends them: through an AgentCore-like
+client whose own session is attached with HexStrikeHTTP.attach(). The run
+checks that the client's own headers still reach the stub and that every
+command is counted.
+
+Mede o overhead por chamada do backend -> HexStrike com um stub local, com
+uma conexão nova por chamada (requests.get/post, comportamento anterior) e
+com o cliente keep-alive com pool de backend/hexstrike_client.py, em
+sequência e com N threads. Os comandos com pool passam por um cliente no
+estilo do AgentCore cuja sessão é anexada com HexStrikeHTTP.attach().
+
+Usage / Uso:
+    python benchmarks/bench_hexstrike_http.py --calls 500 --threads 8 --out http.json
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, summarize, write_results
+from stub_hexstrike_server import start_stub
+
+sys.path.insert(0, BACKEND_DIR)
+from hexstrike_client import HexStrikeHTTP
+
+
+def unpooled_calls(url):
+    def health():
+        requests.get(f"{url}/health", timeout=(2, 2)).json()
+
+    def command():
+        requests.post(f"{url}/api/command", json={'command': 'id'}, timeout=(2, 30)).json()
+    return health, command
+
+
+class AgentCoreClient:
+    """
+    Stand-in for AgentCore's HexStrike client (core.body): its own session and headers
+    Substituto do cliente HexStrike do AgentCore: sessão e cabeçalhos próprios
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+        self.session.headers['X-Client'] = 'agentcore'
+
+    def execute_tool(self, command):
+        response = self.session.post(f"{self.url}/api/command", json={'command': command})
+        response.raise_for_status()
+        return response.json()
+
+
+def pooled_calls(client, url):
+    body = AgentCoreClient(url)
+    if not client.attach(body):
+        raise SystemExit("[HTTP] attach() did not accept the AgentCore-like client")
+    return client.check_health, lambda: body.execute_tool('id')
+
+
+def run(fn, calls, threads):
+    """
+    Call fn() calls times spread over threads; returns (durations, wall seconds)
+    Executa fn() calls vezes divididas entre threads; retorna (durações, segundos)
+    """
+    durations = []
+    lock = threading.Lock()
+    per_thread = max(1, calls // threads)
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            fn()
+            local.append(time.perf_counter() - start)
+        with lock:
+            durations.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return durations, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--output-size', type=int, default=256)
+    parser.add_argument('--out', help='JSON results file / arquivo JSON de resultados')
+    args = parser.parse_args()
+
+    stub, url = start_stub(output_size=args.output_size)
+    results = {}
+    for mode in ('unpooled', 'pooled'):
+        client = HexStrikeHTTP(url, pool_size=args.pool_size)
+        health, command = unpooled_calls(url) if mode == 'unpooled' else pooled_calls(client, url)
+        for name, fn in (('health', health), ('command', command)):
+            for threads in (1, args.threads):
+                stub.connections_seen.clear()
+                fn()  # warm up / aquece
+                durations, wall = run(fn, args.calls, threads)
+                key = f"{mode}.{name}.threads_{threads}"
+                results.setdefault(mode, {}).setdefault(name, {})[f"threads_{threads}"] = {
+                    'latency': summarize(durations),
+                    'calls_per_sec': round(len(durations) / wall, 1),
+                    'connections_opened': len(stub.connections_seen),
+                }
+                summary = results[mode][name][f"threads_{threads}"]
+                print(f"[HTTP] {key:32s} p50 {summary['latency']['p50_ms']:7.3f} ms  "
+                      f"{summary['calls_per_sec']:8.1f} calls/s  {summary['connections_opened']:4d} connections")
+        if mode == 'pooled':
+            results['pooled']['client_stats'] = client.stats()
+        client.close()
+    stub.shutdown()
+    failed = False
+    if 'agentcore' not in stub.client_headers:
+        print("[HTTP] FAIL the attached session lost its own X-Client header")
+        failed = True
+    expected = sum(1 + max(1, args.calls // threads) * threads for threads in (1, args.threads))
+    commands = results['pooled']['client_stats']['agent_calls']
+    if commands != expected:
+        print(f"[HTTP] FAIL {commands} AgentCore calls counted, expected {expected}")
+        failed = True
+    write_results(args.out, 'hexstrike_http', results,
+                  {'calls': args.calls, 'threads': args.threads, 'pool_size': args.pool_size,
+                   'output_size': args.output_size})
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Agent loop memory check / Verificação de memória do loop do agente
+===================================================================
+
+Runs /chat tasks in-process with a FakeAgentCore that returns large command
+outputs and measures the tracemalloc peak of each task. Exits with status 1
+when a task peaks above the limit, so it can gate changes to the loop
+buffers ("memory" section of config.json).
+
+Executa tarefas /chat no mesmo processo com um FakeAgentCore que retorna
+saídas grandes e mede o pico do tracemalloc de cada tarefa. Sai com status 1
+quando uma tarefa passa do limite, servindo de verificação para mudanças nos
+buffers do loop (seção "memory" do config.json).
+
+Usage / Uso:
+    python benchmarks/bench_memory.py --out memory.json
+    python benchmarks/bench_memory.py --sizes 1048576 16777216 --limit-factor 3
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import load_server, write_results
+from fakes import FakeAgentCore
+
+MB = 1024 * 1024
+
+
+def run_task(client, iterations):
+    """
+    Run one /chat task to completion; returns streamed bytes
+    Executa uma tarefa /chat até o fim; retorna bytes enviados
+    """
+    body = {'message': 'memory task', 'language': 'en', 'max_iterations': iterations + 1,
+            'tool_cache': False, 'llm_cache': 'off', 'routing': False, 'record': False}
+    response = client.post('/chat', json=body)
+    size = 0
+    try:
+        for piece in response.response:
+            size += len(piece)
+    finally:
+        response.close()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[MB, 8 * MB],
+                        help='execute_tool output sizes in bytes / tamanhos de saída')
+    parser.add_argument('--iterations', type=int, default=5, help='iterations with commands per task')
+    parser.add_argument('--commands', type=int, default=2, help='commands per iteration')
+    parser.add_argument('--limit-factor', type=float, default=3.0,
+                        help='allowed peak as a multiple of one output / pico permitido em múltiplos de uma saída')
+    parser.add_argument('--limit-base-mb', type=float, default=8.0,
+                        help='allowed peak on top of that / folga adicional em MB')
+    parser.add_argument('--out', help='JSON results file / arquivo JSON de resultados')
+    args = parser.parse_args()
+
+    server = load_server()
+    client = server.app.test_client()
+    results = {}
+    failed = False
+    for size in args.sizes:
+        server.core = FakeAgentCore(tokens_per_reply=20, code_iterations=args.iterations,
+                                    commands_per_block=args.commands, output_size=size)
+        run_task(client, args.iterations)  # warm up imports and caches / aquece imports
+        tracemalloc.start()
+        start = time.perf_counter()
+        streamed = run_task(client, args.iterations)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        limit = int(size * args.limit_factor + args.limit_base_mb * MB)
+        ok = peak <= limit
+        failed = failed or not ok
+        results[f"output_{size}"] = {
+            'peak_traced_memory_bytes': peak,
+            'limit_bytes': limit,
+            'stream_bytes': streamed,
+            'task_seconds': round(elapsed, 3),
+        }
+        status = 'ok' if ok else 'OVER LIMIT'
+        print(f"[Memory] output {size / MB:.1f} MB: peak {peak / MB:.1f} MB "
+              f"(limit {limit / MB:.1f} MB) {status}")
+
+    params = {'sizes': args.sizes, 'iterations': args.iterations, 'commands': args.commands,
+              'limit_factor': args.limit_factor, 'limit_base_mb': args.limit_base_mb}
+    write_results(args.out, 'memory', results, params)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stored output windows / Janelas de saídas armazenadas
+======================================================
+
+Writes a large synthetic command output into the output store and measures
+GET /outputs/<id> through the Flask app: first line-index build, byte
+windows, line windows at random lines, and grep, with the tracemalloc peak
+and RSS growth of each. The baseline is the old path, the whole output
+loaded and sent as one JSON string.
+
+Grava uma saída sintética grande no armazenamento e mede GET /outputs/<id>
+pelo app Flask: criação do índice de linhas, janelas de bytes, janelas de
+linhas aleatórias e grep, com o pico do tracemalloc e o crescimento do RSS.
+A referência é o caminho antigo, a saída inteira carregada e enviada como
+uma única string JSON.
+
+Usage / Uso:
+    python benchmarks/bench_outputs.py --size-mb 500 --out outputs.json
+    python benchmarks/bench_outputs.py --size-mb 64 --skip-baseline
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import load_server, summarize, write_results
+
+MB = 1024 * 1024
+
+
+def rss_mb():
+    """Current resident set size / Tamanho residente atual"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / MB
+
+
+def write_output(store, size_mb, seed=7):
+    """
+    Stream a synthetic scan log into the store without holding it in memory
+    Grava um log sintético de scan no armazenamento sem mantê-lo em memória
+    """
+    rng = random.Random(seed)
+    output_id = '%032x' % rng.getrandbits(128)
+    os.makedirs(store.directory, exist_ok=True)
+    target = size_mb * MB
+    written = lines = 0
+    with open(store.path(output_id), 'w', encoding='utf-8') as f:
+        while written < target:
+            block = []
+            for _ in range(1000):
+                port = rng.randint(1, 65535)
+                state = 'open' if rng.random() < 0.001 else 'filtered'
+                block.append(f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}:{port}/tcp "
+                             f"{state} {'x' * rng.randint(0, 60)}\n")
+            chunk = ''.join(block)
+            f.write(chunk)
+            written += len(chunk)
+            lines += len(block)
+    return output_id, lines
+
+
+def check_grep_eof(store, client):
+    """
+    Patterns that match empty ($, ^, x*) report each line once, also past the
+    last line / Padrões que casam vazio reportam cada linha uma vez
+    """
+    for text in ("abc\ndef\nghi", "abc\ndef\nghi\n"):
+        output_id = store.save(text)
+        for pattern in ('$', '^', 'x*'):
+            response = client.get(f"/outputs/{output_id}", query_string={'grep': pattern})
+            lines = [match['line'] for match in response.get_json()['matches']]
+            assert lines == [0, 1, 2], f"grep {pattern!r} on {text!r}: lines {lines}, expected [0, 1, 2]"
+        os.remove(store.path(output_id))
+    print("[Outputs] grep stops at the end of the output")
+
+
+def measure(fn):
+    """(seconds, tracemalloc peak MB, RSS growth MB, result) / (segundos, pico, RSS, resultado)"""
+    rss_before = rss_mb()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / MB
+    tracemalloc.stop()
+    return elapsed, round(peak, 2), round(rss_mb() - rss_before, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=500, help='output size / tamanho da saída')
+    parser.add_argument('--repeat', type=int, default=50, help='random windows per kind / janelas por tipo')
+    parser.add_argument('--skip-baseline', action='store_true', help='do not load the whole output / não carrega tudo')
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+
+    server = load_server()
+    client = server.app.test_client()
+    check_grep_eof(server.output_store, client)
+    print(f"[Outputs] Writing a {args.size_mb} MB output...")
+    output_id, total_lines = write_output(server.output_store, args.size_mb)
+    url = f"/outputs/{output_id}"
+    results = {'size_mb': args.size_mb, 'lines': total_lines}
+
+    def get(query):
+        response = client.get(f"{url}?{query}")
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+        return response.get_json()
+
+    seconds, peak, rss, window = measure(lambda: get('line=0&lines=1'))
+    assert window['total_lines'] == total_lines, (window['total_lines'], total_lines)
+    results['index_build'] = {'seconds': round(seconds, 3), 'peak_mb': peak, 'rss_growth_mb': rss}
+    print(f"[Outputs] Line index: {seconds:.2f}s, peak {peak} MB")
+
+    rng = random.Random(1)
+    size = args.size_mb * MB
+    kinds = {
+        'bytes_64k': lambda: get(f"offset={rng.randrange(size)}&length=65536"),
+        'lines_200': lambda: get(f"line={rng.randrange(total_lines)}&lines=200"),
+        'grep_open_100': lambda: get(f"grep=%20open%20&offset={rng.randrange(size)}&max_matches=100"),
+    }
+    for name, fn in kinds.items():
+        samples, peaks, rss_growth = [], [], []
+        for _ in range(args.repeat):
+            seconds, peak, rss, _ = measure(fn)
+            samples.append(seconds)
+            peaks.append(peak)
+            rss_growth.append(rss)
+        results[name] = dict(summarize(samples), peak_mb=max(peaks), rss_growth_mb=max(rss_growth))
+        print(f"[Outputs] {name}: p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms,"
+              f" peak {results[name]['peak_mb']} MB")
+
+    # Full grep of the whole output / grep em toda a saída
+    seconds, peak, rss, window = measure(lambda: get("grep=%20open%20&max_matches=10000"))
+    results['grep_full_scan'] = {'seconds': round(seconds, 3), 'matches': len(window['matches']), 'peak_mb': peak}
+    print(f"[Outputs] grep whole output: {seconds:.2f}s, {len(window['matches'])} matches, peak {peak} MB")
+
+    if not args.skip_baseline:
+        # Old path: the whole output as one JSON string / Caminho antigo: a saída inteira numa string JSON
+        path = server.output_store.path(output_id)
+
+        def whole():
+            with open(path, 'r', encoding='utf-8') as f:
+                return len(json.dumps({"result": f.read()}))
+
+        seconds, peak, rss, _ = measure(whole)
+        results['baseline_whole_json'] = {'seconds': round(seconds, 3), 'peak_mb': peak, 'rss_growth_mb': rss}
+        print(f"[Outputs] Baseline whole JSON: {seconds:.2f}s, peak {peak} MB")
+
+    os.remove(server.output_store.path(output_id))
+    write_results(args.out, 'outputs', results, vars(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Provider router against local stubs / Roteador contra stubs locais
+==================================================================
+
+Drives backend/provider_router.py against stub OpenAI-compatible servers
+(stub_openai_server.py): a fast one, a slow one and one that always fails.
+Each stub answers with its own name, so the provider that served a request
+is visible in the stream. Exits 1 when a check fails:
+
+  - ranking: once both are measured, every request goes to the fast stub
+  - hedging: with the slow stub ranked first, a backup request starts after
+    hedge_after_seconds and the fast stub answers before the slow one would
+  - circuit: after failure_threshold errors the failing stub leaves the
+    rotation and gets no more requests until the cooldown
+
+Exercita o provider_router.py contra stubs compatíveis com OpenAI (rápido,
+lento e sempre falhando) e verifica ranking, hedge e circuit breaker. Sai
+com 1 se uma verificação falhar.
+
+Usage / Uso:
+    python benchmarks/bench_router.py --out router.json
+    python benchmarks/bench_router.py --fast-ttft 0.02 --slow-ttft 1.0 --hedge-after 0.2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, summarize, write_results
+from stub_openai_server import start_stub
+
+sys.path.insert(0, BACKEND_DIR)
+from provider_router import ProviderError, ProviderRouter
+
+
+def provider(url):
+    return {'BASE_URL': url, 'MODEL_NAME': 'stub-model', 'API_KEY': 'stub-key'}
+
+
+def ask(router):
+    """One chat_step -> (provider that answered, seconds to first token) / (provedor, TTFT)"""
+    started = time.perf_counter()
+    stream = router.chat_step('benchmark prompt')
+    first = next(stream)
+    ttft = time.perf_counter() - started
+    text = first + ''.join(stream)
+    return text.split()[0], ttft
+
+
+def check(results, name, ok, detail):
+    results['checks'][name] = {'ok': bool(ok), 'detail': detail}
+    print(f"[Router] {'OK  ' if ok else 'FAIL'} {name}: {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fast-ttft', type=float, default=0.05)
+    parser.add_argument('--slow-ttft', type=float, default=0.6)
+    parser.add_argument('--hedge-after', type=float, default=0.15)
+    parser.add_argument('--failure-threshold', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=10, help='requests per check / requisições por verificação')
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+
+    stubs = {name: start_stub(ttft=ttft, tps=0, fail_rate=fail_rate, reply=f"{name} reply")
+             for name, ttft, fail_rate in (('fast', args.fast_ttft, 0.0), ('slow', args.slow_ttft, 0.0),
+                                           ('failing', 0.0, 1.0))}
+    urls = {name: url for name, (_, url) in stubs.items()}
+    results = {'checks': {}}
+
+    # Ranking: unmeasured providers go first, then the fastest wins
+    # Ranking: sem medição vão primeiro, depois vence o mais rápido
+    router = ProviderRouter({'fast': provider(urls['fast']), 'slow': provider(urls['slow'])})
+    for _ in range(2):
+        ask(router)
+    served, ttfts = [], []
+    for _ in range(args.repeat):
+        name, ttft = ask(router)
+        served.append(name)
+        ttfts.append(ttft)
+    results['ranking'] = dict(summarize(ttfts), served={n: served.count(n) for n in set(served)},
+                              stats=router.stats())
+    check(results, 'ranking', served == ['fast'] * args.repeat,
+          f"{served.count('fast')}/{args.repeat} requests to fast, TTFT p50 {results['ranking']['p50_ms']} ms")
+
+    # Hedging: the slow stub is ranked first, the hedge goes to the fast one
+    # Hedge: o stub lento fica em primeiro, o hedge vai para o rápido
+    router = ProviderRouter({'fast': provider(urls['fast']), 'slow': provider(urls['slow'])},
+                            hedge_after_seconds=args.hedge_after)
+    served, ttfts = [], []
+    for _ in range(args.repeat):
+        router.providers['slow'].ttft = 0.0
+        router.providers['fast'].ttft = 1.0
+        name, ttft = ask(router)
+        served.append(name)
+        ttfts.append(ttft)
+    results['hedging'] = dict(summarize(ttfts), served={n: served.count(n) for n in set(served)})
+    p50 = results['hedging']['p50_ms'] / 1000.0
+    check(results, 'hedging', served == ['fast'] * args.repeat and args.hedge_after <= p50 < args.slow_ttft,
+          f"{served.count('fast')}/{args.repeat} answered by fast, TTFT p50 {p50 * 1000:.1f} ms"
+          f" (hedge after {args.hedge_after * 1000:.0f} ms, slow {args.slow_ttft * 1000:.0f} ms)")
+
+    # Circuit breaker: the failing stub is ranked first until its circuit opens
+    # Circuit breaker: o stub com falhas fica em primeiro até o circuito abrir
+    router = ProviderRouter({'failing': provider(urls['failing']), 'fast': provider(urls['fast'])},
+                            failure_threshold=args.failure_threshold, cooldown_seconds=60)
+    served = []
+    for _ in range(args.failure_threshold + args.repeat):
+        if router.providers['fast'].ttft is not None:
+            router.providers['fast'].ttft = max(router.providers['fast'].ttft, 1.0)
+        try:
+            served.append(ask(router)[0])
+        except ProviderError as e:
+            served.append(f"error: {e}")
+    stats = router.stats()
+    results['circuit'] = {'served': {n: served.count(n) for n in set(served)}, 'stats': stats}
+    check(results, 'circuit', stats['failing']['circuit'] == 'open'
+          and stats['failing']['requests'] == args.failure_threshold and served == ['fast'] * len(served),
+          f"failing stub got {stats['failing']['requests']} requests, circuit {stats['failing']['circuit']},"
+          f" {served.count('fast')}/{len(served)} answered by fast")
+
+    for server, _ in stubs.values():
+        server.shutdown()
+    write_results(args.out, 'router', results, vars(args))
+    sys.exit(0 if all(c['ok'] for c in results['checks'].values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
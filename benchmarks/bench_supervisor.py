@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Process supervisor benchmark / Benchmark do supervisor de processos
+====================================================================
+
+Runs backend/supervisor.py against a small Python HTTP child with a /health
+endpoint (standing in for hexstrike_server.py) and measures:
+  - start until healthy
+  - graceful stop (child exits on SIGTERM)
+  - forced stop (child ignores SIGTERM, SIGKILL after the deadline)
+  - restart, and recovery after the child is killed from outside
+
+Executa backend/supervisor.py com um filho HTTP em Python com endpoint
+/health (no lugar do hexstrike_server.py) e mede:
+  - início até ficar saudável
+  - parada graciosa (filho sai com SIGTERM)
+  - parada forçada (filho ignora SIGTERM, SIGKILL após o prazo)
+  - reinício, e recuperação após o filho ser morto externamente
+
+Usage / Uso:
+    python benchmarks/bench_supervisor.py --repeat 10 --out supervisor.json
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, summarize, write_results
+
+sys.path.insert(0, BACKEND_DIR)
+from supervisor import ProcessSupervisor
+
+CHILD = r'''
+import signal, sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+if sys.argv[2] == "ignore-term":
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/health" else 404)
+        self.end_headers()
+    def log_message(self, *args):
+        pass
+HTTPServer(("127.0.0.1", int(sys.argv[1])), Handler).serve_forever()
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_supervisor(mode, **overrides):
+    port = free_port()
+    options = dict(health_interval=0.2, health_timeout=0.5, failure_threshold=1, startup_grace=2.0,
+                   backoff_initial=0.1, backoff_max=1.0, stop_timeout=0.5)
+    options.update(overrides)
+    return ProcessSupervisor('bench-child', [sys.executable, '-c', CHILD, str(port), mode],
+                             health_url=f"http://127.0.0.1:{port}/health", **options)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help='JSON results file / arquivo JSON de resultados')
+    args = parser.parse_args()
+
+    samples = {'start_to_healthy': [], 'stop_graceful': [], 'stop_forced': [], 'restart_to_healthy': [],
+               'crash_recovery': []}
+    for _ in range(args.repeat):
+        sup = make_supervisor('exit-on-term')
+        samples['start_to_healthy'].append(timed(lambda: sup.start() and sup.wait_healthy(10))[0])
+        samples['restart_to_healthy'].append(timed(lambda: sup.restart() and sup.wait_healthy(10))[0])
+
+        # Kill from outside; the monitor restarts it / Morto de fora; o monitor reinicia
+        old_pid = sup.process.pid
+        os.kill(old_pid, signal.SIGKILL)
+        start = time.perf_counter()
+        while not (sup.process.pid != old_pid and sup.check_health()) and time.perf_counter() - start < 10:
+            time.sleep(0.01)
+        samples['crash_recovery'].append(time.perf_counter() - start)
+
+        samples['stop_graceful'].append(timed(sup.stop)[0])
+        sup.shutdown()
+
+        stubborn = make_supervisor('ignore-term')
+        stubborn.start()
+        stubborn.wait_healthy(10)
+        seconds, result = timed(stubborn.stop)
+        assert result['forced'], 'child should have needed SIGKILL'
+        samples['stop_forced'].append(seconds)
+        stubborn.shutdown()
+
+    results = {name: summarize(values) for name, values in samples.items()}
+    for name, summary in results.items():
+        print(f"[Supervisor] {name:20s} p50 {summary['p50_ms']:8.1f} ms  max {summary['max_ms']:8.1f} ms")
+    write_results(args.out, 'supervisor', results, {'repeat': args.repeat})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Session task memory: prompt size and iterations / Memória de tarefas: prompt e iterações
+========================================================================================
+
+Runs a session of related /chat tasks against one target twice, with task
+memory off and on, using a scripted AgentCore: a task needs some facts (open
+ports, web paths, ...); while a fact is not in its prompt the agent runs the
+discovery command that reveals it, then runs the task's own command and
+concludes. Without memory every task rediscovers what earlier tasks already
+found; with memory the facts arrive as recalled snippets.
+
+Reports per task: chat_step calls (iterations), commands, first prompt size
+and total prompt characters sent to the model.
+
+Executa uma sessão de tarefas /chat relacionadas duas vezes, com a memória
+desligada e ligada, usando um AgentCore roteirizado: cada tarefa precisa de
+fatos (portas, caminhos web, ...); enquanto um fato não está no prompt o
+agente roda o comando de descoberta, depois o comando da tarefa e conclui.
+Sem memória cada tarefa redescobre o que as anteriores já acharam; com
+memória os fatos chegam como trechos recuperados.
+
+Usage / Uso:
+    python benchmarks/bench_task_memory.py --out task_memory.json
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import load_server, write_results
+from fakes import FakeBody
+
+TARGET = '10.0.0.5'
+
+# fact -> (discovery command, marker line in its output) / fato -> (comando, marcador)
+FACTS = {
+    'ports': (f"nmap -sV -p- {TARGET}", f"22/tcp open ssh | 80/tcp open http | 3306/tcp open mysql on {TARGET}"),
+    'web_paths': (f"gobuster dir -u http://{TARGET}/ -w common.txt", f"/admin (Status: 302) /backup.zip (Status: 200) on {TARGET}"),
+    'mysql_version': (f"nmap -sV -p3306 --script mysql-info {TARGET}", f"mysql 5.7.31 protocol 10 on {TARGET}"),
+}
+
+# (message, facts needed, task command, its output marker) / (mensagem, fatos, comando, marcador)
+TASKS = [
+    (f"scan open ports and services on {TARGET}", ['ports'], None, None),
+    (f"enumerate web paths of the http server on {TARGET}", ['ports', 'web_paths'], None, None),
+    (f"download /backup.zip from the http server on {TARGET} and list it",
+     ['ports', 'web_paths'], f"curl -s http://{TARGET}/backup.zip -o b.zip && unzip -l b.zip", "db.sql config.php"),
+    (f"check the mysql service on {TARGET} for known vulnerabilities",
+     ['ports', 'mysql_version'], f"searchsploit mysql 5.7.31", "CVE-2020-14812"),
+    (f"try default credentials on mysql 3306 at {TARGET}",
+     ['ports', 'mysql_version'], f"hydra -L users.txt -P pass.txt mysql://{TARGET}", "no valid credentials"),
+    (f"write a short report of the findings on {TARGET}: ports, web paths, mysql",
+     ['ports', 'web_paths', 'mysql_version'], None, None),
+]
+
+
+class ScriptedSessionCore:
+    """
+    AgentCore that needs facts before acting / AgentCore que precisa de fatos antes de agir
+    """
+
+    def __init__(self, output_filler=2000):
+        self.brain = object()
+        self.body = FakeBody()
+        self.output_filler = output_filler
+        self.prompts = []
+        self.discovered = set()
+
+    def _task(self, prompt):
+        # The request itself comes after any recalled snippet quoting older tasks
+        # A requisição vem depois dos trechos que citam tarefas antigas
+        found = [(prompt.rfind(task[0]), task) for task in TASKS if task[0] in prompt]
+        if not found:
+            raise ValueError("unknown task in prompt")
+        return max(found, key=lambda f: f[0])[1]
+
+    def chat_step(self, prompt):
+        self.prompts.append(len(prompt))
+        message, needs, command, marker = self._task(prompt)
+        # Facts found earlier in this task count even if the loop's feedback dropped them
+        # Fatos achados antes nesta tarefa contam mesmo se o feedback do loop os descartou
+        self.discovered.update(fact for fact in needs if FACTS[fact][1] in prompt)
+        # The closing summary restates what was used, as a model would / O resumo final repete os fatos
+        known = '; '.join(FACTS[fact][1] for fact in needs)
+        if marker and marker in prompt:
+            yield f"Tarefa concluída. {marker}. Findings: {known}."
+            return
+        missing = [fact for fact in needs if fact not in self.discovered]
+        if missing:
+            yield f"I need {missing[0]} first.\n```bash\n{FACTS[missing[0]][0]}\n```\n"
+        elif command:
+            yield f"Now the task itself.\n```bash\n{command}\n```\n"
+        else:
+            yield f"Tarefa concluída. Findings: {known}."
+
+    def execute_tool(self, cmd):
+        marker = next((m for c, m in FACTS.values() if c == cmd), None)
+        if marker is None:
+            marker = next((t[3] for t in TASKS if t[2] == cmd), "")
+        # Marker first, then realistic filler / Marcador primeiro, depois enchimento
+        return f"{marker}\n" + "\n".join(f"| line {i} of {cmd.split()[0]} output" for i in
+                                         range(self.output_filler // 32))
+
+    def get_hexstrike_health(self):
+        return self.body.check_health()
+
+    def shutdown(self):
+        pass
+
+
+def run_session(server, use_memory, session_id):
+    client = server.app.test_client()
+    results = []
+    for message, *_ in TASKS:
+        core = server.core = ScriptedSessionCore()
+        body = {'message': message, 'language': 'en', 'max_iterations': 8, 'tool_cache': False,
+                'llm_cache': 'off', 'routing': False, 'record': False, 'memory': use_memory}
+        response = client.post('/chat', json=body, headers={'X-Session-Id': session_id})
+        commands = 0
+        try:
+            for line in response.response:
+                commands += b'Executando' in line
+        finally:
+            response.close()
+        results.append({'task': message[:50], 'iterations': len(core.prompts), 'commands': commands,
+                        'first_prompt_chars': core.prompts[0], 'total_prompt_chars': sum(core.prompts)})
+    totals = {key: sum(r[key] for r in results)
+              for key in ('iterations', 'commands', 'first_prompt_chars', 'total_prompt_chars')}
+    return {'tasks': results, 'totals': totals}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+
+    server = load_server()
+    results = {}
+    for label, use_memory in (('without_memory', False), ('with_memory', True)):
+        results[label] = run_session(server, use_memory, f"bench-{label}")
+        print(f"[Memory] {label}:")
+        for task in results[label]['tasks']:
+            print(f"  {task['task']:<50} iterations {task['iterations']}  commands {task['commands']}"
+                  f"  first prompt {task['first_prompt_chars']:>6}  total prompt {task['total_prompt_chars']:>6}")
+        print(f"  {'TOTAL':<50} {results[label]['totals']}")
+    off, on = results['without_memory']['totals'], results['with_memory']['totals']
+    results['change'] = {key: round((on[key] - off[key]) / off[key] * 100.0, 1) for key in off if off[key]}
+    print(f"[Memory] Change with memory (%): {results['change']}")
+    write_results(args.out, 'task_memory', results, {'tasks': len(TASKS)})
+
+
+if __name__ == '__main__':
+    main()
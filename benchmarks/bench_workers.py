@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Multi-process workers: consistency and throughput / Workers multi-processo
+==========================================================================
+
+Consistency (exits 1 on any violation) / Consistência (sai com 1 se falhar):
+  - state: concurrent StateStore.update() increments from several processes
+    lose no update / incrementos concorrentes de vários processos não se perdem
+  - sessions: concurrent SessionStore saves of one session never leave a torn
+    file for readers / saves concorrentes nunca deixam arquivo pela metade
+  - http: against N real workers, concurrent POST /config merges all keep
+    every key, and config, sessions and cleanup jobs written through one worker
+    are seen by all / com N workers reais, POST /config concorrentes mantêm
+    todas as chaves e config, sessões e jobs são vistos por todos os workers
+
+Throughput: /chat tasks per second (FakeAgentCore, CPU-bound streaming) with 1
+and N workers under the same client concurrency. Scaling needs at least N
+CPU cores. / Tarefas /chat por segundo com 1 e N workers; escalar exige N núcleos.
+
+Usage / Uso:
+    python benchmarks/bench_workers.py --workers 4 --out workers.json
+    python benchmarks/bench_workers.py --quick
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, summarize, write_results
+
+sys.path.insert(0, BACKEND_DIR)
+import workers
+from state import SessionStore, StateStore
+
+WORKER_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker_app.py')
+
+
+# ----------------------------------------------------------------- state/sessions
+
+def _increment(path, count):
+    store = StateStore(path)
+    for _ in range(count):
+        store.update('bench', 'counter', lambda value: (value or 0) + 1)
+
+
+def check_state(processes, increments):
+    """No lost updates across processes / Nenhum incremento perdido entre processos"""
+    path = os.path.join(tempfile.mkdtemp(prefix='hexagent-state-'), 'state.db')
+    StateStore(path)
+    ctx = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    procs = [ctx.Process(target=_increment, args=(path, increments)) for _ in range(processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+    value = StateStore(path).get('bench', 'counter')
+    expected = processes * increments
+    return {'ok': value == expected, 'value': value, 'expected': expected,
+            'updates_per_second': round(expected / elapsed, 1)}
+
+
+def _save_sessions(directory, writer, count, blocks):
+    store = SessionStore(directory)
+    for n in range(count):
+        store.save('shared', {'writer': writer, 'n': n, 'blocks': [f"{writer}-{n}-{i}" * 20 for i in range(blocks)]})
+
+
+def check_sessions(processes, saves, blocks):
+    """Readers never see a torn session file / Leitores nunca veem sessão pela metade"""
+    directory = tempfile.mkdtemp(prefix='hexagent-sessions-')
+    store = SessionStore(directory)
+    store.save('shared', {'writer': -1, 'n': 0, 'blocks': []})
+    ctx = multiprocessing.get_context('spawn')
+    procs = [ctx.Process(target=_save_sessions, args=(directory, w, saves, blocks)) for w in range(processes)]
+    for p in procs:
+        p.start()
+    reads = torn = 0
+    while any(p.is_alive() for p in procs):
+        try:
+            data = store.load('shared')
+        except ValueError:
+            torn += 1
+            continue
+        reads += 1
+        if data['writer'] >= 0 and (len(data['blocks']) != blocks or
+                                    not all(b.startswith(f"{data['writer']}-{data['n']}-") for b in data['blocks'])):
+            torn += 1
+    for p in procs:
+        p.join()
+    leftovers = [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    return {'ok': torn == 0 and not leftovers, 'reads': reads, 'torn': torn, 'leftover_tmp': len(leftovers)}
+
+
+# --------------------------------------------------------------------- workers
+
+class WorkerSet:
+    """N worker processes of the backend on one port / N workers do backend numa porta"""
+
+    def __init__(self, count, home, fake_core):
+        self.count = count
+        self.ready_dir = tempfile.mkdtemp(prefix='hexagent-ready-')
+        self.env = dict(os.environ, HOME=home, BENCH_FAKE_CORE=json.dumps(fake_core), BENCH_READY_DIR=self.ready_dir)
+        self.sock = None
+        self.processes = []
+        self.url = None
+
+    def __enter__(self):
+        self.sock = workers.bind('127.0.0.1', 0)
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.processes = workers.spawn(WORKER_APP, self.sock, self.count, env=self.env)
+        # Every worker must be up, not just the first to accept / Todos os workers precisam estar prontos
+        pids = {str(p.pid) for p in self.processes}
+        deadline = time.monotonic() + 60
+        while not pids <= set(os.listdir(self.ready_dir)):
+            if time.monotonic() > deadline or any(p.poll() is not None for p in self.processes):
+                workers.stop(self.processes)
+                raise RuntimeError("workers failed to start / workers não iniciaram")
+            time.sleep(0.1)
+        return self
+
+    def __exit__(self, *exc):
+        workers.stop(self.processes)
+        self.sock.close()
+        return False
+
+
+def fresh_get(url, path, **kwargs):
+    # New connection per call, so calls spread over the workers / Nova conexão por chamada
+    return requests.get(f"{url}{path}", headers={'Connection': 'close'}, timeout=10, **kwargs)
+
+
+def fresh_post(url, path, body):
+    return requests.post(f"{url}{path}", json=body, headers={'Connection': 'close'}, timeout=10)
+
+
+def check_http(count, clients, rounds):
+    """Cross-worker consistency over HTTP / Consistência entre workers via HTTP"""
+    home = tempfile.mkdtemp(prefix='hexagent-workers-')
+    failures = []
+    with WorkerSet(count, home, {}) as ws:
+        url = ws.url
+
+        # Concurrent shallow merges from every client keep every key
+        # Mesclas concorrentes de todos os clientes mantêm todas as chaves
+        def post_keys(client):
+            for n in range(rounds):
+                fresh_post(url, '/config', {f"bench_{client}_{n}": n}).raise_for_status()
+
+        threads = [threading.Thread(target=post_keys, args=(c,)) for c in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expected = {f"bench_{c}_{n}" for c in range(clients) for n in range(rounds)}
+        for _ in range(count * 4):
+            missing = expected - set(fresh_get(url, '/config').json())
+            if missing:
+                failures.append(f"config missing {len(missing)} key(s)")
+                break
+
+        # A session saved through one worker loads through all / Sessão salva em um worker carrega em todos
+        fresh_post(url, '/sessions', {'action': 'save', 'name': 'bench', 'data': ['a', 'b']}).raise_for_status()
+        for _ in range(count * 4):
+            body = fresh_post(url, '/sessions', {'action': 'load', 'name': 'bench'}).json()
+            if body.get('data') != ['a', 'b']:
+                failures.append(f"session load returned {body}")
+                break
+
+        # A cleanup job started in one worker is visible in all / Job iniciado em um worker é visto por todos
+        job = fresh_post(url, '/cleanup', {'target': 'tmp'}).json()['job']
+        time.sleep(0.2)
+        for _ in range(count * 4):
+            response = fresh_get(url, f"/cleanup/{job['id']}")
+            if response.status_code != 200:
+                failures.append(f"cleanup job {job['id']} not found ({response.status_code})")
+                break
+    return {'ok': not failures, 'failures': failures, 'config_keys': len(expected)}
+
+
+# ------------------------------------------------------------------ throughput
+
+def chat_task(session, url, iterations):
+    body = {'message': 'worker benchmark', 'language': 'en', 'max_iterations': iterations + 1,
+            'tool_cache': False, 'llm_cache': 'off', 'routing': False}
+    start = time.perf_counter()
+    with session.post(f"{url}/chat", json=body, stream=True) as response:
+        response.raise_for_status()
+        for _ in response.iter_lines():
+            pass
+    return time.perf_counter() - start
+
+
+def bench_throughput(count, clients, seconds, fake_core, iterations):
+    """Tasks per second with count workers / Tarefas por segundo com count workers"""
+    home = tempfile.mkdtemp(prefix='hexagent-workers-')
+    # Admission is per worker; open it up so the clients are the only limit
+    # Admissão é por worker; liberada para que só os clientes limitem
+    os.makedirs(os.path.join(home, '.hexagent-gui', 'config'), exist_ok=True)
+    with open(os.path.join(home, '.hexagent-gui', 'config', 'config.json'), 'w') as f:
+        json.dump({'admission': {'chat_concurrency': clients, 'max_queue_total': clients * 4},
+                   'tracing': {'enabled': False}}, f)
+    samples = []
+    errors = []
+    lock = threading.Lock()
+    with WorkerSet(count, home, fake_core) as ws:
+        chat_task(requests.Session(), ws.url, iterations)
+        deadline = time.perf_counter() + seconds
+
+        def client():
+            session = requests.Session()
+            while time.perf_counter() < deadline:
+                try:
+                    elapsed = chat_task(session, ws.url, iterations)
+                except requests.RequestException as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    samples.append(elapsed)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    return {'workers': count, 'clients': clients, 'tasks': len(samples), 'errors': len(errors),
+            'tasks_per_second': round(len(samples) / elapsed, 2), 'latency': summarize(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=max(2, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--clients', type=int, default=8, help='concurrent /chat clients / clientes concorrentes')
+    parser.add_argument('--seconds', type=float, default=10.0, help='per throughput run / por execução')
+    parser.add_argument('--tokens', type=int, default=400, help='tokens per reply / tokens por resposta')
+    parser.add_argument('--iterations', type=int, default=2, help='iterations with commands per task')
+    parser.add_argument('--quick', action='store_true', help='small counts for a smoke run')
+    parser.add_argument('--skip-throughput', action='store_true')
+    parser.add_argument('--out', help='JSON results file')
+    args = parser.parse_args()
+    if args.quick:
+        args.seconds = 3.0
+
+    results = {}
+    scale = 1 if args.quick else 4
+    print("[Bench] state: concurrent increments")
+    results['state'] = check_state(4, 100 * scale)
+    print(f"        {results['state']}")
+    print("[Bench] sessions: concurrent saves with a reader")
+    results['sessions'] = check_sessions(4, 25 * scale, 200)
+    print(f"        {results['sessions']}")
+    print(f"[Bench] http: {args.workers} workers")
+    results['http'] = check_http(args.workers, 4, 5 * scale)
+    print(f"        {results['http']}")
+
+    if not args.skip_throughput:
+        fake_core = {'tokens_per_reply': args.tokens, 'code_iterations': args.iterations, 'output_size': 4096}
+        runs = []
+        for count in (1, args.workers):
+            print(f"[Bench] throughput: {count} worker(s), {args.clients} clients, {args.seconds:.0f}s")
+            run = bench_throughput(count, args.clients, args.seconds, fake_core, args.iterations)
+            print(f"        {run['tasks_per_second']} tasks/s, p50 {run['latency'].get('p50_ms')} ms,"
+                  f" {run['errors']} error(s)")
+            runs.append(run)
+        results['throughput'] = {'runs': runs, 'cpu_count': os.cpu_count(),
+                                 'speedup': round(runs[1]['tasks_per_second'] / runs[0]['tasks_per_second'], 2)
+                                 if runs[0]['tasks_per_second'] else None}
+        print(f"[Bench] speedup x{results['throughput']['speedup']} on {os.cpu_count()} CPU(s)")
+
+    write_results(args.out, 'workers', results, vars(args))
+    failed = [name for name in ('state', 'sessions', 'http') if not results[name]['ok']]
+    if failed:
+        print(f"[Bench] FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print("[Bench] Consistency checks passed")
+
+
+if __name__ == '__main__':
+    main()
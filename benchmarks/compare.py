@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compare two benchmark result files / Compara dois arquivos de resultado
+========================================================================
+
+Walks both JSON documents and prints every metric that exists in both, with
+the relative change. Only keys named as a measurement are compared:
+latencies, durations and sizes (*_ms, *_seconds, *_bytes, *_kb, *_mb) and
+error counts are better when lower; rates (*_per_sec, *_per_second) and
+speedups when higher. Descriptive numbers (n, concurrency, samples, sizes
+of the workload, ...) are skipped.
+
+Percorre os dois JSON e imprime cada métrica presente em ambos, com a
+variação relativa. Só chaves nomeadas como medida são comparadas:
+latências, durações, tamanhos e contagens de erro são melhores quando
+menores; taxas e speedups quando maiores. Números descritivos (n,
+concorrência, amostras, ...) são ignorados.
+
+Usage / Uso:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+
+Exits 1 when a regression is flagged / Sai com 1 quando há regressão.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+HIGHER_IS_BETTER = ('_per_sec', '_per_second', 'speedup')
+LOWER_IS_BETTER = ('_ms', '_seconds', '_bytes', '_kb', '_mb')
+# Workload settings that carry a unit suffix / Configurações da carga com sufixo de unidade
+DESCRIPTIVE = {'limit_bytes', 'size_mb'}
+ERROR_COUNTS = {'errors', 'failures', 'torn', 'leftover_tmp', 'missing_execs', 'missing_steps', 'divergent_prompts'}
+
+
+def flatten(node, prefix=''):
+    """Flatten nested dicts into dotted keys / Achata dicionários em chaves pontuadas"""
+    items = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            items.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        items[prefix] = node
+    return items
+
+
+def direction(key):
+    """
+    True when lower is better, False when higher is, None for descriptive keys
+    True se menor é melhor, False se maior é melhor, None para chaves descritivas
+    """
+    name = key.rsplit('.', 1)[-1]
+    if name in DESCRIPTIVE:
+        return None
+    if name.endswith(HIGHER_IS_BETTER):
+        return False
+    if name.endswith(LOWER_IS_BETTER) or name in ERROR_COUNTS:
+        return True
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='flag changes above this percent / destaca variações acima deste percentual')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        cand = json.load(f)
+
+    print(f"baseline:  {base.get('suite')} @ {base.get('commit')}")
+    print(f"candidate: {cand.get('suite')} @ {cand.get('commit')}")
+    old = flatten(base.get('results', {}))
+    new = flatten(cand.get('results', {}))
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        lower_is_better = direction(key)
+        if lower_is_better is None:
+            continue
+        before, after = old[key], new[key]
+        if before:
+            change = (after - before) / before * 100.0
+        else:
+            # From zero any change is unbounded (e.g. errors appearing)
+            # A partir de zero qualquer variação é ilimitada (ex.: erros surgindo)
+            change = 0.0 if after == before else math.copysign(math.inf, after)
+        worse = change > 0 if lower_is_better else change < 0
+        flag = ''
+        if abs(change) >= args.threshold:
+            flag = '  REGRESSION' if worse else '  improved'
+            regressions += worse
+        print(f"{key:70s} {before:>12.3f} -> {after:>12.3f} ({change:+6.1f}%){flag}")
+    print(f"\n{regressions} regression(s) above {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
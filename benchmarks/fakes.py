@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fake AgentCore and HexStrike for benchmarks / AgentCore e HexStrike falsos
+===========================================================================
+
+FakeAgentCore mimics the surface server.py uses (brain, body, chat_step,
+execute_tool, get_hexstrike_health) with a synthetic token generator and a
+synthetic command executor, so the backend can be measured without an LLM
+provider or a HexStrike server.
+
+FakeAgentCore imita a interface usada pelo server.py (brain, body, chat_step,
+execute_tool, get_hexstrike_health) com um gerador sintético de tokens e um
+executor sintético de comandos, permitindo medir o backend sem provedor de
+LLM nem servidor HexStrike.
+"""
+
+import re
+import time
+
+ITERATION_RE = re.compile(r'\[Histórico de Execução - Iteração (\d+)\]')
+
+
+class FakeBody:
+    """Stand-in for the HexStrike client / Substituto do cliente HexStrike"""
+
+    def __init__(self, health_latency=0.0):
+        self.health_latency = health_latency
+
+    def check_health(self):
+        if self.health_latency:
+            time.sleep(self.health_latency)
+        return {'alive': True, 'status': 'ok'}
+
+
+class FakeAgentCore:
+    """
+    Synthetic AgentCore / AgentCore sintético
+
+    Args:
+        token_rate: Tokens per second, 0 = as fast as possible / Tokens por segundo
+        tokens_per_reply: Tokens in each chat_step reply / Tokens por resposta
+        token_text: Text of one token / Texto de um token
+        code_iterations: Replies that contain a bash block before the final answer
+                         Respostas com bloco bash antes da resposta final
+        commands_per_block: Commands in each bash block / Comandos por bloco
+        exec_latency: Seconds per execute_tool call / Segundos por execute_tool
+        output_size: Bytes returned by execute_tool / Bytes retornados
+        command: Template of each command, with {iteration} and {n} / Modelo de cada comando
+    """
+
+    def __init__(self, token_rate=0, tokens_per_reply=50, token_text='tok ', code_iterations=0,
+                 commands_per_block=1, exec_latency=0.0, output_size=64, health_latency=0.0,
+                 command="echo step-{iteration}-{n}"):
+        self.token_rate = token_rate
+        self.tokens_per_reply = tokens_per_reply
+        self.token_text = token_text
+        self.code_iterations = code_iterations
+        self.commands_per_block = commands_per_block
+        self.exec_latency = exec_latency
+        self.output_size = output_size
+        self.command = command
+        self.brain = object()
+        self.body = FakeBody(health_latency)
+        self.chat_calls = 0
+        self.exec_calls = 0
+
+    def chat_step(self, prompt):
+        """
+        Stream a synthetic reply; iteration is derived from the prompt so the
+        fake stays stateless across concurrent tasks.
+        Gera resposta sintética; a iteração vem do prompt (sem estado).
+        """
+        self.chat_calls += 1
+        match = ITERATION_RE.search(prompt)
+        iteration = int(match.group(1)) + 1 if match else 1
+        delay = 1.0 / self.token_rate if self.token_rate else 0
+        for _ in range(self.tokens_per_reply):
+            if delay:
+                time.sleep(delay)
+            yield self.token_text
+        if iteration <= self.code_iterations:
+            commands = '\n'.join(self.command.format(iteration=iteration, n=n)
+                                 for n in range(self.commands_per_block))
+            yield f"\n```bash\n{commands}\n```\n"
+        else:
+            yield "\nTarefa concluída."
+
+    def execute_tool(self, cmd):
+        self.exec_calls += 1
+        if self.exec_latency:
+            time.sleep(self.exec_latency)
+        header = f"$ {cmd}\n"
+        return header + 'x' * max(0, self.output_size - len(header))
+
+    def get_hexstrike_health(self):
+        return self.body.check_health()
+
+    def shutdown(self):
+        pass
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark harness / Infraestrutura de benchmark
+================================================
+
+Loads backend/server.py against a throwaway HOME (so ~/.hexagent-gui, shell
+history and sessions are synthetic), serves it on a local port, and provides
+timing/statistics helpers plus JSON result files tagged with the git commit.
+
+Carrega backend/server.py com um HOME descartável (~/.hexagent-gui, histórico
+do shell e sessões sintéticos), serve em uma porta local e fornece auxiliares
+de tempo/estatística e arquivos JSON de resultado marcados com o commit git.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_DIR, 'backend')
+
+
+def load_server(home=None, quiet=True):
+    """
+    Import backend/server.py with HOME pointed at a temp dir; returns the module
+    Importa backend/server.py com HOME em diretório temporário; retorna o módulo
+    """
+    home = home or tempfile.mkdtemp(prefix='hexagent-bench-')
+    os.environ['HOME'] = home
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    sink = io.StringIO() if quiet else sys.stdout
+    with contextlib.redirect_stdout(sink):
+        import server
+    return server
+
+
+class LiveServer:
+    """
+    Serve a WSGI app on 127.0.0.1 in a background thread
+    Serve um app WSGI em 127.0.0.1 numa thread em background
+    """
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self._server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        return False
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of sorted values / Percentil por posição"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds / Resumo de latência em milissegundos"""
+    values = sorted(samples)
+    if not values:
+        return {'n': 0}
+    ms = lambda v: round(v * 1000.0, 3)
+    return {
+        'n': len(values),
+        'mean_ms': ms(sum(values) / len(values)),
+        'min_ms': ms(values[0]),
+        'p50_ms': ms(percentile(values, 50)),
+        'p95_ms': ms(percentile(values, 95)),
+        'p99_ms': ms(percentile(values, 99)),
+        'max_ms': ms(values[-1]),
+    }
+
+
+def time_calls(fn, repeat, warmup=1):
+    """Call fn() repeat times and return durations / Executa fn() e retorna durações"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def write_results(path, suite, results, params=None):
+    """
+    Write a JSON result file comparable across commits / Grava JSON comparável entre commits
+    """
+    document = {
+        'suite': suite,
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params or {},
+        'results': results,
+    }
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"[Bench] Results written to {path}")
+    return document
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Replay recorded agent sessions / Re-executa sessões gravadas do agente
+=======================================================================
+
+Loads recordings written by backend/recorder.py (enable with
+"recorder": {"enabled": true} in config.json or "record": true per /chat
+request) and re-runs them against the backend at N× concurrency. A
+ReplayCore stands in for AgentCore and answers chat_step/execute_tool with
+the recorded chunks and results, so no network or HexStrike is needed.
+
+Carrega gravações feitas por backend/recorder.py (ative com
+"recorder": {"enabled": true} no config.json ou "record": true por
+requisição /chat) e as re-executa no backend com concorrência N×. Um
+ReplayCore substitui o AgentCore e responde chat_step/execute_tool com os
+chunks e resultados gravados, sem rede nem HexStrike.
+
+Usage / Uso:
+    python benchmarks/replay.py ~/.hexagent-gui/log/recordings/*.jsonl.gz \\
+        --concurrency 8 --speed 1.0 --out replay.json
+
+--speed scales recorded delays (1.0 = original timing, 0 = instant).
+--speed escala os atrasos gravados (1.0 = tempo original, 0 = instantâneo).
+"""
+
+import argparse
+import glob
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import BACKEND_DIR, LiveServer, load_server, summarize, write_results
+
+sys.path.insert(0, BACKEND_DIR)
+from recorder import load_recording, prompt_digest
+
+HISTORY_MARKER = "\n\n[Histórico de Execução - Iteração "
+
+
+class ReplayCore:
+    """
+    AgentCore stand-in that serves recorded responses
+    Substituto do AgentCore que serve respostas gravadas
+
+    chat_step(prompt) finds the recording whose task prompt prefixes the
+    prompt and picks the step by iteration number; execute_tool(cmd) answers
+    from the step the same request thread is currently in.
+    """
+
+    def __init__(self, recordings, speed=1.0):
+        self.speed = speed
+        self.brain = object()
+        self.body = object()
+        self._by_prompt = {}
+        for rec in recordings:
+            steps = {step['iteration']: step for step in rec['steps']}
+            self._by_prompt[rec['header']['prompt']] = steps
+        self._local = threading.local()
+        self.divergent_prompts = 0
+        self.missing_steps = 0
+        self.missing_execs = 0
+
+    def chat_step(self, prompt):
+        task, _, rest = prompt.partition(HISTORY_MARKER)
+        iteration = int(rest.split(']', 1)[0]) + 1 if rest else 1
+        step = self._by_prompt.get(task, {}).get(iteration)
+        self._local.step = step
+        self._local.exec_index = 0
+        if step is None:
+            self.missing_steps += 1
+            yield "[replay] no recorded step. Tarefa concluída."
+            return
+        if step['prompt'] != prompt_digest(prompt):
+            self.divergent_prompts += 1
+        for delay, chunk in step['chunks']:
+            if self.speed and delay > 0:
+                time.sleep(delay * self.speed)
+            yield chunk
+
+    def execute_tool(self, cmd):
+        step = getattr(self._local, 'step', None)
+        execs = step['execs'] if step else []
+        index = self._local.exec_index if step else 0
+        for offset, record in enumerate(execs[index:]):
+            if record['cmd'] == cmd:
+                self._local.exec_index = index + offset + 1
+                if self.speed and record['seconds'] > 0:
+                    time.sleep(record['seconds'] * self.speed)
+                return record['result']
+        self.missing_execs += 1
+        return f"[replay] no recorded result for: {cmd}"
+
+    def shutdown(self):
+        pass
+
+
+def replay_body(recording):
+    """
+    Request that reproduces the recorded prompt exactly
+    Requisição que reproduz exatamente o prompt gravado
+    """
+    original = recording['header'].get('request') or {}
+    iterations = max((step['iteration'] for step in recording['steps']), default=1)
+    return {
+        'message': recording['header']['prompt'],
+        'language': 'en',             # prompt already carries the language prefix
+        'web_search': False,          # and the web search context
+        'auto_execute': original.get('auto_execute', True),
+        'max_iterations': original.get('max_iterations') or iterations,
+        'tool_cache': False,
+        'llm_cache': 'off',
+        'routing': False,
+        'record': False,
+    }
+
+
+def run_task(session, url, body, session_id):
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    with session.post(f"{url}/chat", json=body, stream=True,
+                      headers={'X-Session-Id': session_id}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(line) + 1
+    return time.perf_counter() - start, first_byte or 0.0, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recordings', nargs='+', help='recording files or globs / arquivos ou globs')
+    parser.add_argument('--concurrency', type=int, default=4, help='copies of each trace run at once')
+    parser.add_argument('--rounds', type=int, default=1, help='times each worker replays the set')
+    parser.add_argument('--speed', type=float, default=1.0, help='delay scale, 0 = instant')
+    parser.add_argument('--out', help='JSON results file / arquivo JSON de resultados')
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.recordings for p in glob.glob(os.path.expanduser(pattern))})
+    recordings = [load_recording(p) for p in paths]
+    if not recordings:
+        parser.error('no recordings found / nenhuma gravação encontrada')
+    print(f"[Replay] {len(recordings)} recording(s), concurrency {args.concurrency}, speed {args.speed}")
+
+    server = load_server()
+    core = ReplayCore(recordings, speed=args.speed)
+    server.core = core
+    # Admission limits would serialize the replay; lift them for the run
+    # Limites de admissão serializariam o replay; liberados durante a execução
+    for cls in server.admission._classes.values():
+        cls.limit = max(cls.limit, args.concurrency)
+
+    latencies, first_bytes, sizes = [], [], []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        session = requests.Session()
+        for _ in range(args.rounds):
+            for rec in recordings:
+                seconds, ttfb, size = run_task(session, live.url, replay_body(rec), f"replay-{worker_id}")
+                with lock:
+                    latencies.append(seconds)
+                    first_bytes.append(ttfb)
+                    sizes.append(size)
+
+    tracemalloc.start()
+    with LiveServer(server.app) as live:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results = {
+        'task_latency': summarize(latencies),
+        'time_to_first_byte': summarize(first_bytes),
+        'tasks_per_sec': round(len(latencies) / elapsed, 2),
+        'stream_bytes_per_task': round(sum(sizes) / len(sizes), 1),
+        'peak_traced_memory_bytes': peak,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'fidelity': {
+            'divergent_prompts': core.divergent_prompts,
+            'missing_steps': core.missing_steps,
+            'missing_execs': core.missing_execs,
+        },
+    }
+    params = {'recordings': [os.path.basename(p) for p in paths], 'concurrency': args.concurrency,
+              'rounds': args.rounds, 'speed': args.speed}
+    document = write_results(args.out, 'replay', results, params)
+    if not args.out:
+        import json
+        print(json.dumps(document['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
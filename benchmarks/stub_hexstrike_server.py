@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stub HexStrike API server / Servidor stub da API HexStrike
+===========================================================
+
+Serves GET /health and POST /api/command over keep-alive HTTP/1.1 with a
+configurable command latency and output size, so backend-to-HexStrike client
+overhead can be measured without HexStrike or any security tool installed.
+
+Responde GET /health e POST /api/command com HTTP/1.1 keep-alive, latência de
+comando e tamanho de saída configuráveis, para medir o overhead do cliente
+backend -> HexStrike sem HexStrike nem ferramentas instaladas.
+
+Usage / Uso:
+    python benchmarks/stub_hexstrike_server.py --port 8888 --latency 0.01
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency, output_size):
+    """Build a request handler bound to the given behaviour / Cria o handler"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, keep-alive
+        # calls stall on Nagle + delayed ACK (~40 ms)
+        # Cabeçalhos e corpo saem em escritas separadas; sem isto, chamadas
+        # keep-alive travam no Nagle + ACK atrasado (~40 ms)
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != '/health':
+                self._send_json({'error': 'not found'}, 404)
+                return
+            self.server.connections_seen.add(self.client_address)
+            self._send_json({'status': 'healthy', 'alive': True})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if self.path != '/api/command':
+                self._send_json({'error': 'not found'}, 404)
+                return
+            self.server.connections_seen.add(self.client_address)
+            self.server.client_headers.add(self.headers.get('X-Client', ''))
+            if latency:
+                time.sleep(latency)
+            command = body.get('command', '')
+            self._send_json({'success': True, 'return_code': 0, 'command': command,
+                             'stdout': 'x' * output_size, 'stderr': ''})
+
+    return Handler
+
+
+def start_stub(port=0, latency=0.0, output_size=256):
+    """
+    Start a stub in a background thread; returns (server, base_url)
+    Inicia um stub em thread; retorna (servidor, base_url)
+
+    server.connections_seen holds the distinct client (host, port) pairs,
+    i.e. the number of TCP connections opened / conexões TCP abertas;
+    server.client_headers holds the X-Client values of /api/command calls
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency, output_size))
+    server.daemon_threads = True
+    server.connections_seen = set()
+    server.client_headers = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per command')
+    parser.add_argument('--output-size', type=int, default=256, help='stdout bytes per command')
+    args = parser.parse_args()
+    server, url = start_stub(args.port, args.latency, args.output_size)
+    print(f"[Stub] HexStrike API at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stub OpenAI-compatible server / Servidor stub compatível com OpenAI
+====================================================================
+
+Serves POST /chat/completions with a streamed (SSE) answer of configurable
+latency, token rate and failure rate. Used to exercise the provider router
+and the benchmarks without network access or API spend.
+
+Responde POST /chat/completions com uma resposta em stream (SSE) de latência,
+taxa de tokens e taxa de falhas configuráveis. Usado para exercitar o roteador
+de provedores e os benchmarks sem rede nem custo de API.
+
+Usage / Uso:
+    python benchmarks/stub_openai_server.py --port 9001 --ttft 0.2 --tps 50
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(ttft, tps, tokens, fail_rate, reply):
+    """Build a request handler bound to the given behaviour / Cria o handler"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not self.path.endswith('/chat/completions'):
+                self.send_error(404)
+                return
+            if random.random() < fail_rate:
+                payload = b'{"error": "stub failure"}'
+                self.send_response(500)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            time.sleep(ttft)
+            words = (reply or 'token ' * tokens).split(' ')
+            for word in words:
+                chunk = {'model': body.get('model'), 'choices': [{'delta': {'content': word + ' '}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if tps:
+                    time.sleep(1.0 / tps)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def start_stub(port=0, ttft=0.0, tps=0, tokens=20, fail_rate=0.0, reply=None):
+    """
+    Start a stub in a background thread; returns (server, base_url)
+    Inicia um stub em thread; retorna (servidor, base_url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(ttft, tps, tokens, fail_rate, reply))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--ttft', type=float, default=0.2, help='seconds before first token')
+    parser.add_argument('--tps', type=float, default=50, help='tokens per second (0 = unlimited)')
+    parser.add_argument('--tokens', type=int, default=20, help='tokens per reply')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--reply', default=None, help='fixed reply text')
+    args = parser.parse_args()
+    server, url = start_stub(args.port, args.ttft, args.tps, args.tokens, args.fail_rate, args.reply)
+    print(f"[Stub] OpenAI-compatible server at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark worker entry point / Ponto de entrada de worker para benchmark
+========================================================================
+
+Started by bench_workers.py through backend/workers.py as
+`python worker_app.py --worker-fd FD`: loads backend/server.py with the
+HOME from the environment, swaps in a FakeAgentCore (options as JSON in
+BENCH_FAKE_CORE), creates BENCH_READY_DIR/<pid> once loaded and serves on
+the inherited socket like a real worker.
+
+Iniciado pelo bench_workers.py via backend/workers.py como
+`python worker_app.py --worker-fd FD`: carrega backend/server.py com o HOME
+do ambiente, usa um FakeAgentCore (opções em JSON em BENCH_FAKE_CORE), cria
+BENCH_READY_DIR/<pid> ao carregar e serve no socket herdado como um worker real.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import load_server
+from fakes import FakeAgentCore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--worker-fd', type=int, required=True)
+    args = parser.parse_args()
+
+    server = load_server(os.environ['HOME'])
+    server.core = FakeAgentCore(**json.loads(os.environ.get('BENCH_FAKE_CORE', '{}')))
+    server.WORKER_ROLE = 'worker'
+    server._start_state_sync()
+    ready_dir = os.environ.get('BENCH_READY_DIR')
+    if ready_dir:
+        open(os.path.join(ready_dir, str(os.getpid())), 'w').close()
+    server.workers.run_worker(server.app, args.worker_fd)
+
+
+if __name__ == '__main__':
+    main()